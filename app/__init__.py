@@ -2,4 +2,9 @@
 Sheets Integration API - Uma API REST para integração com Google Sheets.
 """
 
-__version__ = "1.0.0" 
\ No newline at end of file
+import time
+
+__version__ = "1.0.0"
+
+# Início da importação do pacote, para medir o tempo de inicialização
+STARTED_AT = time.perf_counter() 
\ No newline at end of file
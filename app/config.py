@@ -3,7 +3,7 @@ Configurações da aplicação usando variáveis de ambiente.
 """
 import os
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 from pydantic_settings import BaseSettings
 
@@ -18,10 +18,76 @@ class Settings(BaseSettings):
     
     log_level: str = "INFO"
     log_file: str = "logs/app.log"
+    log_format: str = "text"  # "text" ou "json"
+    log_max_bytes: int = 10 * 1024 * 1024
+    log_rotate_when: str = ""  # ex.: "midnight"; substitui a rotação por tamanho
+    log_backup_count: int = 5
+    
+    metrics_enabled: bool = True
+    
+    warmup_on_startup: bool = False
+    warmup_retry_seconds: float = 5.0
     
     allowed_origins: str = "*"
     
     rate_limit_per_minute: int = 60
+    read_rate_limit_per_minute: int = 60
+    google_max_retries: int = 5
+    google_backoff_base_seconds: float = 1.0
+    google_backoff_max_seconds: float = 32.0
+    google_deadline_seconds: float = 10.0
+    
+    google_http_pool_size: int = 16
+    google_connect_timeout_seconds: float = 5.0
+    google_read_timeout_seconds: float = 30.0
+    google_keepalive_idle_seconds: int = 60
+    google_token_refresh_margin_seconds: float = 300.0
+    
+    sheets_max_workers: int = 8
+    
+    tenant_pool_size: int = 256
+    tenant_idle_seconds: int = 900
+    tenant_rate_limit_per_minute: int = 60
+    
+    page_max_limit: int = 1000
+    batch_get_max_ranges: int = 100
+    export_chunk_rows: int = 1000
+    
+    batch_max_rows: int = 10000
+    batch_chunk_rows: int = 500
+    batch_chunk_cells: int = 10000
+    
+    write_log_enabled: bool = False
+    write_log_path: str = "data/write_log.sqlite3"
+    write_log_batch_rows: int = 500
+    write_log_poll_seconds: float = 1.0
+    write_log_backoff_base_seconds: float = 1.0
+    write_log_backoff_max_seconds: float = 60.0
+    write_log_max_attempts: int = 5
+    
+    idempotency_ttl_seconds: int = 86400
+    idempotency_max_entries: int = 100000
+    idempotency_natural_key: bool = False
+    
+    stream_poll_seconds: float = 5.0
+    stream_heartbeat_seconds: float = 15.0
+    stream_history_size: int = 100
+    stream_queue_size: int = 1000
+    
+    replica_enabled: bool = False
+    replica_path: str = "data/replica.sqlite3"
+    replica_sync_interval_seconds: int = 30
+    
+    write_coalescing_enabled: bool = False
+    write_coalescing_max_rows: int = 100
+    write_coalescing_max_delay_ms: int = 50
+    write_coalescing_async_ack: bool = False
+    
+    sheet_handle_ttl_seconds: int = 300
+    records_cache_ttl_seconds: int = 30
+    records_cache_stale_seconds: int = 300
+    # None: revalida, exceto quando a réplica local atende as leituras
+    records_revalidate_with_drive: Optional[bool] = None
     
     class Config:
         env_file = ".env"
@@ -1,40 +1,112 @@
 """
 Aplicação principal da API de integração com Google Sheets.
 """
+import atexit
 import logging
+import queue
 import sys
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
 from pathlib import Path
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+from starlette.concurrency import run_in_threadpool
 
+from app import STARTED_AT
 from app.config import settings
 from app.routes.sheets_routes import router as sheets_router
+from app.services import metrics
+from app.services.serialization import dumps
+from app.services.sheets_service import sheets_service
 
 
-def setup_logging():
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+
+class JsonFormatter(logging.Formatter):
+    """Uma linha JSON por registro, para coletores de log estruturado."""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return dumps(entry).decode("utf-8")
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Enfileira o registro sem formatá-lo.
+    
+    O QueueHandler padrão monta a mensagem na thread que chamou o logger; aqui
+    a interpolação dos argumentos também fica para a thread do QueueListener.
+    Os argumentos passados ao logger não devem ser alterados depois da chamada.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def _file_handler() -> logging.Handler:
+    if settings.log_rotate_when:
+        return TimedRotatingFileHandler(
+            settings.log_file,
+            when=settings.log_rotate_when,
+            backupCount=settings.log_backup_count,
+            encoding="utf-8"
+        )
+    # Com log_max_bytes=0 o arquivo nunca é rotacionado
+    return RotatingFileHandler(
+        settings.log_file,
+        maxBytes=settings.log_max_bytes,
+        backupCount=settings.log_backup_count,
+        encoding="utf-8"
+    )
+
+
+def setup_logging() -> QueueListener:
+    """
+    Envia os logs para uma fila escrita por uma thread própria.
+    
+    As chamadas ao logger só enfileiram o registro; a formatação e a escrita
+    no console e no arquivo acontecem fora do event loop.
+    """
     log_dir = Path(settings.log_file).parent
     log_dir.mkdir(exist_ok=True)
     
-    log_format = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    if settings.log_format == "json":
+        formatter: logging.Formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(LOG_FORMAT)
     
-    handlers = [
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler(settings.log_file, encoding='utf-8')
-    ]
+    handlers = [logging.StreamHandler(sys.stdout), _file_handler()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    # Grava o que ainda estiver na fila quando o processo terminar
+    atexit.register(listener.stop)
     
     logging.basicConfig(
         level=getattr(logging, settings.log_level),
-        format=log_format,
-        handlers=handlers
+        handlers=[DeferredQueueHandler(log_queue)]
     )
     
     logger = logging.getLogger("app")
     logger.info("Sistema de logging configurado")
+    return listener
 
 
-setup_logging()
+log_listener = setup_logging()
 logger = logging.getLogger("app")
 
 app = FastAPI(
@@ -52,13 +124,46 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Offset", "Retry-After"],
 )
 
 
+class MetricsMiddleware:
+    """Mede o tempo até o início da resposta, pela rota (não pela URL)."""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        start = time.perf_counter()
+        
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                route = scope.get("route")
+                metrics.observe_request(
+                    scope["method"],
+                    route.path if route is not None else "desconhecida",
+                    message["status"],
+                    time.perf_counter() - start
+                )
+            await send(message)
+        
+        await self.app(scope, receive, send_wrapper)
+
+
+if settings.metrics_enabled and metrics.enabled():
+    app.add_middleware(MetricsMiddleware)
+    metrics.register_service(sheets_service)
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Handler global para exceções não tratadas."""
-    logger.error(f"Erro não tratado: {str(exc)}", exc_info=True)
+    logger.error("Erro não tratado: %s", exc, exc_info=True)
     return JSONResponse(
         status_code=500,
         content={
@@ -78,7 +183,8 @@ async def http_exception_handler(request, exc):
             "status": "error",
             "message": exc.detail,
             "status_code": exc.status_code
-        }
+        },
+        headers=getattr(exc, "headers", None)
     )
 
 
@@ -86,14 +192,18 @@ async def http_exception_handler(request, exc):
 async def startup_event():
     """Evento executado no início da aplicação."""
     logger.info("🚀 Iniciando Sheets Integration API")
-    logger.info(f"📊 Planilha configurada: {settings.sheet_name}")
-    logger.info(f"🔧 Debug mode: {settings.debug}")
+    logger.info("📊 Planilha configurada: %s", settings.sheet_name)
+    logger.info("🔧 Debug mode: %s", settings.debug)
+    sheets_service.start_background_tasks()
+    if settings.warmup_on_startup:
+        sheets_service.start_warm_up()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Evento executado no encerramento da aplicação."""
     logger.info("🛑 Encerrando Sheets Integration API")
+    sheets_service.shutdown()
 
 
 @app.get("/health", tags=["Health"])
@@ -106,6 +216,34 @@ async def health_check():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Métricas no formato de exposição do Prometheus."""
+    if not (settings.metrics_enabled and metrics.enabled()):
+        raise HTTPException(status_code=404, detail="Métricas desabilitadas")
+    # A coleta lê os contadores do serviço (inclusive SQLite): roda no pool
+    body, content_type = await run_in_threadpool(metrics.render)
+    return Response(body, media_type=content_type)
+
+
+@app.get("/ready", tags=["Health"])
+async def readiness_check():
+    """
+    Indica se a instância pode receber tráfego.
+    
+    Com WARMUP_ON_STARTUP, responde 503 até a autenticação e a carga da
+    planilha terminarem; /health continua respondendo sem acessar o Google.
+    """
+    readiness = sheets_service.readiness()
+    content = {
+        "status": "ready" if readiness["ready"] else "starting",
+        "startup_seconds": startup_seconds,
+        **readiness
+    }
+    return JSONResponse(status_code=200 if readiness["ready"] else 503, content=content)
+
+
 app.include_router(sheets_router, prefix="/sheets", tags=["Sheets"])
 
-logger.info("✅ Aplicação configurada com sucesso")
\ No newline at end of file
+startup_seconds = time.perf_counter() - STARTED_AT
+logger.info("✅ Aplicação configurada com sucesso em %.0f ms", startup_seconds * 1000)
\ No newline at end of file
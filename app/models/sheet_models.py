@@ -2,7 +2,7 @@
 Modelos de dados para integração com Google Sheets.
 """
 from datetime import date
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel, Field, validator
 
 
@@ -49,3 +49,30 @@ class SheetRecord(BaseModel):
     serie: int
     initial_weight: str
     date: str
+
+
+class BatchRowResult(BaseModel):
+    """Resultado de uma linha da inserção em lote."""
+    index: int
+    status: str
+    errors: Optional[List[str]] = None
+
+
+class BatchResponse(BaseModel):
+    """Modelo para resposta da inserção em lote."""
+    status: str
+    inserted: int
+    rejected: int
+    failed: int
+    results: List[BatchRowResult]
+
+
+class BatchGetRequest(BaseModel):
+    """Modelo para leitura de vários intervalos."""
+    ranges: List[str] = Field(..., min_length=1)
+
+
+class BatchGetResponse(BaseModel):
+    """Modelo para resposta da leitura de vários intervalos."""
+    status: str
+    ranges: Dict[str, List[List[Any]]]
@@ -1,93 +1,576 @@
 """
 Rotas da API para operações com Google Sheets.
 """
+import asyncio
+import csv
+import io
+import json
 import logging
-from typing import List
+import math
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Body, HTTPException, Depends, Header, Path, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import ValidationError
 
-from app.models.sheet_models import SheetInput, SheetResponse, SheetRecord
-from app.services.sheets_service import sheets_service
+from app.config import settings
+from app.models.sheet_models import (
+    BatchGetRequest,
+    BatchGetResponse,
+    BatchResponse,
+    BatchRowResult,
+    SheetInput,
+    SheetRecord,
+    SheetResponse,
+)
+from app.services.idempotency import IdempotencyConflictError
+from app.services.rate_limiter import QuotaExceededError, is_api_error
+from app.services.record_index import normalize_name, sort_records
+from app.services.serialization import digest, dumps, etag
+from app.services.sheets_service import SHEET_COLUMNS, SheetsService, sheets_service
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+def _quota_exceeded(error: QuotaExceededError) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail=f"Cota do Google Sheets esgotada: {str(error)}",
+        headers={"Retry-After": str(max(1, math.ceil(error.retry_after)))}
+    )
+
+
+def get_service() -> SheetsService:
+    """Serviço da planilha padrão."""
+    return sheets_service
+
+
+def get_tenant_service(
+    sheet_id: str = Path(..., pattern=r"^[A-Za-z0-9_-]+$"),
+    worksheet: str = Path(..., min_length=1)
+) -> Iterator[SheetsService]:
+    """
+    Serviço de uma worksheet de outra planilha, obtido do pool.
+    
+    O serviço fica emprestado até o fim da requisição: se o pool o remover
+    nesse meio tempo, o encerramento espera a requisição terminar. A
+    dependência é síncrona de propósito: o FastAPI a executa no pool de
+    threads, e o ``shutdown()`` de um serviço removido (que pode gravar as
+    linhas pendentes no Google) não trava o event loop.
+    """
+    with sheets_service.tenant_lease(sheet_id, worksheet) as service:
+        yield service
+
+
+class RecordsQuery:
+    """Parâmetros de filtro, ordenação e paginação da listagem."""
+    
+    def __init__(
+        self,
+        limit: Optional[int] = Query(None, ge=1, le=settings.page_max_limit),
+        offset: int = Query(0, ge=0),
+        name: Optional[str] = Query(None, min_length=1),
+        serie: Optional[int] = Query(None),
+        date_from: Optional[date] = Query(None),
+        date_to: Optional[date] = Query(None),
+        sort: Optional[str] = Query(None, pattern=r"^-?(name|serie|initial_weight|date)$")
+    ):
+        self.limit = limit
+        self.offset = offset
+        self.filters = {
+            "name": name, "serie": serie, "date_from": date_from, "date_to": date_to
+        }
+        self.sort = sort
+    
+    @property
+    def needs_query(self) -> bool:
+        return self.sort is not None or any(v is not None for v in self.filters.values())
+
+
 @router.get("/dados", response_model=List[SheetRecord])
-async def list_data():
-    """Lista todos os dados da planilha."""
+async def list_data(
+    response: Response,
+    query: RecordsQuery = Depends(),
+    service: SheetsService = Depends(get_service),
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    Lista os dados da planilha.
+    
+    Aceita filtros por nome, série e intervalo de datas, ordenação (``sort``,
+    com ``-`` para decrescente) e paginação com limit/offset. Responde 304
+    quando ``If-None-Match`` corresponde à ETag atual.
+    """
     try:
         logger.info("Solicitação para listar dados recebida")
-        records = sheets_service.get_all_records()
+        limit, offset = query.limit, query.offset
+        headers = {}
+        if query.needs_query:
+            records = await service.query_records_async(**query.filters)
+            if query.sort is not None:
+                records = sort_records(records, query.sort)
+            if limit is not None:
+                end = offset + limit
+                if len(records) > end:
+                    headers["X-Next-Offset"] = str(end)
+                records = records[offset:end]
+            elif offset:
+                records = records[offset:]
+        elif limit is not None:
+            records = await service.get_records_page_async(offset, limit)
+            if len(records) == limit:
+                headers["X-Next-Offset"] = str(offset + limit)
+        elif offset:
+            records = (await service.get_all_records_async())[offset:]
+        else:
+            # Caminho mais comum: JSON memorizado no cache até a próxima escrita
+            body, body_etag = await service.get_all_records_json_async()
+            if _etag_matches(if_none_match, body_etag):
+                return _not_modified(body_etag)
+            logger.info("Retornando todos os registros")
+            return _json_response(body, body_etag)
         
+        body = dumps(records)
+        body_etag = etag(body)
+        if _etag_matches(if_none_match, body_etag):
+            return _not_modified(body_etag, headers)
         if not records:
             logger.info("Nenhum registro encontrado na planilha")
-            return []
-        
-        logger.info(f"Retornando {len(records)} registros")
-        return records
+        else:
+            logger.info("Retornando %s registros", len(records))
+        return _json_response(body, body_etag, headers)
         
+    except QuotaExceededError as e:
+        raise _quota_exceeded(e)
+    except Exception as e:
+        logger.error("Erro ao listar dados: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erro ao acessar a planilha: {str(e)}"
+        )
+
+
+def _json_response(body: bytes, body_etag: str, headers: Dict[str, str] = None) -> Response:
+    """
+    Resposta com o JSON já serializado.
+    
+    Os registros vêm do próprio serviço, então a validação por linha do
+    ``response_model`` é dispensada; o modelo continua declarado na rota apenas
+    para o esquema OpenAPI.
+    """
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": body_etag, **(headers or {})}
+    )
+
+
+def _etag_matches(if_none_match: Optional[str], current: str) -> bool:
+    """Comparação fraca de ETags, como exige o If-None-Match (RFC 9110)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    current = current.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == current
+        for candidate in if_none_match.split(",")
+    )
+
+
+def _not_modified(body_etag: str, headers: Dict[str, str] = None) -> Response:
+    logger.info("Conteúdo não modificado, respondendo 304")
+    return Response(status_code=304, headers={"ETag": body_etag, **(headers or {})})
+
+
+@router.get("/dados/export")
+async def export_data(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    service: SheetsService = Depends(get_service)
+):
+    """Exporta a planilha em NDJSON ou CSV, enviando os registros em blocos."""
+    logger.info("Solicitação de exportação em %s", export_format)
+    chunks = service.iter_records(settings.export_chunk_rows)
+    try:
+        # O primeiro bloco é lido antes da resposta para que erros virem status HTTP
+        first_chunk = await run_in_threadpool(next, chunks, [])
+    except QuotaExceededError as e:
+        raise _quota_exceeded(e)
     except Exception as e:
-        logger.error(f"Erro ao listar dados: {str(e)}")
+        logger.error("Erro ao exportar dados: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Erro ao acessar a planilha: {str(e)}"
         )
+    
+    def all_chunks():
+        yield first_chunk
+        yield from chunks
+    
+    if export_format == "csv":
+        return StreamingResponse(
+            _iter_csv(all_chunks()),
+            media_type="text/csv; charset=utf-8",
+            headers={"Content-Disposition": "attachment; filename=dados.csv"}
+        )
+    return StreamingResponse(_iter_ndjson(all_chunks()), media_type="application/x-ndjson")
+
+
+def _iter_ndjson(chunks):
+    for chunk in chunks:
+        yield "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in chunk)
+
+
+def _iter_csv(chunks):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=SHEET_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    for chunk in chunks:
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+@router.get("/stream")
+async def stream_changes(
+    service: SheetsService = Depends(get_service),
+    last_event_id: Optional[int] = Header(None)
+):
+    """
+    Envia as linhas novas da planilha via Server-Sent Events.
+    
+    Uma única thread consulta a planilha para todos os clientes conectados;
+    gravações feitas pela API são enviadas imediatamente. Clientes que
+    reconectam com ``Last-Event-ID`` recebem os eventos perdidos.
+    """
+    feed = service.change_feed()
+    subscription = feed.subscribe(last_event_id)
+    logger.info("Cliente conectado ao feed de alterações")
+    
+    async def events():
+        try:
+            # Indica ao EventSource o intervalo de reconexão
+            yield f"retry: {int(settings.stream_poll_seconds * 1000)}\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.get(), timeout=settings.stream_heartbeat_seconds
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is None:
+                    break
+                data = dumps({"first_row": event.first_row, "rows": event.rows}).decode()
+                yield f"id: {event.id}\nevent: rows\ndata: {data}\n\n"
+        finally:
+            feed.unsubscribe(subscription)
+            logger.info("Cliente desconectado do feed de alterações")
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.post("/adicionar", response_model=SheetResponse)
-async def add_data(data: SheetInput):
-    """Adiciona um novo registro à planilha."""
+async def add_data(
+    data: SheetInput,
+    response: Response,
+    service: SheetsService = Depends(get_service),
+    idempotency_key: Optional[str] = Header(None, min_length=1, max_length=255)
+):
+    """
+    Adiciona um novo registro à planilha.
+    
+    Com o cabeçalho ``Idempotency-Key`` (ou a chave natural nome+série+data,
+    se habilitada), uma requisição repetida recebe a resposta original sem
+    gravar a linha de novo.
+    """
     try:
-        logger.info(f"Solicitação para adicionar dados: {data.dict()}")
-        
-        success = sheets_service.append_row(data)
+        logger.info("Solicitação para adicionar dados: %s", data)
         
-        if success:
-            logger.info("Dados adicionados com sucesso")
-            return SheetResponse(
-                status="success",
-                message="Dados adicionados com sucesso!",
-                data=data.dict()
-            )
+        key = idempotency_key
+        if key is None and settings.idempotency_natural_key:
+            key = f"natural:{normalize_name(data.name)}|{data.serie}|{data.date}"
+        if key is None:
+            status_code, result = await _write_row(data, service)
         else:
-            logger.error("Falha ao adicionar dados")
-            raise HTTPException(
-                status_code=500,
-                detail="Falha ao adicionar dados à planilha"
+            fingerprint = digest(dumps(data.dict()))
+            (status_code, result), replayed = await service.run_idempotent(
+                key, fingerprint, lambda: _write_row(data, service)
             )
+            if replayed:
+                logger.info("Requisição repetida com a chave %s, devolvendo o resultado original", key)
+                response.headers["Idempotent-Replayed"] = "true"
+        
+        response.status_code = status_code
+        return result
             
     except HTTPException:
         raise
+    except IdempotencyConflictError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except QuotaExceededError as e:
+        raise _quota_exceeded(e)
+    except Exception as e:
+        logger.error("Erro ao adicionar dados: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erro ao adicionar dados à planilha: {str(e)}"
+        )
+
+
+async def _write_row(data: SheetInput, service: SheetsService) -> Tuple[int, SheetResponse]:
+    if settings.write_log_enabled:
+        log_id = await service.enqueue_row_async(data)
+        if log_id is not None:
+            logger.info("Dados gravados no log local com id %s", log_id)
+            return 202, SheetResponse(
+                status="accepted",
+                message="Dados gravados localmente, envio à planilha pendente",
+                data={"log_id": log_id, **data.dict()}
+            )
+    
+    if settings.write_coalescing_enabled and settings.write_coalescing_async_ack:
+        receipt_id = service.submit_row_with_receipt(data)
+        logger.info("Dados enfileirados com recibo %s", receipt_id)
+        return 202, SheetResponse(
+            status="accepted",
+            message="Dados enfileirados para gravação",
+            data={"receipt_id": receipt_id, **data.dict()}
+        )
+    
+    success = await service.append_row_async(data)
+    
+    if success:
+        logger.info("Dados adicionados com sucesso")
+        return 200, SheetResponse(
+            status="success",
+            message="Dados adicionados com sucesso!",
+            data=data.dict()
+        )
+    else:
+        logger.error("Falha ao adicionar dados")
+        raise HTTPException(
+            status_code=500,
+            detail="Falha ao adicionar dados à planilha"
+        )
+
+
+@router.get("/adicionar/{receipt_id}", response_model=SheetResponse)
+async def get_receipt(receipt_id: str, service: SheetsService = Depends(get_service)):
+    """Consulta o estado de uma gravação enfileirada."""
+    receipt = service.get_receipt(receipt_id)
+    if receipt is None:
+        raise HTTPException(status_code=404, detail="Recibo não encontrado")
+    return SheetResponse(status=receipt["status"], data=receipt)
+
+
+@router.post("/adicionar/lote", response_model=BatchResponse)
+async def add_batch(
+    rows: List[Dict[str, Any]] = Body(...),
+    service: SheetsService = Depends(get_service)
+):
+    """Adiciona vários registros à planilha em blocos."""
+    if len(rows) > settings.batch_max_rows:
+        raise HTTPException(
+            status_code=413,
+            detail=f"O lote excede o limite de {settings.batch_max_rows} linhas"
+        )
+    
+    logger.info("Solicitação para adicionar lote de %s linhas", len(rows))
+    results: List[BatchRowResult] = [None] * len(rows)
+    valid_rows: List[SheetInput] = []
+    valid_indexes: List[int] = []
+    
+    for index, row in enumerate(rows):
+        try:
+            valid_rows.append(SheetInput.model_validate(row))
+            valid_indexes.append(index)
+        except ValidationError as e:
+            results[index] = BatchRowResult(
+                index=index,
+                status="invalid",
+                errors=[
+                    f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}"
+                    for error in e.errors()
+                ]
+            )
+    
+    try:
+        outcomes = await service.append_rows_async(valid_rows) if valid_rows else []
+    except QuotaExceededError as e:
+        raise _quota_exceeded(e)
     except Exception as e:
-        logger.error(f"Erro ao adicionar dados: {str(e)}")
+        logger.error("Erro ao adicionar lote: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Erro ao adicionar dados à planilha: {str(e)}"
         )
+    
+    for index, error in zip(valid_indexes, outcomes):
+        if error is None:
+            results[index] = BatchRowResult(index=index, status="success")
+        else:
+            results[index] = BatchRowResult(index=index, status="error", errors=[error])
+    
+    inserted = sum(1 for result in results if result.status == "success")
+    rejected = sum(1 for result in results if result.status == "invalid")
+    failed = len(results) - inserted - rejected
+    
+    if inserted == len(results):
+        status = "success"
+    elif inserted == 0:
+        status = "error"
+    else:
+        status = "partial"
+    
+    logger.info("Lote processado: %s inseridas, %s rejeitadas, %s com erro", inserted, rejected, failed)
+    return BatchResponse(
+        status=status,
+        inserted=inserted,
+        rejected=rejected,
+        failed=failed,
+        results=results
+    )
+
+
+@router.get("/backlog", response_model=SheetResponse)
+async def get_backlog(service: SheetsService = Depends(get_service)):
+    """Linhas do log local ainda não gravadas no Google."""
+    stats = await service.write_log_stats_async()
+    if stats is None:
+        return SheetResponse(status="disabled", message="Log de escrita local desabilitado")
+    return SheetResponse(status="success", data=stats)
+
+
+@router.get("/stats", response_model=SheetResponse)
+async def get_stats(service: SheetsService = Depends(get_service)):
+    """Estatísticas por atleta, por série e por semana."""
+    try:
+        logger.info("Solicitação de estatísticas recebida")
+        stats = await service.get_stats_async()
+        return SheetResponse(status="success", data=stats)
+    
+    except QuotaExceededError as e:
+        raise _quota_exceeded(e)
+    except Exception as e:
+        logger.error("Erro ao calcular estatísticas: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erro ao acessar a planilha: {str(e)}"
+        )
+
+
+@router.post("/batch-get", response_model=BatchGetResponse)
+async def batch_get(
+    request: BatchGetRequest,
+    service: SheetsService = Depends(get_service)
+):
+    """Lê vários intervalos A1 ou nomeados com uma única chamada ao Google."""
+    if len(request.ranges) > settings.batch_get_max_ranges:
+        raise HTTPException(
+            status_code=413,
+            detail=f"O pedido excede o limite de {settings.batch_get_max_ranges} intervalos"
+        )
+    
+    try:
+        logger.info("Solicitação de leitura de %s intervalos", len(request.ranges))
+        ranges = await service.get_ranges_async(request.ranges)
+        return BatchGetResponse(status="success", ranges=ranges)
+    
+    except QuotaExceededError as e:
+        raise _quota_exceeded(e)
+    except Exception as e:
+        logger.error("Erro ao ler intervalos: %s", e)
+        if is_api_error(e):
+            # Intervalo inválido ou intervalo nomeado inexistente
+            status_code = 400 if e.code == 400 else 500
+            raise HTTPException(
+                status_code=status_code,
+                detail=f"Erro ao ler os intervalos: {str(e)}"
+            )
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erro ao acessar a planilha: {str(e)}"
+        )
 
 
 @router.get("/status", response_model=SheetResponse)
-async def check_status():
+async def check_status(
+    service: SheetsService = Depends(get_service),
+    if_none_match: Optional[str] = Header(None)
+):
     """Verifica o status da conexão com Google Sheets."""
     try:
         logger.info("Verificando status da conexão")
         
-        sheet = sheets_service.get_sheet()
+        sheet = await service.get_sheet_async()
+        _, records_etag = await service.get_all_records_json_async()
         
-        return SheetResponse(
+        status = SheetResponse(
             status="success",
             message="Conexão com Google Sheets OK",
             data={
                 "sheet_title": sheet.title,
-                "sheet_id": sheet.id
+                "sheet_id": sheet.id,
+                "cache": service.cache_stats(),
+                "quota": service.quota_stats(),
+                "replica": await service.replica_stats_async(),
+                "tenants": service.tenant_stats()
             }
         )
+        # ETag fraca: acompanha a worksheet e o conteúdo dos registros (a ETag
+        # memorizada de /dados), não os contadores, que mudam a cada requisição
+        body_etag = "W/" + etag(dumps([sheet.title, sheet.id, records_etag]))
+        if _etag_matches(if_none_match, body_etag):
+            return _not_modified(body_etag)
+        return _json_response(dumps(status.model_dump()), body_etag)
         
+    except QuotaExceededError as e:
+        raise _quota_exceeded(e)
     except Exception as e:
-        logger.error(f"Erro na verificação de status: {str(e)}")
+        logger.error("Erro na verificação de status: %s", e)
         raise HTTPException(
             status_code=503,
             detail=f"Erro de conectividade com Google Sheets: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+@router.get("/{sheet_id}/{worksheet}/dados", response_model=List[SheetRecord])
+async def list_tenant_data(
+    response: Response,
+    query: RecordsQuery = Depends(),
+    service: SheetsService = Depends(get_tenant_service),
+    if_none_match: Optional[str] = Header(None)
+):
+    """Lista os dados de uma worksheet de qualquer planilha compartilhada."""
+    return await list_data(response, query, service, if_none_match)
+
+
+@router.post("/{sheet_id}/{worksheet}/adicionar", response_model=SheetResponse)
+async def add_tenant_data(
+    data: SheetInput,
+    response: Response,
+    service: SheetsService = Depends(get_tenant_service),
+    idempotency_key: Optional[str] = Header(None, min_length=1, max_length=255)
+):
+    """Adiciona um registro a uma worksheet de qualquer planilha compartilhada."""
+    return await add_data(data, response, service, idempotency_key)
+
+
+@router.get("/{sheet_id}/{worksheet}/status", response_model=SheetResponse)
+async def check_tenant_status(
+    service: SheetsService = Depends(get_tenant_service),
+    if_none_match: Optional[str] = Header(None)
+):
+    """Verifica o acesso a uma worksheet de qualquer planilha compartilhada."""
+    return await check_status(service, if_none_match)
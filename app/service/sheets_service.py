@@ -1,18 +1,16 @@
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+"""
+Funções legadas, mantidas por compatibilidade.
+
+Usam o serviço principal, que mantém um único cliente autenticado com o token
+renovado em segundo plano, em vez de reler as credenciais a cada chamada.
+"""
 from app.models.sheet_models import SheetInput
+from app.services.sheets_service import sheets_service
+
 
 def get_sheet(sheet_name: str):
-    scope = [
-        "https://spreadsheets.google.com/feeds",
-        "https://www.googleapis.com/auth/spreadsheets",
-        "https://www.googleapis.com/auth/drive"
-    ]
-    creds = ServiceAccountCredentials.from_json_keyfile_name(
-        "credentials/sheets-integration-467001-cdd295836ffa.json", scope
-    )
-    client = gspread.authorize(creds)
-    return client.open(sheet_name).sheet1
+    return sheets_service.get_sheet(sheet_name)
+
 
 def append_row(sheet, data: SheetInput):
     line_new = [data.name, data.serie, data.initial_weight, data.date]
@@ -0,0 +1,180 @@
+"""
+Feed de linhas novas da planilha, distribuído para vários assinantes.
+"""
+import asyncio
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+Record = Dict[str, Any]
+
+# poll(next_row) -> (primeira linha retornada, registros); next_row é None na
+# primeira chamada, que só estabelece a linha inicial
+Poller = Callable[[Optional[int]], Tuple[int, List[Record]]]
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    """Linhas novas a partir de ``first_row`` (número da linha na planilha)."""
+    id: int
+    first_row: Optional[int]
+    rows: List[Record]
+
+
+class Subscription:
+    """Fila de eventos de um assinante, consumida no event loop dele."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_size: int):
+        self._loop = loop
+        self._queue: "asyncio.Queue[Optional[ChangeEvent]]" = asyncio.Queue()
+        self._max_size = max_size
+        self.overflowed = False
+
+    async def get(self) -> Optional[ChangeEvent]:
+        """Próximo evento; ``None`` quando o feed foi encerrado para este assinante."""
+        return await self._queue.get()
+
+    def _deliver(self, event: Optional[ChangeEvent]) -> None:
+        # Executado no event loop do assinante
+        if self.overflowed:
+            return
+        if event is not None and self._queue.qsize() >= self._max_size:
+            # Assinante lento: é desconectado em vez de acumular memória
+            self.overflowed = True
+            event = None
+        self._queue.put_nowait(event)
+
+    def _send(self, event: Optional[ChangeEvent]) -> None:
+        try:
+            self._loop.call_soon_threadsafe(self._deliver, event)
+        except RuntimeError:
+            # Event loop já encerrado
+            pass
+
+
+class ChangeFeed:
+    """
+    Detecta linhas novas e as distribui a todos os assinantes.
+
+    As linhas chegam por ``publish`` (gravações feitas por este processo) e
+    por uma única thread que consulta a planilha a cada ``interval`` segundos
+    enquanto houver assinantes, de modo que N clientes custam uma consulta.
+    As linhas são identificadas pelo número na planilha, então uma linha
+    gravada localmente não é reenviada quando a consulta remota a encontra.
+    """
+
+    def __init__(
+        self,
+        poll: Poller,
+        interval: float,
+        history: int = 100,
+        queue_size: int = 1000
+    ):
+        self._poll = poll
+        self._interval = interval
+        self._queue_size = queue_size
+        self._history: Deque[ChangeEvent] = deque(maxlen=history)
+        self._subscribers: Set[Subscription] = set()
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._next_row: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._polls = 0
+        self._poll_errors = 0
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> Subscription:
+        """Registra um assinante; deve ser chamado dentro do event loop dele."""
+        subscription = Subscription(asyncio.get_running_loop(), self._queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+            if last_event_id is not None:
+                # Reenvia o que o cliente perdeu durante a reconexão
+                for event in self._history:
+                    if event.id > last_event_id:
+                        subscription._send(event)
+            self._ensure_watcher()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, first_row: Optional[int], rows: List[Record]) -> None:
+        """Publica linhas novas; pode ser chamado de qualquer thread."""
+        with self._lock:
+            if first_row is not None and self._next_row is not None:
+                # Descarta linhas que já foram publicadas
+                skip = max(0, self._next_row - first_row)
+                rows = rows[skip:]
+                first_row += skip
+            if not rows:
+                return
+            if first_row is not None:
+                end = first_row + len(rows)
+                self._next_row = end if self._next_row is None else max(self._next_row, end)
+            event = ChangeEvent(self._next_id, first_row, list(rows))
+            self._next_id += 1
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+
+        for subscription in subscribers:
+            subscription._send(event)
+
+    def close(self) -> None:
+        """Encerra a thread de consulta e todos os assinantes."""
+        self._stop.set()
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self._subscribers.clear()
+            thread = self._thread
+        for subscription in subscribers:
+            subscription._send(None)
+        if thread is not None:
+            thread.join()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "subscribers": len(self._subscribers),
+                "last_event_id": self._next_id - 1,
+                "next_row": self._next_row,
+                "polls": self._polls,
+                "poll_errors": self._poll_errors
+            }
+
+    def _ensure_watcher(self) -> None:
+        # Chamado com o lock adquirido
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._watch, name="sheets-change-feed", daemon=True
+        )
+        self._thread.start()
+
+    def _watch(self) -> None:
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+                next_row = self._next_row
+            try:
+                first_row, rows = self._poll(next_row)
+                with self._lock:
+                    self._polls += 1
+                    if self._next_row is None:
+                        self._next_row = first_row
+                if rows:
+                    self.publish(first_row, rows)
+            except Exception as e:
+                with self._lock:
+                    self._poll_errors += 1
+                logger.warning("Falha ao consultar linhas novas: %s", e)
+            if self._stop.wait(self._interval):
+                return
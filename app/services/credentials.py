@@ -0,0 +1,118 @@
+"""
+Credenciais da conta de serviço com renovação antecipada do token.
+"""
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, Optional, Sequence
+
+import requests
+from google.auth.transport.requests import Request
+from google.oauth2 import service_account
+
+from app.services import metrics
+
+logger = logging.getLogger(__name__)
+
+SCOPES = [
+    "https://spreadsheets.google.com/feeds",
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive"
+]
+
+# Intervalo mínimo entre renovações e entre tentativas após uma falha
+_MIN_INTERVAL_SECONDS = 1.0
+_RETRY_SECONDS = 5.0
+
+
+class CredentialsManager:
+    """
+    Mantém o token de acesso válido renovando-o em segundo plano.
+
+    O token é renovado ``refresh_margin_seconds`` antes de expirar. Como a margem
+    é maior que o limiar usado pelo google-auth para considerar um token
+    expirado, as requisições nunca precisam trocar o token no meio do caminho.
+    Uma única instância é compartilhada por todos os clientes gspread.
+    """
+
+    def __init__(
+        self,
+        credentials: service_account.Credentials,
+        refresh_margin_seconds: float = 300.0,
+        clock: Callable[[], datetime] = datetime.utcnow
+    ):
+        self._credentials = credentials
+        self._margin = refresh_margin_seconds
+        self._clock = clock
+        self._request = Request(requests.Session())
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._refreshes = 0
+        self._failures = 0
+
+    @classmethod
+    def from_service_account_file(
+        cls,
+        path: str,
+        scopes: Sequence[str] = SCOPES,
+        refresh_margin_seconds: float = 300.0
+    ) -> "CredentialsManager":
+        credentials = service_account.Credentials.from_service_account_file(
+            path, scopes=scopes
+        )
+        return cls(credentials, refresh_margin_seconds)
+
+    @property
+    def credentials(self) -> service_account.Credentials:
+        return self._credentials
+
+    def refresh(self) -> None:
+        """Troca o token imediatamente."""
+        with self._lock, metrics.google_call("auth"):
+            self._credentials.refresh(self._request)
+            self._refreshes += 1
+        logger.info("Token de acesso renovado, expira em %s", self._credentials.expiry)
+
+    def seconds_until_refresh(self) -> float:
+        expiry = self._credentials.expiry
+        if not self._credentials.token or expiry is None:
+            return 0.0
+        return (expiry - self._clock()).total_seconds() - self._margin
+
+    def start(self) -> None:
+        """Obtém o primeiro token e inicia a renovação em segundo plano."""
+        if self.seconds_until_refresh() <= 0:
+            self.refresh()
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._refresh_loop, name="sheets-token-refresh", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "refreshes": self._refreshes,
+            "failures": self._failures,
+            "expiry": self._credentials.expiry.isoformat() if self._credentials.expiry else None
+        }
+
+    def _refresh_loop(self) -> None:
+        delay = max(_MIN_INTERVAL_SECONDS, self.seconds_until_refresh())
+        while not self._stop.wait(delay):
+            try:
+                self.refresh()
+                delay = max(_MIN_INTERVAL_SECONDS, self.seconds_until_refresh())
+            except Exception as e:
+                self._failures += 1
+                # Enquanto o token atual ainda vale, tenta de novo sem pressa
+                remaining = self.seconds_until_refresh() + self._margin
+                delay = max(_RETRY_SECONDS, min(remaining / 2, 60.0))
+                logger.error("Erro ao renovar o token de acesso: %s", e)
@@ -0,0 +1,63 @@
+"""
+Sessão HTTP compartilhada para as chamadas às APIs do Google.
+"""
+import socket
+from typing import Any, List, Tuple
+
+import requests
+from google.auth.transport.requests import AuthorizedSession
+from gspread.utils import convert_credentials
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+
+def _keepalive_options(idle_seconds: int) -> List[Tuple[int, int, int]]:
+    options = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    # TCP_KEEPIDLE/TCP_KEEPINTVL não existem em todas as plataformas
+    if hasattr(socket, "TCP_KEEPIDLE"):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, idle_seconds))
+    if hasattr(socket, "TCP_KEEPINTVL"):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, max(1, idle_seconds // 4)))
+    return options
+
+
+class KeepAliveAdapter(HTTPAdapter):
+    """
+    Adapter com pool de conexões dimensionado e TCP keep-alive.
+
+    O ``pool_maxsize`` padrão do requests (10) é menor que o número de threads
+    que podem chamar o Google ao mesmo tempo; as conexões excedentes seriam
+    descartadas após o uso, forçando um novo handshake TLS na próxima chamada.
+    """
+
+    def __init__(self, pool_size: int, keepalive_idle_seconds: int = 60, **kwargs: Any):
+        self._socket_options = (
+            HTTPConnection.default_socket_options + _keepalive_options(keepalive_idle_seconds)
+        )
+        super().__init__(pool_connections=pool_size, pool_maxsize=pool_size, **kwargs)
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        kwargs["socket_options"] = self._socket_options
+        super().init_poolmanager(*args, **kwargs)
+
+
+def configure_session(
+    session: requests.Session,
+    pool_size: int,
+    keepalive_idle_seconds: int = 60
+) -> requests.Session:
+    """Monta o adapter com pool e keep-alive para http e https."""
+    adapter = KeepAliveAdapter(pool_size, keepalive_idle_seconds)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def build_authorized_session(
+    credentials: Any,
+    pool_size: int,
+    keepalive_idle_seconds: int = 60
+) -> requests.Session:
+    """Cria a sessão autenticada usada pelo cliente gspread."""
+    session = AuthorizedSession(convert_credentials(credentials))
+    return configure_session(session, pool_size, keepalive_idle_seconds)
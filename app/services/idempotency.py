@@ -0,0 +1,110 @@
+"""
+Deduplicação de requisições de escrita por chave de idempotência.
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class IdempotencyConflictError(Exception):
+    """A mesma chave foi reutilizada com um conteúdo diferente."""
+
+
+@dataclass
+class _Entry:
+    fingerprint: str
+    future: "asyncio.Future[Any]"
+    expires_at: float = 0.0
+
+
+class IdempotencyStore:
+    """
+    Guarda em memória o resultado de cada operação pela chave de idempotência.
+
+    Uma repetição dentro de ``ttl_seconds`` recebe o resultado original sem
+    executar a operação de novo; repetições simultâneas aguardam a primeira.
+    Se a operação falha, a chave é liberada para que o cliente possa tentar
+    novamente.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        max_entries: int = 10000,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self._ttl = ttl_seconds
+        self._max_entries = max(1, max_entries)
+        self._clock = clock
+        # Operações em andamento e concluídas (estas em ordem de expiração)
+        self._pending: Dict[str, _Entry] = {}
+        self._done: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._replays = 0
+
+    async def run(
+        self,
+        key: str,
+        fingerprint: str,
+        operation: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """Executa ``operation`` uma única vez por chave; retorna (resultado, repetida)."""
+        with self._lock:
+            self._purge()
+            entry = self._pending.get(key) or self._done.get(key)
+            if entry is not None:
+                if entry.fingerprint != fingerprint:
+                    raise IdempotencyConflictError(
+                        f"A chave {key} já foi usada com outro conteúdo"
+                    )
+                self._replays += 1
+                future = entry.future
+            else:
+                future = asyncio.get_running_loop().create_future()
+                self._pending[key] = _Entry(fingerprint, future)
+                entry = None
+
+        if entry is not None:
+            return await asyncio.shield(future), True
+
+        try:
+            result = await operation()
+        except asyncio.CancelledError:
+            with self._lock:
+                self._pending.pop(key, None)
+            future.cancel()
+            raise
+        except Exception as e:
+            with self._lock:
+                self._pending.pop(key, None)
+            future.set_exception(e)
+            # Evita o aviso de exceção não consultada quando não há repetições
+            future.exception()
+            raise
+
+        with self._lock:
+            stored = self._pending.pop(key)
+            stored.expires_at = self._clock() + self._ttl
+            self._done[key] = stored
+        future.set_result(result)
+        return result, False
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "size": len(self._done),
+                "replays": self._replays
+            }
+
+    def _purge(self) -> None:
+        # Chamado com o lock adquirido
+        now = self._clock()
+        while self._done:
+            entry = next(iter(self._done.values()))
+            if entry.expires_at > now and len(self._done) < self._max_entries:
+                break
+            self._done.popitem(last=False)
@@ -0,0 +1,169 @@
+"""
+Métricas Prometheus da API e das chamadas ao Google.
+"""
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+try:
+    import prometheus_client
+    from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+except ImportError:  # pragma: no cover - prometheus_client é opcional
+    prometheus_client = None
+
+# Latências típicas do Google ficam entre dezenas de ms e alguns segundos
+_LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _Metrics:
+    """Métricas registradas no registry padrão do prometheus_client."""
+
+    def __init__(self, registry: Any):
+        self.google_seconds = prometheus_client.Histogram(
+            "sheets_google_call_seconds",
+            "Duração de cada chamada ao Google, sem a espera pela cota",
+            ["operation"],
+            buckets=_LATENCY_BUCKETS,
+            registry=registry
+        )
+        self.google_in_flight = prometheus_client.Gauge(
+            "sheets_google_calls_in_flight",
+            "Chamadas ao Google em andamento",
+            registry=registry
+        )
+        self.google_errors = prometheus_client.Counter(
+            "sheets_google_errors",
+            "Respostas de erro do Google por código HTTP",
+            ["status"],
+            registry=registry
+        )
+        self.request_seconds = prometheus_client.Histogram(
+            "sheets_http_request_seconds",
+            "Tempo até o início da resposta, por rota",
+            ["method", "route", "status"],
+            buckets=_LATENCY_BUCKETS,
+            registry=registry
+        )
+        # Filhos por conjunto de labels: evita a busca de labels a cada chamada
+        self._children: Dict[Tuple[Any, ...], Any] = {}
+
+    def child(self, metric: Any, *labels: str) -> Any:
+        key = (id(metric),) + labels
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = metric.labels(*labels)
+        return child
+
+
+_metrics: Optional[_Metrics] = (
+    _Metrics(prometheus_client.REGISTRY) if prometheus_client is not None else None
+)
+
+
+def enabled() -> bool:
+    return _metrics is not None
+
+
+@contextmanager
+def google_call(operation: str) -> Iterator[None]:
+    """Mede a duração de uma operação no Google e as chamadas em andamento."""
+    if _metrics is None:
+        yield
+        return
+    _metrics.google_in_flight.inc()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _metrics.google_in_flight.dec()
+        _metrics.child(_metrics.google_seconds, operation).observe(
+            time.perf_counter() - start
+        )
+
+
+def count_google_error(status: int) -> None:
+    if _metrics is not None:
+        _metrics.child(_metrics.google_errors, str(status)).inc()
+
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+    if _metrics is not None:
+        _metrics.child(
+            _metrics.request_seconds, method, route, str(status)
+        ).observe(seconds)
+
+
+def render() -> Tuple[bytes, str]:
+    """Corpo e content type da resposta de /metrics."""
+    return (
+        prometheus_client.generate_latest(prometheus_client.REGISTRY),
+        prometheus_client.CONTENT_TYPE_LATEST
+    )
+
+
+class ServiceCollector:
+    """
+    Lê os contadores do serviço apenas no momento da coleta.
+
+    Caches, cota e log de escrita já mantêm seus próprios contadores; copiá-los
+    a cada operação custaria mais do que consultá-los a cada scrape.
+    """
+
+    def __init__(self, service: Any):
+        self._service = service
+
+    def describe(self) -> Iterator[Any]:
+        # Evita que o registro consulte o serviço já na importação
+        return iter(())
+
+    def collect(self) -> Iterator[Any]:
+        caches = self._service.cache_stats()
+
+        lookups = CounterMetricFamily(
+            "sheets_cache_lookups",
+            "Consultas aos caches do serviço por resultado",
+            labels=["cache", "result"]
+        )
+        records = caches["records"]
+        lookups.add_metric(["records", "hit"], records["hits"])
+        lookups.add_metric(["records", "stale_hit"], records["stale_hits"])
+        lookups.add_metric(["records", "miss"], records["misses"])
+        handles = caches["handles"]
+        lookups.add_metric(["handles", "hit"], handles["hits"])
+        lookups.add_metric(["handles", "miss"], handles["misses"])
+        yield lookups
+
+        quota = self._service.quota_stats()
+        tokens = GaugeMetricFamily(
+            "sheets_quota_tokens", "Tokens disponíveis na cota do Google", labels=["kind"]
+        )
+        tokens.add_metric(["read"], quota["read_tokens"])
+        tokens.add_metric(["write"], quota["write_tokens"])
+        yield tokens
+        yield CounterMetricFamily(
+            "sheets_google_retries", "Novas tentativas após 429/5xx", value=quota["retries"]
+        )
+        yield CounterMetricFamily(
+            "sheets_quota_rejected",
+            "Chamadas recusadas por falta de cota ou de prazo",
+            value=quota["rejected"]
+        )
+
+        backlog = self._service.write_log_stats()
+        if backlog is not None:
+            yield GaugeMetricFamily(
+                "sheets_write_log_depth",
+                "Linhas do log local ainda não gravadas no Google",
+                value=backlog["depth"]
+            )
+            yield GaugeMetricFamily(
+                "sheets_write_log_dead_letter",
+                "Linhas do log local recusadas pelo Google de forma definitiva",
+                value=backlog["dead_letter"]
+            )
+
+
+def register_service(service: Any) -> None:
+    """Expõe os contadores de ``service`` em /metrics."""
+    if prometheus_client is not None:
+        prometheus_client.REGISTRY.register(ServiceCollector(service))
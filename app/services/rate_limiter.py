@@ -0,0 +1,191 @@
+"""
+Controle de cota e novas tentativas para chamadas à API do Google Sheets.
+"""
+import logging
+import random
+import sys
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+
+from app.services import metrics
+
+if TYPE_CHECKING:
+    from gspread.exceptions import APIError
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class QuotaExceededError(Exception):
+    """A chamada não pode ser feita dentro do prazo disponível."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Token bucket com reposição contínua, em tokens por minuto."""
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self._rate = rate_per_minute / 60
+        self._capacity = capacity if capacity is not None else rate_per_minute
+        self._tokens = self._capacity
+        self._clock = clock
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, max_wait: float) -> float:
+        """
+        Reserva um token e retorna quantos segundos esperar antes de usá-lo.
+
+        Se a espera ultrapassar ``max_wait`` nada é reservado e
+        QuotaExceededError é lançada com o tempo estimado de espera.
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self._capacity, self._tokens + (now - self._updated) * self._rate
+            )
+            self._updated = now
+
+            self._tokens -= 1
+            wait = -self._tokens / self._rate if self._tokens < 0 else 0.0
+            if wait > max_wait:
+                self._tokens += 1
+                raise QuotaExceededError("Cota da API do Google esgotada", retry_after=wait)
+            return wait
+
+    def available(self) -> float:
+        with self._lock:
+            elapsed = self._clock() - self._updated
+            return min(self._capacity, self._tokens + elapsed * self._rate)
+
+
+class QuotaScheduler:
+    """
+    Executa chamadas respeitando as cotas de leitura e escrita.
+
+    Cada chamada consome um token do bucket correspondente e, em respostas
+    429/5xx, é repetida com backoff exponencial e jitter enquanto houver prazo.
+    """
+
+    def __init__(
+        self,
+        read_per_minute: float,
+        write_per_minute: float,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 32.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        self._buckets = {
+            "read": TokenBucket(read_per_minute, clock=clock),
+            "write": TokenBucket(write_per_minute, clock=clock)
+        }
+        self._max_retries = max_retries
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._retries = 0
+        self._rejected = 0
+
+    def call(
+        self,
+        kind: str,
+        func: Callable[..., Any],
+        *args: Any,
+        deadline: float,
+        **kwargs: Any
+    ) -> Any:
+        """Executa ``func`` até o instante ``deadline`` (no relógio do scheduler)."""
+        bucket = self._buckets[kind]
+        attempt = 0
+        while True:
+            try:
+                wait = bucket.acquire(max(0.0, deadline - self._clock()))
+            except QuotaExceededError:
+                self._count_rejected()
+                raise
+            if wait:
+                self._sleep(wait)
+
+            try:
+                # Mede apenas a chamada ao Google, sem a espera pela cota
+                with metrics.google_call(getattr(func, "__name__", "other")):
+                    return func(*args, **kwargs)
+            except Exception as e:
+                if not is_api_error(e):
+                    raise
+                status = _status_code(e)
+                metrics.count_google_error(status)
+                if status not in RETRYABLE_STATUS or attempt >= self._max_retries:
+                    raise
+                delay = self._backoff(attempt, e)
+                if self._clock() + delay > deadline:
+                    self._count_rejected()
+                    raise QuotaExceededError(
+                        f"Google Sheets indisponível (HTTP {status})", retry_after=delay
+                    ) from e
+                logger.warning(
+                    "Google Sheets respondeu HTTP %s, nova tentativa em %.2fs", status, delay
+                )
+                with self._lock:
+                    self._retries += 1
+                self._sleep(delay)
+                attempt += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "read_tokens": self._buckets["read"].available(),
+                "write_tokens": self._buckets["write"].available(),
+                "retries": self._retries,
+                "rejected": self._rejected
+            }
+
+    def _backoff(self, attempt: int, error: "APIError") -> float:
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            return retry_after
+        delay = min(self._backoff_max, self._backoff_base * 2 ** attempt)
+        return random.uniform(delay / 2, delay)
+
+    def _count_rejected(self) -> None:
+        with self._lock:
+            self._rejected += 1
+
+
+def is_api_error(error: BaseException) -> bool:
+    """
+    Indica se ``error`` é um APIError do gspread.
+
+    Não importa o gspread: se ele ainda não foi carregado, nenhuma chamada ao
+    Google pode ter lançado o erro.
+    """
+    exceptions = sys.modules.get("gspread.exceptions")
+    return exceptions is not None and isinstance(error, exceptions.APIError)
+
+
+def _status_code(error: "APIError") -> int:
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    return status if isinstance(status, int) else error.code
+
+
+def _retry_after(error: "APIError") -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers["Retry-After"])
+    except (KeyError, TypeError, ValueError):
+        return None
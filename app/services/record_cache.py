@@ -0,0 +1,297 @@
+"""
+Cache em memória dos registros das planilhas.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from app.services.record_index import RecordIndex
+from app.services.record_set import RecordSet
+from app.services.record_stats import RecordStats
+from app.services.serialization import dumps, etag
+
+logger = logging.getLogger(__name__)
+
+Record = Dict[str, Any]
+
+
+@dataclass
+class _CacheEntry:
+    records: RecordSet
+    fetched_at: float
+    index: Optional[RecordIndex] = None
+    stats: Optional[RecordStats] = None
+    encoded: Optional[Tuple[bytes, str]] = None
+    version: Optional[str] = None
+
+
+class RecordCache:
+    """
+    Cache read-through dos registros, indexado pelo nome da planilha.
+
+    Dentro do TTL os registros são servidos direto da memória. Após o TTL,
+    e até ``stale_seconds`` a mais, os dados antigos continuam sendo servidos
+    enquanto uma única thread em segundo plano recarrega a planilha.
+
+    Com ``version``, uma função que informa a revisão remota da planilha, uma
+    entrada expirada cuja revisão não mudou é apenas revalidada, sem baixar os
+    valores de novo.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str], List[Record]],
+        ttl_seconds: float,
+        stale_seconds: float = 0,
+        version: Optional[Callable[[str], Optional[str]]] = None
+    ):
+        self._loader = loader
+        self._version = version
+        self._ttl = ttl_seconds
+        self._stale = stale_seconds
+        self._entries: Dict[str, _CacheEntry] = {}
+        self._refreshing: Set[str] = set()
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._stale_hits = 0
+        self._misses = 0
+        self._refreshes = 0
+        self._refresh_errors = 0
+        self._revalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._ttl > 0
+
+    def get(self, key: str) -> List[Record]:
+        """Retorna os registros da planilha, carregando-os se necessário."""
+        return list(self._records_for(key))
+
+    def count(self, key: str) -> int:
+        """Número de registros da planilha, sem montar os dicionários."""
+        return len(self._records_for(key))
+
+    def select(
+        self,
+        key: str,
+        name: Optional[str] = None,
+        serie: Optional[int] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None
+    ) -> List[Record]:
+        """Filtra os registros usando o índice mantido junto da entrada do cache."""
+        records = self._records_for(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.records is records and entry.index is not None:
+                positions = entry.index.query(name, serie, date_from, date_to)
+                return [records[position] for position in positions]
+            generation = self._generations.get(key, 0)
+
+        # A construção do índice (O(n log n)) acontece fora do lock, como a
+        # serialização em encoded(); só é guardado se nenhuma escrita ocorreu
+        index = RecordIndex(records)
+        with self._lock:
+            entry = self._entries.get(key)
+            if (
+                entry is not None
+                and entry.records is records
+                and self._generations.get(key, 0) == generation
+            ):
+                if entry.index is None:
+                    entry.index = index
+                positions = entry.index.query(name, serie, date_from, date_to)
+                return [records[position] for position in positions]
+        positions = index.query(name, serie, date_from, date_to)
+        return [records[position] for position in positions]
+
+    def aggregate(self, key: str) -> Dict[str, Any]:
+        """Resumo estatístico mantido junto da entrada do cache."""
+        records = self._records_for(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.records is records and entry.stats is not None:
+                return entry.stats.snapshot()
+            generation = self._generations.get(key, 0)
+
+        # Como o índice em select(), a primeira passada é feita fora do lock
+        stats = RecordStats(records)
+        with self._lock:
+            entry = self._entries.get(key)
+            if (
+                entry is not None
+                and entry.records is records
+                and self._generations.get(key, 0) == generation
+            ):
+                if entry.stats is None:
+                    entry.stats = stats
+                return entry.stats.snapshot()
+        return stats.snapshot()
+
+    def encoded(self, key: str) -> Tuple[bytes, str]:
+        """JSON de todos os registros e sua ETag, memorizados até a próxima escrita."""
+        records = self._records_for(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.records is records and entry.encoded is not None:
+                return entry.encoded
+            generation = self._generations.get(key, 0)
+
+        # A serialização acontece fora do lock; só é memorizada se nenhuma
+        # escrita ocorreu nesse meio tempo
+        body = dumps(list(records))
+        encoded = (body, etag(body))
+        with self._lock:
+            entry = self._entries.get(key)
+            if (
+                entry is not None
+                and entry.records is records
+                and self._generations.get(key, 0) == generation
+            ):
+                entry.encoded = encoded
+        return encoded
+
+    def _records_for(self, key: str) -> Sequence[Record]:
+        if not self.enabled:
+            return self._loader(key)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = time.monotonic() - entry.fetched_at
+                if age < self._ttl:
+                    self._hits += 1
+                    return entry.records
+                if age < self._ttl + self._stale:
+                    self._stale_hits += 1
+                    self._schedule_refresh(key)
+                    return entry.records
+            self._misses += 1
+
+        return self._load(key)
+
+    def peek(
+        self, key: str, start: int = 0, stop: Optional[int] = None
+    ) -> Optional[List[Record]]:
+        """Retorna a fatia em cache sem baixar a planilha, se ainda válida."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            age = time.monotonic() - entry.fetched_at
+            if age >= self._ttl + self._stale:
+                return None
+            if age < self._ttl:
+                self._hits += 1
+            else:
+                self._stale_hits += 1
+                self._schedule_refresh(key)
+            return entry.records[start:stop]
+
+    def append(self, key: str, record: Record) -> None:
+        """Write-through: adiciona o registro ao cache, se ele existir."""
+        self.extend(key, [record])
+
+    def extend(self, key: str, records: List[Record]) -> None:
+        """Write-through de várias linhas de uma vez."""
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.encoded = None
+                if entry.index is not None:
+                    for position, record in enumerate(records, len(entry.records)):
+                        entry.index.add(position, record)
+                if entry.stats is not None:
+                    for record in records:
+                        entry.stats.add(record)
+                entry.records.extend(records)
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            # Nova geração: um _load em andamento não reinstala dados anteriores
+            self._generations[key] = self._generations.get(key, 0) + 1
+            self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "stale_hits": self._stale_hits,
+                "misses": self._misses,
+                "refreshes": self._refreshes,
+                "refresh_errors": self._refresh_errors,
+                "revalidations": self._revalidations,
+                "size": len(self._entries)
+            }
+
+    def _load(self, key: str) -> Sequence[Record]:
+        with self._lock:
+            generation = self._generations.get(key, 0)
+            entry = self._entries.get(key)
+            known_version = entry.version if entry is not None else None
+
+        # A revisão é lida antes dos valores: se a planilha mudar durante o
+        # download, a próxima revalidação verá uma revisão diferente
+        version = self._remote_version(key)
+        if version is not None and version == known_version:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and self._generations.get(key, 0) == generation:
+                    entry.fetched_at = time.monotonic()
+                    self._revalidations += 1
+                    return entry.records
+
+        records = self._loader(key)
+
+        with self._lock:
+            fetched_at = time.monotonic()
+            # Uma escrita durante o download pode não estar nos dados obtidos:
+            # mantemos a entrada atualizada pelo write-through ou, sem ela,
+            # guardamos os dados já expirados para forçar nova revalidação.
+            if self._generations.get(key, 0) != generation:
+                if key in self._entries:
+                    return self._entries[key].records
+                fetched_at -= self._ttl
+                version = None
+            entry = _CacheEntry(RecordSet(records), fetched_at, version=version)
+            self._entries[key] = entry
+        return entry.records
+
+    def _remote_version(self, key: str) -> Optional[str]:
+        if self._version is None:
+            return None
+        try:
+            return self._version(key)
+        except Exception as e:
+            logger.warning("Falha ao consultar a revisão da planilha %s: %s", key, e)
+            return None
+
+    def _schedule_refresh(self, key: str) -> None:
+        # Chamado com o lock adquirido
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        thread = threading.Thread(
+            target=self._refresh, args=(key,), name=f"record-cache-{key}", daemon=True
+        )
+        thread.start()
+
+    def _refresh(self, key: str) -> None:
+        try:
+            self._load(key)
+            with self._lock:
+                self._refreshes += 1
+        except Exception as e:
+            logger.warning("Falha ao atualizar cache da planilha %s: %s", key, e)
+            with self._lock:
+                self._refresh_errors += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
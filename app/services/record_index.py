@@ -0,0 +1,113 @@
+"""
+Índices em memória sobre os registros das planilhas.
+"""
+from bisect import bisect_left, bisect_right, insort
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.services.record_set import RecordSet, record_fields, weight_to_grams
+
+Record = Dict[str, Any]
+
+
+def normalize_name(name: Any) -> str:
+    return " ".join(str(name).split()).casefold()
+
+
+def _number(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("inf")
+
+
+def _weight(value: Any) -> float:
+    grams = weight_to_grams(value)
+    return grams if grams is not None else float("inf")
+
+
+class RecordIndex:
+    """
+    Índices por nome e série (hash) e por data (lista ordenada + bisect).
+
+    Guarda apenas posições na lista de registros, que só cresce por append,
+    de modo que o índice é atualizado incrementalmente.
+    """
+
+    def __init__(self, records: Iterable[Record] = ()):
+        self._by_name: Dict[str, List[int]] = {}
+        self._by_serie: Dict[Any, List[int]] = {}
+        self._dates: List[Tuple[int, int]] = []
+        self._ordinals: List[Optional[int]] = []
+        if isinstance(records, RecordSet):
+            # Lê as colunas tipadas do cache, sem montar os dicts
+            fields = (records.fields_at(position) for position in range(len(records)))
+        else:
+            fields = map(record_fields, records)
+        for position, (name, serie, _, ordinal) in enumerate(fields):
+            self._insert(position, name, serie, ordinal)
+
+    def __len__(self) -> int:
+        return len(self._ordinals)
+
+    def add(self, position: int, record: Record) -> None:
+        name, serie, _, ordinal = record_fields(record)
+        self._insert(position, name, serie, ordinal)
+
+    def _insert(
+        self, position: int, name: str, serie: Optional[int], ordinal: Optional[int]
+    ) -> None:
+        self._by_name.setdefault(normalize_name(name), []).append(position)
+        self._by_serie.setdefault(serie, []).append(position)
+        self._ordinals.append(ordinal)
+        if ordinal is not None:
+            insort(self._dates, (ordinal, position))
+
+    def query(
+        self,
+        name: Optional[str] = None,
+        serie: Optional[int] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None
+    ) -> List[int]:
+        """Retorna, em ordem, as posições que atendem a todos os filtros."""
+        candidates: Optional[List[int]] = None
+        if name is not None:
+            candidates = self._by_name.get(normalize_name(name), [])
+        if serie is not None:
+            by_serie = self._by_serie.get(serie, [])
+            if candidates is None:
+                candidates = by_serie
+            else:
+                wanted = set(by_serie)
+                candidates = [p for p in candidates if p in wanted]
+
+        if date_from is None and date_to is None:
+            return list(candidates) if candidates is not None else list(range(len(self)))
+
+        low = date_from.toordinal() if date_from is not None else None
+        high = date_to.toordinal() if date_to is not None else None
+        if candidates is not None:
+            return [
+                p for p in candidates
+                if self._ordinals[p] is not None
+                and (low is None or self._ordinals[p] >= low)
+                and (high is None or self._ordinals[p] <= high)
+            ]
+
+        start = bisect_left(self._dates, (low, -1)) if low is not None else 0
+        end = bisect_right(self._dates, (high, len(self))) if high is not None else len(self._dates)
+        return sorted(position for _, position in self._dates[start:end])
+
+
+_SORT_KEYS = {
+    "name": lambda record: normalize_name(record.get("name", "")),
+    "serie": lambda record: _number(record.get("serie")),
+    "initial_weight": lambda record: _weight(record.get("initial_weight")),
+    "date": lambda record: str(record.get("date", ""))
+}
+
+
+def sort_records(records: List[Record], sort: str) -> List[Record]:
+    """Ordena por ``campo`` ou ``-campo`` (decrescente)."""
+    return sorted(records, key=_SORT_KEYS[sort.lstrip("-")], reverse=sort.startswith("-"))
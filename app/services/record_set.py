@@ -0,0 +1,222 @@
+"""
+Armazenamento colunar e tipado dos registros da planilha.
+"""
+import math
+import sys
+from array import array
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union, overload
+
+Record = Dict[str, Any]
+
+COLUMNS = ("name", "serie", "initial_weight", "date")
+
+# Limites do array('q') da coluna de série
+_INT64_MIN = -2 ** 63
+_INT64_MAX = 2 ** 63 - 1
+
+
+def weight_to_grams(value: Any) -> Optional[float]:
+    """Converte ``"75.5kg"`` em 75500.0 gramas."""
+    text = str(value).strip().lower()
+    if not text.endswith("kg"):
+        return None
+    try:
+        grams = float(text[:-2]) * 1000
+    except ValueError:
+        return None
+    return grams if math.isfinite(grams) else None
+
+
+def grams_to_weight(grams: float) -> str:
+    return f"{round(grams / 1000, 6):g}kg"
+
+
+def parse_serie(value: Any) -> Optional[int]:
+    """Série como inteiro, se couber na coluna ``array('q')``."""
+    if isinstance(value, int) and not isinstance(value, bool) and _INT64_MIN <= value <= _INT64_MAX:
+        return value
+    return None
+
+
+def date_to_ordinal(value: Any) -> Optional[int]:
+    """Converte ``"2024-01-15"`` no ordinal do dia."""
+    if not isinstance(value, str):
+        return None
+    try:
+        return date.fromisoformat(value).toordinal()
+    except ValueError:
+        return None
+
+
+def record_fields(record: Record) -> Tuple[str, Optional[int], Optional[float], Optional[int]]:
+    """Nome, série, peso em gramas e ordinal da data de um registro avulso."""
+    return (
+        str(record.get("name", "")),
+        parse_serie(record.get("serie")),
+        weight_to_grams(record.get("initial_weight")),
+        date_to_ordinal(record.get("date"))
+    )
+
+
+class RecordSet(Sequence[Record]):
+    """
+    Registros guardados em colunas: nomes internados, série em ``array('q')``,
+    peso em gramas (``array('d')``) e data como ordinal (``array('l')``).
+
+    Comporta-se como uma lista de dicts somente para acréscimo: os dicts são
+    montados sob demanda, apenas para as posições acessadas. Valores que não
+    voltam idênticos da forma tipada (séries fora do int64 e colunas extras,
+    por exemplo) ficam em ``_overflow``, de modo que cada registro é
+    reconstruído exatamente como foi lido.
+    """
+
+    __slots__ = ("_names", "_series", "_grams", "_ordinals", "_overflow", "_size")
+
+    def __init__(self, records: Iterable[Record] = ()):
+        self._names: List[str] = []
+        self._series = array("q")
+        self._grams = array("d")
+        self._ordinals = array("l")
+        self._overflow: Dict[int, Record] = {}
+        self._size = 0
+        self.extend(records)
+
+    def __len__(self) -> int:
+        return self._size
+
+    @overload
+    def __getitem__(self, position: int) -> Record: ...
+
+    @overload
+    def __getitem__(self, position: slice) -> List[Record]: ...
+
+    def __getitem__(self, position: Union[int, slice]) -> Union[Record, List[Record]]:
+        if isinstance(position, slice):
+            return [self._record(i) for i in range(*position.indices(self._size))]
+        if position < 0:
+            position += self._size
+        if not 0 <= position < self._size:
+            raise IndexError("RecordSet index out of range")
+        return self._record(position)
+
+    def __iter__(self) -> Iterator[Record]:
+        for position in range(self._size):
+            yield self._record(position)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (RecordSet, list)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def append(self, record: Record) -> None:
+        overflow: Record = {}
+
+        name = record.get("name")
+        if isinstance(name, str):
+            self._names.append(sys.intern(name))
+        else:
+            self._names.append("")
+            overflow["name"] = name
+
+        serie = parse_serie(record.get("serie"))
+        if serie is not None:
+            self._series.append(serie)
+        else:
+            self._series.append(0)
+            overflow["serie"] = record.get("serie")
+
+        weight = record.get("initial_weight")
+        grams = weight_to_grams(weight) if isinstance(weight, str) else None
+        if grams is not None and grams_to_weight(grams) == weight:
+            self._grams.append(grams)
+        else:
+            self._grams.append(math.nan)
+            overflow["initial_weight"] = weight
+
+        day = record.get("date")
+        ordinal = date_to_ordinal(day)
+        if ordinal is not None and date.fromordinal(ordinal).isoformat() == day:
+            self._ordinals.append(ordinal)
+        else:
+            self._ordinals.append(0)
+            overflow["date"] = day
+
+        for key, value in record.items():
+            if key not in COLUMNS:
+                overflow[key] = value
+        # Colunas ausentes no registro original não devem reaparecer
+        for key in COLUMNS:
+            if key not in record:
+                overflow[key] = _MISSING
+
+        if overflow:
+            self._overflow[self._size] = overflow
+        self._size += 1
+
+    def extend(self, records: Iterable[Record]) -> None:
+        for record in records:
+            self.append(record)
+
+    # Os acessores tipados dão o mesmo resultado que ``record_fields`` sobre o
+    # registro montado: valores em _overflow passam pelos mesmos conversores
+
+    def name_at(self, position: int) -> str:
+        name = self._overflow.get(position, {}).get("name", self._names[position])
+        return "" if name is _MISSING else str(name)
+
+    def serie_at(self, position: int) -> Optional[int]:
+        return None if "serie" in self._overflow.get(position, ()) else self._series[position]
+
+    def grams_at(self, position: int) -> Optional[float]:
+        grams = self._grams[position]
+        if math.isnan(grams):
+            return weight_to_grams(self._overflow.get(position, {}).get("initial_weight"))
+        return grams
+
+    def ordinal_at(self, position: int) -> Optional[int]:
+        ordinal = self._ordinals[position]
+        if not ordinal:
+            return date_to_ordinal(self._overflow.get(position, {}).get("date"))
+        return ordinal
+
+    def fields_at(self, position: int) -> Tuple[str, Optional[int], Optional[float], Optional[int]]:
+        """Equivalente a ``record_fields(self[position])``, sem montar o dict."""
+        return (
+            self.name_at(position),
+            self.serie_at(position),
+            self.grams_at(position),
+            self.ordinal_at(position)
+        )
+
+    def _record(self, position: int) -> Record:
+        record = {
+            "name": self._names[position],
+            "serie": self._series[position],
+            "initial_weight": None,
+            "date": None
+        }
+        grams = self._grams[position]
+        if not math.isnan(grams):
+            record["initial_weight"] = grams_to_weight(grams)
+        ordinal = self._ordinals[position]
+        if ordinal:
+            record["date"] = date.fromordinal(ordinal).isoformat()
+        overflow = self._overflow.get(position)
+        if overflow:
+            for key, value in overflow.items():
+                if value is _MISSING:
+                    del record[key]
+                else:
+                    record[key] = value
+        return record
+
+
+class _Missing:
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return "<missing>"
+
+
+_MISSING = _Missing()
@@ -0,0 +1,139 @@
+"""
+Agregados incrementais sobre os registros das planilhas.
+"""
+from datetime import date
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from app.services.record_index import normalize_name
+from app.services.record_set import RecordSet, record_fields
+
+Record = Dict[str, Any]
+
+
+def _iso_week(ordinal: int) -> str:
+    year, week, _ = date.fromordinal(ordinal).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+class _Totals:
+    """Contagem, soma de séries e mínimo/máximo/média do peso."""
+
+    __slots__ = ("count", "serie_total", "weight_sum", "weight_count", "weight_min", "weight_max")
+
+    def __init__(self):
+        self.count = 0
+        self.serie_total = 0
+        self.weight_sum = 0.0
+        self.weight_count = 0
+        self.weight_min: Optional[float] = None
+        self.weight_max: Optional[float] = None
+
+    def add(self, serie: Optional[int], weight: Optional[float]) -> None:
+        self.count += 1
+        if serie is not None:
+            self.serie_total += serie
+        if weight is not None:
+            self.weight_sum += weight
+            self.weight_count += 1
+            self.weight_min = weight if self.weight_min is None else min(self.weight_min, weight)
+            self.weight_max = weight if self.weight_max is None else max(self.weight_max, weight)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "serie_total": self.serie_total,
+            "weight_min": self.weight_min,
+            "weight_max": self.weight_max,
+            "weight_avg": (
+                round(self.weight_sum / self.weight_count, 2) if self.weight_count else None
+            )
+        }
+
+
+class _AthleteTotals(_Totals):
+    """Totais de um atleta, com o primeiro e o último peso por data."""
+
+    __slots__ = ("name", "first", "last")
+
+    def __init__(self, name: str):
+        super().__init__()
+        self.name = name
+        self.first: Optional[Tuple[int, float]] = None
+        self.last: Optional[Tuple[int, float]] = None
+
+    def add_dated(self, day: int, weight: float) -> None:
+        if self.first is None or day < self.first[0]:
+            self.first = (day, weight)
+        if self.last is None or day >= self.last[0]:
+            self.last = (day, weight)
+
+    def summary(self) -> Dict[str, Any]:
+        summary = super().summary()
+        summary["name"] = self.name
+        summary["progress"] = (
+            round(self.last[1] - self.first[1], 2) if self.first is not None else None
+        )
+        return summary
+
+
+class RecordStats:
+    """
+    Agregados por atleta, por série e por semana ISO.
+
+    Cada registro é processado uma única vez em ``add``; o resumo é montado a
+    partir dos acumuladores e memorizado até a próxima inclusão.
+    """
+
+    def __init__(self, records: Iterable[Record] = ()):
+        self._total = _Totals()
+        self._athletes: Dict[str, _AthleteTotals] = {}
+        self._series: Dict[int, int] = {}
+        self._weeks: Dict[str, _Totals] = {}
+        self._snapshot: Optional[Dict[str, Any]] = None
+        if isinstance(records, RecordSet):
+            # Lê as colunas tipadas do cache, sem montar os dicts
+            for position in range(len(records)):
+                self._add(*records.fields_at(position))
+        else:
+            for record in records:
+                self.add(record)
+
+    def add(self, record: Record) -> None:
+        self._add(*record_fields(record))
+
+    def _add(
+        self, name: str, serie: Optional[int], grams: Optional[float], ordinal: Optional[int]
+    ) -> None:
+        self._snapshot = None
+        weight = grams / 1000 if grams is not None else None
+        self._total.add(serie, weight)
+
+        key = normalize_name(name)
+        athlete = self._athletes.get(key)
+        if athlete is None:
+            athlete = self._athletes[key] = _AthleteTotals(" ".join(name.split()))
+        athlete.add(serie, weight)
+
+        if serie is not None:
+            self._series[serie] = self._series.get(serie, 0) + 1
+
+        if ordinal is not None:
+            self._weeks.setdefault(_iso_week(ordinal), _Totals()).add(serie, weight)
+            if weight is not None:
+                athlete.add_dated(ordinal, weight)
+
+    def snapshot(self) -> Dict[str, Any]:
+        if self._snapshot is None:
+            self._snapshot = {
+                "total": self._total.summary(),
+                "athletes": [
+                    athlete.summary()
+                    for _, athlete in sorted(self._athletes.items())
+                ],
+                "series": {str(serie): count for serie, count in sorted(self._series.items())},
+                "weeks": [
+                    {"week": week, **totals.summary()}
+                    for week, totals in sorted(self._weeks.items())
+                ]
+            }
+        return self._snapshot
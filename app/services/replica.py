@@ -0,0 +1,135 @@
+"""
+Réplica local da worksheet em SQLite.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+Record = Dict[str, Any]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rows (
+    row_number INTEGER PRIMARY KEY,
+    name TEXT,
+    serie INTEGER,
+    initial_weight TEXT,
+    date TEXT,
+    row_hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+COLUMNS = ("name", "serie", "initial_weight", "date")
+
+
+def row_hash(record: Record) -> str:
+    """Hash estável do conteúdo de um registro."""
+    payload = json.dumps([record.get(column) for column in COLUMNS], ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class SheetReplica:
+    """
+    Espelho local das linhas da worksheet.
+
+    Cada registro é guardado com o número da linha na planilha (o cabeçalho é a
+    linha 1), de modo que gravações repetidas da mesma linha são idempotentes.
+    """
+
+    def __init__(self, path: str):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def upsert(self, first_row: int, records: List[Record]) -> None:
+        """Grava os registros a partir da linha ``first_row`` da planilha."""
+        with self._lock, self._conn:
+            self._insert(first_row, records)
+
+    def _insert(self, first_row: int, records: List[Record]) -> None:
+        # Chamado com o lock adquirido, dentro de uma transação
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO rows VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (first_row + i, *[record.get(c) for c in COLUMNS], row_hash(record))
+                for i, record in enumerate(records)
+            ]
+        )
+
+    def truncate_after(self, row_number: int) -> None:
+        """Remove as linhas posteriores a ``row_number``."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM rows WHERE row_number > ?", (row_number,))
+
+    def replace_all(self, records: List[Record]) -> None:
+        """Substitui todas as linhas numa única transação (leitores nunca veem a réplica vazia)."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM rows")
+            self._insert(2, records)
+
+    def contiguous_end(self) -> int:
+        """Última linha do trecho contínuo a partir da linha 2 (1 se vazio)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(r.row_number) FROM rows r WHERE NOT EXISTS "
+                "(SELECT 1 FROM rows n WHERE n.row_number = r.row_number + 1)"
+            ).fetchone()
+            first = self._conn.execute("SELECT MIN(row_number) FROM rows").fetchone()
+        if first[0] != 2 or row[0] is None:
+            return 1
+        return row[0]
+
+    def row_hash_at(self, row_number: int) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT row_hash FROM rows WHERE row_number = ?", (row_number,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def records(self, offset: int = 0, limit: int = -1) -> List[Record]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, serie, initial_weight, date FROM rows "
+                "ORDER BY row_number LIMIT ? OFFSET ?",
+                (limit, offset)
+            ).fetchall()
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+
+    def mark_synced(self, timestamp: Optional[float] = None) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('last_sync', ?)",
+                (str(timestamp if timestamp is not None else time.time()),)
+            )
+
+    def last_sync(self) -> Optional[float]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM meta WHERE key = 'last_sync'"
+            ).fetchone()
+        return float(row[0]) if row else None
+
+    def stats(self) -> Dict[str, Any]:
+        last_sync = self.last_sync()
+        return {
+            "rows": self.count(),
+            "last_sync": last_sync,
+            "lag_seconds": time.time() - last_sync if last_sync is not None else None
+        }
@@ -0,0 +1,32 @@
+"""
+Serialização JSON dos registros, com orjson quando disponível.
+"""
+import hashlib
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson é opcional
+    orjson = None
+
+
+def dumps(value: Any) -> bytes:
+    """Serializa para JSON em UTF-8."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value)
+        except TypeError:
+            # orjson recusa inteiros fora do int64 (série 2**70, por exemplo)
+            pass
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def digest(body: bytes) -> str:
+    """Hash curto do conteúdo, em hexadecimal."""
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def etag(body: bytes) -> str:
+    """ETag forte calculada a partir do corpo da resposta."""
+    return '"' + digest(body) + '"'
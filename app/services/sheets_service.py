@@ -1,98 +1,1012 @@
 """
 Serviço para integração com Google Sheets.
 """
+from __future__ import annotations
+
+import asyncio
+import functools
 import logging
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date
 from pathlib import Path
-from typing import List, Dict, Any
-
-import gspread
-from gspread import Spreadsheet, Worksheet
-from oauth2client.service_account import ServiceAccountCredentials
+from typing import (
+    TYPE_CHECKING, Any, Awaitable, Callable, ContextManager, Dict, Iterator, List, Optional, Tuple
+)
 
 from app.config import settings
 from app.models.sheet_models import SheetInput
+from app.services.change_feed import ChangeFeed
+from app.services.idempotency import IdempotencyStore
+from app.services.rate_limiter import (
+    RETRYABLE_STATUS, QuotaExceededError, QuotaScheduler, is_api_error
+)
+from app.services.record_cache import RecordCache
+from app.services.replica import SheetReplica, row_hash
+from app.services.tenant_pool import TenantPool
+from app.services.write_coalescer import WriteCoalescer
+from app.services.write_log import WriteAheadLog, first_sheet_batch
+
+# gspread e google-auth levam centenas de ms para importar; são importados no
+# primeiro uso (autenticação) para não pesar na inicialização da aplicação
+if TYPE_CHECKING:
+    import gspread
+    from gspread import Spreadsheet, Worksheet
+
+    from app.services.credentials import CredentialsManager
 
 logger = logging.getLogger(__name__)
 
+SHEET_COLUMNS = ["name", "serie", "initial_weight", "date"]
+
+_MAX_RECEIPTS = 10000
+
+_UPDATED_RANGE = re.compile(r"![A-Z]+(\d+)")
+
+# Intervalos A1 sem nome de worksheet (A1, A2:D10, A:A, 2:5)
+_BARE_A1 = re.compile(
+    r"^(?:[A-Z]{1,3}\d+(?::[A-Z]{1,3}\d*)?|[A-Z]{1,3}\d*:[A-Z]{1,3}\d*|\d+:\d+)$",
+    re.IGNORECASE
+)
+
+
+def _gspread():
+    """Módulo gspread, importado na primeira chamada."""
+    import gspread
+    return gspread
+
+
+def _first_worksheet(spreadsheet: Spreadsheet) -> Worksheet:
+    return spreadsheet.sheet1
+
+
+@dataclass
+class _SheetHandle:
+    """Referência a uma worksheet já aberta."""
+    spreadsheet_key: str
+    worksheet_id: int  # gid da worksheet
+    worksheet: Worksheet
+    opened_at: float
+    header: Optional[List[str]] = None
+
 
 class SheetsService:
-    """Serviço para operações com Google Sheets."""
+    """
+    Serviço para operações com Google Sheets.
     
-    def __init__(self):
+    A instância padrão trabalha com a planilha ``settings.sheet_name``. Para
+    outras planilhas, ``tenant()`` retorna serviços ligados a uma chave de
+    planilha e worksheet, que compartilham o cliente autenticado e o pool de
+    threads da instância padrão.
+    """
+    
+    def __init__(
+        self,
+        spreadsheet_key: Optional[str] = None,
+        worksheet: Optional[str] = None,
+        parent: Optional["SheetsService"] = None
+    ):
+        self._spreadsheet_key = spreadsheet_key
+        self._worksheet = worksheet
+        self._parent = parent
         self._client = None
-        self._sheet = None
+        self._credentials: Optional[CredentialsManager] = None
+        self._client_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._handles: Dict[str, _SheetHandle] = {}
+        self._handles_lock = threading.Lock()
+        self._handle_hits = 0
+        self._handle_misses = 0
+        self._records = RecordCache(
+            self._load_records,
+            ttl_seconds=settings.records_cache_ttl_seconds,
+            stale_seconds=settings.records_cache_stale_seconds,
+            version=self._remote_version if self._revalidates_with_drive() else None
+        )
+        if parent is None:
+            read_per_minute = settings.read_rate_limit_per_minute
+            write_per_minute = settings.rate_limit_per_minute
+        else:
+            read_per_minute = write_per_minute = settings.tenant_rate_limit_per_minute
+        self._quota = QuotaScheduler(
+            read_per_minute=read_per_minute,
+            write_per_minute=write_per_minute,
+            max_retries=settings.google_max_retries,
+            backoff_base=settings.google_backoff_base_seconds,
+            backoff_max=settings.google_backoff_max_seconds
+        )
+        self._coalescer: Optional[WriteCoalescer] = None
+        if parent is None:
+            self._receipts: "OrderedDict[str, Future]" = OrderedDict()
+            self._receipts_lock = threading.Lock()
+        else:
+            # Recibos de todas as planilhas ficam na instância padrão
+            self._receipts = parent._receipts
+            self._receipts_lock = parent._receipts_lock
+        self._tenants: Optional[TenantPool] = None
+        self._feed: Optional[ChangeFeed] = None
+        self._idempotency = IdempotencyStore(
+            ttl_seconds=settings.idempotency_ttl_seconds,
+            max_entries=settings.idempotency_max_entries
+        )
+        self._replica: Optional[SheetReplica] = None
+        self._replica_lock = threading.Lock()
+        self._replica_sync_lock = threading.Lock()
+        self._replica_stop = threading.Event()
+        self._replica_thread: Optional[threading.Thread] = None
+        self._write_log: Optional[WriteAheadLog] = None
+        self._write_log_lock = threading.Lock()
+        self._drain_lock = threading.Lock()
+        self._drain_stop = threading.Event()
+        self._drain_wakeup = threading.Event()
+        self._drain_thread: Optional[threading.Thread] = None
+        self._warmup_task: Optional[asyncio.Task] = None
+        self._warmup_status = "disabled"
+        self._warmup_error: Optional[str] = None
+        self._warmup_seconds: Optional[float] = None
     
-    def _get_client(self) -> gspread.Client:
-        if self._client is None:
-            try:
-                credentials_path = settings.get_credentials_path()
-                
-                if not credentials_path.exists():
-                    raise FileNotFoundError(
-                        f"Arquivo de credenciais não encontrado: {credentials_path}"
-                    )
-                
-                scope = [
-                    "https://spreadsheets.google.com/feeds",
-                    "https://www.googleapis.com/auth/spreadsheets",
-                    "https://www.googleapis.com/auth/drive"
-                ]
-                
-                logger.info(f"Autenticando com credenciais: {credentials_path}")
-                creds = ServiceAccountCredentials.from_json_keyfile_name(
-                    str(credentials_path), scope
+    def _revalidates_with_drive(self) -> bool:
+        if settings.records_revalidate_with_drive is not None:
+            return settings.records_revalidate_with_drive
+        # A réplica é lida localmente: a consulta ao Drive só gastaria cota
+        return not (settings.replica_enabled and self._parent is None)
+    
+    @property
+    def default_sheet_name(self) -> str:
+        return self._worksheet if self._worksheet is not None else settings.sheet_name
+    
+    def tenant(self, spreadsheet_key: str, worksheet: str) -> "SheetsService":
+        """Retorna o serviço de uma worksheet de outra planilha, a partir do pool."""
+        return self._tenant_pool().get(spreadsheet_key, worksheet)
+    
+    def tenant_lease(
+        self, spreadsheet_key: str, worksheet: str
+    ) -> ContextManager["SheetsService"]:
+        """
+        Como ``tenant()``, mas o serviço não é encerrado pelo pool enquanto o
+        bloco ``with`` estiver em execução.
+        """
+        return self._tenant_pool().lease(spreadsheet_key, worksheet)
+    
+    def _tenant_pool(self) -> TenantPool:
+        if self._parent is not None:
+            return self._parent._tenant_pool()
+        with self._executor_lock:
+            if self._tenants is None:
+                self._tenants = TenantPool(
+                    lambda key, title: SheetsService(key, title, parent=self),
+                    max_size=settings.tenant_pool_size,
+                    idle_seconds=settings.tenant_idle_seconds
+                )
+            return self._tenants
+    
+    def tenant_stats(self) -> Optional[Dict[str, int]]:
+        return self._tenants.stats() if self._tenants is not None else None
+    
+    def change_feed(self) -> ChangeFeed:
+        """Feed de linhas novas da planilha padrão do serviço."""
+        with self._executor_lock:
+            if self._feed is None:
+                self._feed = ChangeFeed(
+                    self._poll_new_rows,
+                    interval=settings.stream_poll_seconds,
+                    history=settings.stream_history_size,
+                    queue_size=settings.stream_queue_size
+                )
+            return self._feed
+    
+    def _poll_new_rows(self, next_row: Optional[int]) -> Tuple[int, List[Dict[str, Any]]]:
+        sheet_name = self.default_sheet_name
+        if next_row is None:
+            # O cabeçalho ocupa a linha 1; com o cache aquecido não há leitura
+            return self._records.count(sheet_name) + 2, []
+        return next_row, self._read_rows(sheet_name, next_row)
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._parent is not None:
+            return self._parent._get_executor()
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.sheets_max_workers,
+                    thread_name_prefix="sheets"
                 )
-                self._client = gspread.authorize(creds)
-                logger.info("Autenticação realizada com sucesso")
-                
+            return self._executor
+    
+    async def _run(self, func, *args, **kwargs):
+        """Executa uma chamada bloqueante do gspread fora do event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(), functools.partial(func, *args, **kwargs)
+        )
+    
+    def _call(self, kind: str, func, *args, **kwargs):
+        """Executa uma chamada à API respeitando a cota ("read" ou "write")."""
+        deadline = time.monotonic() + settings.google_deadline_seconds
+        return self._quota.call(kind, func, *args, deadline=deadline, **kwargs)
+    
+    def start_background_tasks(self) -> None:
+        """Inicia as tarefas em segundo plano habilitadas na configuração."""
+        if settings.replica_enabled and self._replica_thread is None:
+            self._replica_stop.clear()
+            self._replica_thread = threading.Thread(
+                target=self._replica_loop, name="sheets-replica-sync", daemon=True
+            )
+            self._replica_thread.start()
+        if self._get_write_log() is not None and self._drain_thread is None:
+            self._drain_stop.clear()
+            self._drain_thread = threading.Thread(
+                target=self._drain_loop, name="sheets-write-log", daemon=True
+            )
+            self._drain_thread.start()
+    
+    def shutdown(self) -> None:
+        """Grava as linhas pendentes e libera o pool de threads do serviço."""
+        if self._warmup_task is not None:
+            self._warmup_task.cancel()
+            self._warmup_task = None
+        if self._coalescer is not None:
+            self._coalescer.close()
+            self._coalescer = None
+        if self._replica_thread is not None:
+            self._replica_stop.set()
+            self._replica_thread.join()
+            self._replica_thread = None
+        if self._drain_thread is not None:
+            self._drain_stop.set()
+            self._drain_wakeup.set()
+            self._drain_thread.join()
+            self._drain_thread = None
+        with self._write_log_lock:
+            if self._write_log is not None:
+                self._write_log.close()
+                self._write_log = None
+        if self._tenants is not None:
+            self._tenants.clear()
+        if self._feed is not None:
+            self._feed.close()
+            self._feed = None
+        if self._credentials is not None:
+            self._credentials.stop()
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+    
+    async def warm_up(self) -> None:
+        """
+        Autentica, abre a planilha padrão e carrega os caches.
+        
+        Depois da autenticação, o cabeçalho e os registros (já serializados
+        para /dados) são carregados em paralelo.
+        """
+        await self.get_sheet_async()
+        await asyncio.gather(
+            self._run(self._get_header, self.default_sheet_name),
+            self.get_all_records_json_async()
+        )
+    
+    def start_warm_up(self) -> None:
+        """Inicia o aquecimento em segundo plano, sem atrasar a inicialização."""
+        if self._warmup_task is None:
+            self._warmup_status = "warming"
+            self._warmup_task = asyncio.get_running_loop().create_task(self._warm_up_loop())
+    
+    async def _warm_up_loop(self) -> None:
+        start = time.monotonic()
+        while True:
+            try:
+                await self.warm_up()
+                break
             except Exception as e:
-                logger.error(f"Erro na autenticação: {str(e)}")
-                raise
+                self._warmup_error = str(e)
+                logger.warning(
+                    "Falha no aquecimento, nova tentativa em %.0fs: %s",
+                    settings.warmup_retry_seconds, e
+                )
+                await asyncio.sleep(settings.warmup_retry_seconds)
+        self._warmup_seconds = time.monotonic() - start
+        self._warmup_status = "ready"
+        self._warmup_error = None
+        logger.info("Aquecimento concluído em %.0f ms", self._warmup_seconds * 1000)
+    
+    def readiness(self) -> Dict[str, Any]:
+        """
+        Estado do aquecimento.
+        
+        Sem aquecimento o serviço está sempre pronto: a autenticação acontece
+        na primeira requisição.
+        """
+        return {
+            "ready": self._warmup_status != "warming",
+            "warmup": self._warmup_status,
+            "warmup_seconds": self._warmup_seconds,
+            "error": self._warmup_error
+        }
+    
+    def _get_client(self) -> gspread.Client:
+        if self._parent is not None:
+            return self._parent._get_client()
+        with self._client_lock:
+            if self._client is None:
+                try:
+                    from app.services.credentials import CredentialsManager
+                    from app.services.http_session import build_authorized_session
+                    
+                    credentials_path = settings.get_credentials_path()
+                    
+                    if not credentials_path.exists():
+                        raise FileNotFoundError(
+                            f"Arquivo de credenciais não encontrado: {credentials_path}"
+                        )
+                    
+                    logger.info("Autenticando com credenciais: %s", credentials_path)
+                    credentials = CredentialsManager.from_service_account_file(
+                        str(credentials_path),
+                        refresh_margin_seconds=settings.google_token_refresh_margin_seconds
+                    )
+                    # O primeiro token é obtido aqui; os seguintes, em segundo plano
+                    credentials.start()
+                    self._credentials = credentials
+                    
+                    # Sessão própria: pool de conexões dimensionado, compartilhado
+                    # por todas as worksheets e tenants que usam este cliente
+                    session = build_authorized_session(
+                        credentials.credentials,
+                        pool_size=max(settings.google_http_pool_size, settings.sheets_max_workers),
+                        keepalive_idle_seconds=settings.google_keepalive_idle_seconds
+                    )
+                    self._client = _gspread().authorize(None, session=session)
+                    self._client.set_timeout((
+                        settings.google_connect_timeout_seconds,
+                        settings.google_read_timeout_seconds
+                    ))
+                    logger.info("Autenticação realizada com sucesso")
+                    
+                except Exception as e:
+                    logger.error("Erro na autenticação: %s", e)
+                    raise
         
         return self._client
     
     def get_sheet(self, sheet_name: str = None) -> Worksheet:
         if sheet_name is None:
-            sheet_name = settings.sheet_name
+            sheet_name = self.default_sheet_name
+        
+        with self._handles_lock:
+            handle = self._handles.get(sheet_name)
+            if handle is not None and self._is_fresh(handle):
+                self._handle_hits += 1
+                return handle.worksheet
+            self._handle_misses += 1
         
         try:
             client = self._get_client()
-            logger.info(f"Abrindo planilha: {sheet_name}")
-            spreadsheet = client.open(sheet_name)
-            worksheet = spreadsheet.sheet1
-            logger.info(f"Planilha {sheet_name} aberta com sucesso")
+            if handle is not None:
+                # Com a chave já conhecida evitamos a busca por título no Drive
+                logger.info("Reabrindo planilha %s pela chave %s", sheet_name, handle.spreadsheet_key)
+                spreadsheet = self._call("read", client.open_by_key, handle.spreadsheet_key)
+                worksheet = self._call(
+                    "read", spreadsheet.get_worksheet_by_id, handle.worksheet_id
+                )
+            elif self._spreadsheet_key is not None:
+                logger.info("Abrindo worksheet %s da planilha %s", sheet_name, self._spreadsheet_key)
+                spreadsheet = self._call("read", client.open_by_key, self._spreadsheet_key)
+                worksheet = self._call("read", spreadsheet.worksheet, sheet_name)
+            else:
+                logger.info("Abrindo planilha: %s", sheet_name)
+                spreadsheet = self._call("read", client.open, sheet_name)
+                worksheet = self._call("read", _first_worksheet, spreadsheet)
+            
+            with self._handles_lock:
+                self._handles[sheet_name] = _SheetHandle(
+                    spreadsheet_key=spreadsheet.id,
+                    worksheet_id=worksheet.id,
+                    worksheet=worksheet,
+                    opened_at=time.monotonic()
+                )
+            logger.info("Planilha %s aberta com sucesso", sheet_name)
             return worksheet
             
-        except gspread.SpreadsheetNotFound:
-            logger.error(f"Planilha '{sheet_name}' não encontrada")
+        except _gspread().SpreadsheetNotFound:
+            self.invalidate_sheet(sheet_name)
+            logger.error("Planilha '%s' não encontrada", sheet_name)
             raise Exception(f"Planilha '{sheet_name}' não encontrada. Verifique se o nome está correto e se foi compartilhada com a service account.")
         except Exception as e:
-            logger.error(f"Erro ao abrir planilha: {str(e)}")
+            if self._is_not_found(e):
+                self.invalidate_sheet(sheet_name)
+            logger.error("Erro ao abrir planilha: %s", e)
             raise
     
+    def invalidate_sheet(self, sheet_name: str = None) -> None:
+        """Descarta a referência em cache da planilha."""
+        if sheet_name is None:
+            sheet_name = self.default_sheet_name
+        with self._handles_lock:
+            self._handles.pop(sheet_name, None)
+    
+    def handle_cache_stats(self) -> Dict[str, int]:
+        """Retorna os contadores do cache de worksheets."""
+        with self._handles_lock:
+            return {
+                "hits": self._handle_hits,
+                "misses": self._handle_misses,
+                "size": len(self._handles)
+            }
+    
+    def _is_fresh(self, handle: _SheetHandle) -> bool:
+        return time.monotonic() - handle.opened_at < settings.sheet_handle_ttl_seconds
+    
+    @staticmethod
+    def _is_not_found(error: Exception) -> bool:
+        gspread = _gspread()
+        if isinstance(error, (gspread.SpreadsheetNotFound, gspread.WorksheetNotFound)):
+            return True
+        if isinstance(error, gspread.exceptions.APIError):
+            return error.code == 404
+        return False
+    
+    @classmethod
+    def _is_permanent(cls, error: Exception) -> bool:
+        """Erros que se repetiriam em qualquer nova tentativa (4xx, exceto 408 e 429)."""
+        if cls._is_not_found(error):
+            return True
+        return (
+            is_api_error(error)
+            and 400 <= error.code < 500
+            and error.code not in RETRYABLE_STATUS | {408}
+        )
+    
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """Retorna as métricas dos caches do serviço."""
+        return {
+            "handles": self.handle_cache_stats(),
+            "records": self._records.stats()
+        }
+    
+    def quota_stats(self) -> Dict[str, float]:
+        """Retorna os tokens disponíveis e as novas tentativas da cota."""
+        return self._quota.stats()
+    
     def get_all_records(self, sheet_name: str = None) -> List[Dict[str, Any]]:
+        if sheet_name is None:
+            sheet_name = self.default_sheet_name
+        return self._records.get(sheet_name)
+    
+    def get_all_records_json(self, sheet_name: str = None) -> Tuple[bytes, str]:
+        """Todos os registros já serializados em JSON, com a ETag do conteúdo."""
+        if sheet_name is None:
+            sheet_name = self.default_sheet_name
+        return self._records.encoded(sheet_name)
+    
+    def query_records(
+        self,
+        name: Optional[str] = None,
+        serie: Optional[int] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        sheet_name: str = None
+    ) -> List[Dict[str, Any]]:
+        """Filtra os registros por nome, série e intervalo de datas usando índices."""
+        if sheet_name is None:
+            sheet_name = self.default_sheet_name
+        return self._records.select(sheet_name, name, serie, date_from, date_to)
+    
+    def get_stats(self, sheet_name: str = None) -> Dict[str, Any]:
+        """Agregados por atleta, série e semana, mantidos junto do cache."""
+        if sheet_name is None:
+            sheet_name = self.default_sheet_name
+        return self._records.aggregate(sheet_name)
+    
+    def get_records_page(
+        self, offset: int, limit: int, sheet_name: str = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Retorna ``limit`` registros a partir de ``offset``.
+        
+        Usa o cache de registros quando disponível; caso contrário lê apenas o
+        intervalo A1 da página, com o cabeçalho guardado junto da worksheet.
+        Menos de ``limit`` registros significa que a planilha terminou; linhas
+        em branco no meio dela voltam como registros vazios, como em
+        ``get_all_records``.
+        """
+        if sheet_name is None:
+            sheet_name = self.default_sheet_name
+        
+        cached = self._records.peek(sheet_name, offset, offset + limit)
+        if cached is not None:
+            return cached
+        
+        replica = self._get_replica(sheet_name)
+        if replica is not None:
+            return replica.records(offset, limit)
+        
+        try:
+            start = offset + 2
+            records = self._read_rows(sheet_name, start, start + limit - 1)
+            if len(records) < limit:
+                # A API omite as linhas vazias do fim do intervalo: só o total
+                # da planilha diz se ela acabou ou se a página termina em branco
+                missing = min(limit, self._records.count(sheet_name) - offset) - len(records)
+                if missing > 0:
+                    blank = dict.fromkeys(self._get_header(sheet_name), "")
+                    records.extend(dict(blank) for _ in range(missing))
+            logger.info("Obtidos %s registros a partir da linha %s", len(records), start)
+            return records
+        except Exception as e:
+            logger.error("Erro ao obter página de registros: %s", e)
+            raise
+    
+    def iter_records(
+        self, chunk_size: int = None, sheet_name: str = None
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Percorre a planilha em blocos de ``chunk_size`` registros.
+        
+        Termina no primeiro bloco incompleto: ``get_records_page`` só devolve
+        menos registros que o pedido quando a planilha acabou.
+        """
+        if chunk_size is None:
+            chunk_size = settings.export_chunk_rows
+        
+        offset = 0
+        while True:
+            chunk = self.get_records_page(offset, chunk_size, sheet_name)
+            if chunk:
+                yield chunk
+            if len(chunk) < chunk_size:
+                return
+            offset += chunk_size
+    
+    def _read_rows(
+        self, sheet_name: str, first_row: int, last_row: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Lê um intervalo de linhas da planilha (até o fim se last_row for None)."""
+        try:
+            header = self._get_header(sheet_name)
+            if not header:
+                return []
+            sheet = self.get_sheet(sheet_name)
+            last_column = _gspread().utils.rowcol_to_a1(1, len(header))[:-1]
+            end = f"{last_column}{last_row}" if last_row is not None else last_column
+            values = self._call("read", sheet.get, f"A{first_row}:{end}")
+            return self._to_records(header, values)
+        except Exception as e:
+            if self._is_not_found(e):
+                self.invalidate_sheet(sheet_name)
+            raise
+    
+    def get_ranges(
+        self, ranges: List[str], sheet_name: str = None
+    ) -> Dict[str, List[List[Any]]]:
+        """
+        Lê vários intervalos com uma única chamada ``values.batchGet``.
+        
+        Intervalos A1 sem worksheet são lidos da worksheet do serviço; intervalos
+        qualificados (``'Aba'!A1:B2``) e intervalos nomeados são enviados como
+        estão. O resultado é indexado pelo intervalo pedido.
+        """
+        if sheet_name is None:
+            sheet_name = self.default_sheet_name
+        
+        unique = list(dict.fromkeys(ranges))
         try:
             sheet = self.get_sheet(sheet_name)
-            records = sheet.get_all_records()
-            logger.info(f"Obtidos {len(records)} registros da planilha")
+            resolved = [
+                _gspread().utils.absolute_range_name(sheet.title, name)
+                if _BARE_A1.match(name) else name
+                for name in unique
+            ]
+            response = self._call("read", sheet.spreadsheet.values_batch_get, resolved)
+        except Exception as e:
+            if self._is_not_found(e):
+                self.invalidate_sheet(sheet_name)
+            raise
+        
+        # A API devolve os intervalos na ordem do pedido
+        value_ranges = response.get("valueRanges", [])
+        return {
+            name: value_range.get("values", [])
+            for name, value_range in zip(unique, value_ranges)
+        }
+    
+    def _remote_version(self, sheet_name: str) -> str:
+        """Data de modificação da planilha no Drive, usada para revalidar o cache."""
+        sheet = self.get_sheet(sheet_name)
+        return self._call("read", sheet.spreadsheet.get_lastUpdateTime)
+    
+    def _get_header(self, sheet_name: str) -> List[str]:
+        sheet = self.get_sheet(sheet_name)
+        with self._handles_lock:
+            handle = self._handles.get(sheet_name)
+            if handle is not None and handle.header is not None:
+                return handle.header
+        
+        header = self._call("read", sheet.row_values, 1)
+        with self._handles_lock:
+            handle = self._handles.get(sheet_name)
+            if handle is not None:
+                handle.header = header
+        return header
+    
+    @staticmethod
+    def _to_records(header: List[str], values: List[List[Any]]) -> List[Dict[str, Any]]:
+        """Converte linhas brutas em registros, como o get_all_records do gspread."""
+        gspread = _gspread()
+        # Um intervalo além da última linha volta como [[]]; linhas vazias no
+        # meio do intervalo são mantidas para preservar a numeração
+        end = len(values)
+        while end and all(cell in ("", None) for cell in values[end - 1]):
+            end -= 1
+        width = len(header)
+        rows = [
+            gspread.utils.numericise_all(list(row[:width]) + [""] * (width - len(row)))
+            for row in values[:end]
+        ]
+        return gspread.utils.to_records(header, rows)
+    
+    def _load_records(self, sheet_name: str) -> List[Dict[str, Any]]:
+        replica = self._get_replica(sheet_name)
+        if replica is None:
+            return self._fetch_records(sheet_name)
+        if replica.last_sync() is None:
+            self.sync_replica()
+        return replica.records()
+    
+    def _fetch_records(self, sheet_name: str) -> List[Dict[str, Any]]:
+        try:
+            sheet = self.get_sheet(sheet_name)
+            records = self._call("read", sheet.get_all_records)
+            logger.info("Obtidos %s registros da planilha", len(records))
             return records
         except Exception as e:
-            logger.error(f"Erro ao obter registros: {str(e)}")
+            if self._is_not_found(e):
+                self.invalidate_sheet(sheet_name)
+            logger.error("Erro ao obter registros: %s", e)
             raise
     
     def append_row(self, data: SheetInput, sheet_name: str = None) -> bool:
+        if settings.write_coalescing_enabled:
+            return self.submit_row(data, sheet_name).result()
+        
+        if sheet_name is None:
+            sheet_name = self.default_sheet_name
         try:
-            sheet = self.get_sheet(sheet_name)
-            line_new = [data.name, data.serie, data.initial_weight, data.date]
-            
-            logger.info(f"Adicionando linha: {line_new}")
-            sheet.append_row(line_new)
+            line_new = self._to_row(data)
+            logger.info("Adicionando linha: %s", line_new)
+            self._write_rows(sheet_name, [line_new])
             logger.info("Linha adicionada com sucesso")
             return True
             
         except Exception as e:
-            logger.error(f"Erro ao adicionar linha: {str(e)}")
+            logger.error("Erro ao adicionar linha: %s", e)
             raise
+    
+    def append_rows(
+        self, rows: List[SheetInput], sheet_name: str = None
+    ) -> List[Optional[str]]:
+        """
+        Adiciona várias linhas usando uma chamada de append por bloco.
+        
+        Retorna, para cada linha, None em caso de sucesso ou a mensagem de erro
+        do bloco que falhou.
+        
+        A cota esgotada interrompe o lote: se nenhum bloco foi gravado, o
+        QuotaExceededError é propagado (o lote inteiro pode ser reenviado);
+        senão, as linhas restantes recebem o erro sem novas tentativas.
+        """
+        if sheet_name is None:
+            sheet_name = self.default_sheet_name
+        
+        results: List[Optional[str]] = []
+        chunk_size = self._chunk_size()
+        for start in range(0, len(rows), chunk_size):
+            chunk = [self._to_row(data) for data in rows[start:start + chunk_size]]
+            try:
+                self._write_rows(sheet_name, chunk)
+                results.extend([None] * len(chunk))
+                logger.info("Bloco de %s linhas adicionado", len(chunk))
+            except QuotaExceededError as e:
+                if start == 0:
+                    raise
+                logger.error("Cota esgotada após %s linhas do lote: %s", start, e)
+                results.extend([str(e)] * (len(rows) - start))
+                break
+            except Exception as e:
+                logger.error("Erro ao adicionar bloco de linhas: %s", e)
+                results.extend([str(e)] * len(chunk))
+        return results
+    
+    def submit_row(self, data: SheetInput, sheet_name: str = None) -> Future:
+        """Enfileira a linha na fila de escrita agrupada."""
+        if sheet_name is None:
+            sheet_name = self.default_sheet_name
+        return self._get_coalescer().submit(sheet_name, self._to_row(data))
+    
+    def submit_row_with_receipt(self, data: SheetInput, sheet_name: str = None) -> str:
+        """Enfileira a linha e retorna um identificador para consulta posterior."""
+        future = self.submit_row(data, sheet_name)
+        receipt_id = uuid.uuid4().hex
+        with self._receipts_lock:
+            self._receipts[receipt_id] = future
+            while len(self._receipts) > _MAX_RECEIPTS:
+                self._receipts.popitem(last=False)
+        return receipt_id
+    
+    def get_receipt(self, receipt_id: str) -> Optional[Dict[str, Any]]:
+        """Retorna o estado da gravação associada ao recibo."""
+        with self._receipts_lock:
+            future = self._receipts.get(receipt_id)
+        if future is None:
+            return None
+        if not future.done():
+            return {"receipt_id": receipt_id, "status": "pending"}
+        error = future.exception()
+        if error is not None:
+            return {"receipt_id": receipt_id, "status": "error", "error": str(error)}
+        return {"receipt_id": receipt_id, "status": "success"}
+    
+    def _get_coalescer(self) -> WriteCoalescer:
+        with self._executor_lock:
+            if self._coalescer is None:
+                self._coalescer = WriteCoalescer(
+                    self._write_rows,
+                    max_rows=settings.write_coalescing_max_rows,
+                    max_delay_ms=settings.write_coalescing_max_delay_ms
+                )
+            return self._coalescer
+    
+    def _write_rows(self, sheet_name: str, rows: List[List[Any]]) -> None:
+        """Grava as linhas com uma única chamada e atualiza o cache."""
+        try:
+            sheet = self.get_sheet(sheet_name)
+            response = self._call("write", sheet.append_rows, rows)
+        except Exception as e:
+            if self._is_not_found(e):
+                self.invalidate_sheet(sheet_name)
+            raise
+        records = [dict(zip(SHEET_COLUMNS, row)) for row in rows]
+        self._records.extend(sheet_name, records)
+        
+        replica = self._get_replica(sheet_name)
+        first_row = self._first_updated_row(response)
+        if replica is not None and first_row is not None:
+            # Gravação pelo número da linha: repetir a sincronização não duplica
+            replica.upsert(first_row, records)
+        
+        feed = self._feed
+        if feed is not None and sheet_name == self.default_sheet_name:
+            feed.publish(first_row, records)
+    
+    @staticmethod
+    def _first_updated_row(response: Any) -> Optional[int]:
+        try:
+            match = _UPDATED_RANGE.search(response["updates"]["updatedRange"])
+        except (KeyError, TypeError):
+            return None
+        return int(match.group(1)) if match else None
+    
+    def _get_replica(self, sheet_name: str) -> Optional[SheetReplica]:
+        """Retorna a réplica local, usada apenas para a planilha padrão."""
+        if (
+            not settings.replica_enabled
+            or self._parent is not None
+            or sheet_name != settings.sheet_name
+        ):
+            return None
+        with self._replica_lock:
+            if self._replica is None:
+                self._replica = SheetReplica(settings.replica_path)
+            return self._replica
+    
+    def sync_replica(self) -> int:
+        """
+        Sincroniza a réplica local com a planilha padrão.
+        
+        Relê a planilha a partir da última linha conhecida: se o hash dessa
+        linha confere, apenas as linhas novas são gravadas; caso contrário a
+        réplica é recarregada por completo. Retorna o número de linhas novas.
+        """
+        sheet_name = settings.sheet_name
+        replica = self._get_replica(sheet_name)
+        if replica is None:
+            return 0
+        
+        with self._replica_sync_lock:
+            end = replica.contiguous_end()
+            tail = self._read_rows(sheet_name, end) if end > 1 else []
+            
+            if tail and replica.row_hash_at(end) == row_hash(tail[0]):
+                new_records = tail[1:]
+                replica.upsert(end + 1, new_records)
+                replica.truncate_after(end + len(new_records))
+            else:
+                logger.info("Réplica divergente da planilha, recarregando por completo")
+                new_records = self._fetch_records(sheet_name)
+                replica.replace_all(new_records)
+            
+            replica.mark_synced()
+            if new_records:
+                # A próxima leitura recarrega o cache a partir da réplica
+                self._records.invalidate(sheet_name)
+        
+        if new_records:
+            logger.info("Réplica sincronizada com %s novas linhas", len(new_records))
+        return len(new_records)
+    
+    def replica_stats(self) -> Optional[Dict[str, Any]]:
+        """Retorna o tamanho e o atraso de sincronização da réplica."""
+        replica = self._get_replica(settings.sheet_name)
+        return replica.stats() if replica is not None else None
+    
+    def _get_write_log(self) -> Optional[WriteAheadLog]:
+        """Log de escrita local, usado apenas pela instância padrão."""
+        if not settings.write_log_enabled or self._parent is not None:
+            return None
+        with self._write_log_lock:
+            if self._write_log is None:
+                self._write_log = WriteAheadLog(settings.write_log_path)
+            return self._write_log
+    
+    def enqueue_row(self, data: SheetInput, sheet_name: str = None) -> Optional[int]:
+        """
+        Grava a linha no log local e retorna seu identificador.
+        
+        A linha é enviada ao Google em segundo plano. Retorna None quando o log
+        está desabilitado, e a linha deve então ser gravada diretamente.
+        """
+        log = self._get_write_log()
+        if log is None:
+            return None
+        if sheet_name is None:
+            sheet_name = self.default_sheet_name
+        (log_id,) = log.append(sheet_name, [self._to_row(data)])
+        self._drain_wakeup.set()
+        return log_id
+    
+    def drain_write_log(self) -> int:
+        """
+        Envia as linhas pendentes do log ao Google, em blocos e na ordem.
+        
+        Retorna o número de linhas enviadas; uma falha interrompe o envio e é
+        propagada, mantendo as linhas restantes no log. Um bloco recusado de
+        forma definitiva por ``write_log_max_attempts`` tentativas vai para a
+        fila de falhas, liberando as linhas seguintes.
+        """
+        log = self._get_write_log()
+        if log is None:
+            return 0
+        drained = 0
+        with self._drain_lock:
+            while True:
+                batch = first_sheet_batch(log.pending(settings.write_log_batch_rows))
+                if not batch:
+                    return drained
+                ids = [entry.id for entry in batch]
+                try:
+                    self._write_rows(batch[0].sheet_name, [entry.row for entry in batch])
+                except Exception as e:
+                    attempts = max(entry.attempts for entry in batch) + 1
+                    if self._is_permanent(e) and attempts >= settings.write_log_max_attempts:
+                        log.dead_letter(ids, str(e))
+                        logger.error(
+                            "%s linhas do log local recusadas pelo Google após %s tentativas: %s",
+                            len(batch), attempts, e
+                        )
+                        continue
+                    log.record_failure(ids, str(e))
+                    raise
+                log.ack(ids)
+                drained += len(batch)
+                logger.info("%s linhas do log local gravadas no Google", len(batch))
+    
+    async def enqueue_row_async(self, data: SheetInput, sheet_name: str = None) -> Optional[int]:
+        # O commit no SQLite faz fsync: roda no pool para não travar o event loop
+        return await self._run(self.enqueue_row, data, sheet_name)
+    
+    def write_log_stats(self) -> Optional[Dict[str, Any]]:
+        log = self._get_write_log()
+        return log.stats() if log is not None else None
+    
+    async def write_log_stats_async(self) -> Optional[Dict[str, Any]]:
+        # A contagem lê o SQLite sob o lock do log: fica fora do event loop
+        return await self._run(self.write_log_stats)
+    
+    def _drain_loop(self) -> None:
+        failures = 0
+        while not self._drain_stop.is_set():
+            self._drain_wakeup.clear()
+            try:
+                self.drain_write_log()
+                failures = 0
+            except Exception as e:
+                failures += 1
+                delay = min(
+                    settings.write_log_backoff_max_seconds,
+                    settings.write_log_backoff_base_seconds * 2 ** (failures - 1)
+                )
+                logger.warning(
+                    "Falha ao enviar o log local ao Google, nova tentativa em %.0fs: %s",
+                    delay, e
+                )
+                self._drain_stop.wait(delay)
+                continue
+            self._drain_wakeup.wait(settings.write_log_poll_seconds)
+    
+    def _replica_loop(self) -> None:
+        while not self._replica_stop.is_set():
+            try:
+                self.sync_replica()
+            except Exception as e:
+                logger.error("Erro ao sincronizar réplica: %s", e)
+            self._replica_stop.wait(settings.replica_sync_interval_seconds)
+    
+    @staticmethod
+    def _to_row(data: SheetInput) -> List[Any]:
+        return [data.name, data.serie, data.initial_weight, data.date]
+    
+    @staticmethod
+    def _chunk_size() -> int:
+        by_cells = settings.batch_chunk_cells // len(SHEET_COLUMNS)
+        return max(1, min(settings.batch_chunk_rows, by_cells))
+    
+    async def get_sheet_async(self, sheet_name: str = None) -> Worksheet:
+        return await self._run(self.get_sheet, sheet_name)
+    
+    async def get_all_records_async(self, sheet_name: str = None) -> List[Dict[str, Any]]:
+        return await self._run(self.get_all_records, sheet_name)
+    
+    async def get_all_records_json_async(self, sheet_name: str = None) -> Tuple[bytes, str]:
+        return await self._run(self.get_all_records_json, sheet_name)
+    
+    async def query_records_async(self, **filters: Any) -> List[Dict[str, Any]]:
+        return await self._run(self.query_records, **filters)
+    
+    async def get_stats_async(self, sheet_name: str = None) -> Dict[str, Any]:
+        return await self._run(self.get_stats, sheet_name)
+    
+    async def get_ranges_async(
+        self, ranges: List[str], sheet_name: str = None
+    ) -> Dict[str, List[List[Any]]]:
+        return await self._run(self.get_ranges, ranges, sheet_name)
+    
+    async def replica_stats_async(self) -> Optional[Dict[str, Any]]:
+        return await self._run(self.replica_stats)
+    
+    async def get_records_page_async(
+        self, offset: int, limit: int, sheet_name: str = None
+    ) -> List[Dict[str, Any]]:
+        return await self._run(self.get_records_page, offset, limit, sheet_name)
+    
+    async def append_row_async(self, data: SheetInput, sheet_name: str = None) -> bool:
+        if settings.write_coalescing_enabled:
+            # Aguarda a gravação do bloco sem ocupar uma thread do pool
+            return await asyncio.wrap_future(self.submit_row(data, sheet_name))
+        return await self._run(self.append_row, data, sheet_name)
+    
+    async def run_idempotent(
+        self, key: str, fingerprint: str, operation: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """
+        Executa a operação de escrita uma única vez por chave de idempotência.
+        
+        Retorna o resultado e se ele foi reaproveitado de uma execução anterior.
+        """
+        return await self._idempotency.run(key, fingerprint, operation)
+    
+    def idempotency_stats(self) -> Dict[str, int]:
+        return self._idempotency.stats()
+    
+    async def append_rows_async(
+        self, rows: List[SheetInput], sheet_name: str = None
+    ) -> List[Optional[str]]:
+        return await self._run(self.append_rows, rows, sheet_name)
 
 
 sheets_service = SheetsService()
@@ -0,0 +1,115 @@
+"""
+Pool de serviços por planilha (tenant).
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+TenantKey = Tuple[str, str]
+
+
+class TenantPool:
+    """
+    Pool LRU limitado de serviços, um por par (spreadsheet_key, worksheet).
+
+    Serviços sem uso há mais de ``idle_seconds`` ou que excedem ``max_size``
+    são removidos e encerrados com ``shutdown()``, assim que nenhuma requisição
+    os estiver usando (ver ``lease``).
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[str, str], Any],
+        max_size: int,
+        idle_seconds: float
+    ):
+        self._factory = factory
+        self._max_size = max(1, max_size)
+        self._idle_seconds = idle_seconds
+        self._entries: "OrderedDict[TenantKey, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._evictions = 0
+        # Empréstimos ativos e serviços removidos que aguardam o último deles,
+        # indexados por id(service)
+        self._leases: Dict[int, int] = {}
+        self._retired: Dict[int, Any] = {}
+
+    def get(self, spreadsheet_key: str, worksheet: str) -> Any:
+        service, evicted = self._checkout(spreadsheet_key, worksheet, lease=False)
+        for old in evicted:
+            old.shutdown()
+        return service
+
+    @contextmanager
+    def lease(self, spreadsheet_key: str, worksheet: str) -> Iterator[Any]:
+        """
+        Serviço do pool protegido contra ``shutdown()`` enquanto estiver em uso.
+
+        Um serviço removido do pool durante o empréstimo só é encerrado quando
+        o último empréstimo termina.
+        """
+        service, evicted = self._checkout(spreadsheet_key, worksheet, lease=True)
+        for old in evicted:
+            old.shutdown()
+        try:
+            yield service
+        finally:
+            self._release(service)
+
+    def _checkout(
+        self, spreadsheet_key: str, worksheet: str, lease: bool
+    ) -> Tuple[Any, List[Any]]:
+        key = (spreadsheet_key, worksheet)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            service = entry[0] if entry is not None else self._factory(spreadsheet_key, worksheet)
+            self._entries[key] = (service, now)
+            if lease:
+                self._leases[id(service)] = self._leases.get(id(service), 0) + 1
+            return service, self._evict(now)
+
+    def _release(self, service: Any) -> None:
+        with self._lock:
+            remaining = self._leases[id(service)] - 1
+            if remaining:
+                self._leases[id(service)] = remaining
+                return
+            del self._leases[id(service)]
+            retired = self._retired.pop(id(service), None)
+        if retired is not None:
+            retired.shutdown()
+
+    def clear(self) -> None:
+        with self._lock:
+            services = [service for service, _ in self._entries.values()]
+            services.extend(self._retired.values())
+            self._entries.clear()
+            self._retired.clear()
+        for service in services:
+            service.shutdown()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "evictions": self._evictions}
+
+    def _evict(self, now: float) -> List[Any]:
+        # Chamado com o lock adquirido; o mais antigo fica no início
+        evicted = []
+        while self._entries:
+            key, (service, last_used) = next(iter(self._entries.items()))
+            if len(self._entries) <= self._max_size and now - last_used < self._idle_seconds:
+                break
+            del self._entries[key]
+            if id(service) in self._leases:
+                self._retired[id(service)] = service
+            else:
+                evicted.append(service)
+            self._evictions += 1
+            logger.info("Removendo planilha %s/%s do pool", key[0], key[1])
+        return evicted
@@ -0,0 +1,106 @@
+"""
+Fila de escrita que agrupa appends de linha única.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Row = List[Any]
+RowsWriter = Callable[[str, List[Row]], None]
+
+
+class WriteCoalescer:
+    """
+    Agrupa linhas enviadas individualmente em uma única chamada append_rows.
+
+    As linhas ficam em memória até acumular ``max_rows`` linhas ou até a mais
+    antiga esperar ``max_delay_ms``, o que ocorrer primeiro. Cada chamador
+    recebe um Future resolvido quando o bloco da sua linha é gravado.
+    """
+
+    def __init__(self, writer: RowsWriter, max_rows: int, max_delay_ms: int):
+        self._writer = writer
+        self._max_rows = max(1, max_rows)
+        self._max_delay = max_delay_ms / 1000
+        self._pending: Dict[str, List[Tuple[Row, Future]]] = {}
+        self._count = 0
+        self._oldest = 0.0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._flushes = 0
+
+    def submit(self, sheet_name: str, row: Row) -> Future:
+        """Enfileira uma linha e retorna o Future da sua gravação."""
+        future: Future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Fila de escrita encerrada")
+            if self._count == 0:
+                self._oldest = time.monotonic()
+            self._pending.setdefault(sheet_name, []).append((row, future))
+            self._count += 1
+            self._ensure_thread()
+            self._cond.notify()
+        return future
+
+    def close(self) -> None:
+        """Grava as linhas pendentes e encerra a thread de envio."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {"pending": self._count, "flushes": self._flushes}
+
+    def _ensure_thread(self) -> None:
+        # Chamado com o lock adquirido
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="sheets-write-coalescer", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._count == 0 and not self._closed:
+                    self._cond.wait()
+                if self._count == 0:
+                    return
+
+                deadline = self._oldest + self._max_delay
+                while not self._closed and self._count < self._max_rows:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                batch = self._pending
+                self._pending = {}
+                self._count = 0
+                self._flushes += 1
+
+            self._flush(batch)
+
+    def _flush(self, batch: Dict[str, List[Tuple[Row, Future]]]) -> None:
+        for sheet_name, items in batch.items():
+            for start in range(0, len(items), self._max_rows):
+                chunk = items[start:start + self._max_rows]
+                try:
+                    self._writer(sheet_name, [row for row, _ in chunk])
+                except Exception as e:
+                    logger.error("Erro ao gravar bloco de %s linhas: %s", len(chunk), e)
+                    for _, future in chunk:
+                        future.set_exception(e)
+                else:
+                    for _, future in chunk:
+                        future.set_result(True)
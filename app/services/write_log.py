@@ -0,0 +1,176 @@
+"""
+Log de escrita local (write-ahead log) em SQLite.
+"""
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sheet_name TEXT NOT NULL,
+    row TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT
+);
+CREATE TABLE IF NOT EXISTS dead_letter (
+    id INTEGER PRIMARY KEY,
+    sheet_name TEXT NOT NULL,
+    row TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    attempts INTEGER NOT NULL,
+    last_error TEXT,
+    failed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+@dataclass(frozen=True)
+class LoggedRow:
+    """Linha aguardando envio ao Google."""
+    id: int
+    sheet_name: str
+    row: List[Any]
+    created_at: float
+    attempts: int
+
+
+class WriteAheadLog:
+    """
+    Fila durável de linhas a gravar na planilha.
+
+    Cada ``append`` só retorna depois do commit com ``synchronous=FULL``, ou
+    seja, após o fsync do arquivo. As linhas saem da fila apenas com ``ack``,
+    depois de gravadas no Google: a entrega é pelo menos uma vez, e uma queda
+    entre a gravação e o ``ack`` pode repetir a linha na planilha.
+    """
+
+    def __init__(self, path: str):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def append(self, sheet_name: str, rows: List[List[Any]]) -> List[int]:
+        """Grava as linhas de forma durável e retorna seus identificadores."""
+        now = time.time()
+        with self._lock, self._conn:
+            ids = []
+            for row in rows:
+                cursor = self._conn.execute(
+                    "INSERT INTO pending (sheet_name, row, created_at) VALUES (?, ?, ?)",
+                    (sheet_name, json.dumps(row, ensure_ascii=False), now)
+                )
+                ids.append(cursor.lastrowid)
+            return ids
+
+    def pending(self, limit: int = -1) -> List[LoggedRow]:
+        """Linhas pendentes, na ordem em que foram recebidas."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, sheet_name, row, created_at, attempts FROM pending "
+                "ORDER BY id LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [
+            LoggedRow(id, sheet_name, json.loads(row), created_at, attempts)
+            for id, sheet_name, row, created_at, attempts in rows
+        ]
+
+    def ack(self, ids: List[int]) -> None:
+        """Remove as linhas já gravadas no Google."""
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM pending WHERE id = ?", [(i,) for i in ids])
+            self._conn.execute(
+                "INSERT INTO meta VALUES ('drained', ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + ?",
+                (len(ids), len(ids))
+            )
+
+    def record_failure(self, ids: List[int], error: str) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE pending SET attempts = attempts + 1, last_error = ? WHERE id = ?",
+                [(error, i) for i in ids]
+            )
+
+    def dead_letter(self, ids: List[int], error: str) -> None:
+        """
+        Tira da fila linhas que o Google recusa de forma definitiva.
+
+        As linhas ficam na tabela ``dead_letter`` para inspeção e não bloqueiam
+        mais as linhas recebidas depois delas.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO dead_letter "
+                "SELECT id, sheet_name, row, created_at, attempts + 1, ?, ? "
+                "FROM pending WHERE id = ?",
+                [(error, now, i) for i in ids]
+            )
+            self._conn.executemany("DELETE FROM pending WHERE id = ?", [(i,) for i in ids])
+
+    def dead_letters(self, limit: int = -1) -> List[LoggedRow]:
+        """Linhas recusadas pelo Google, na ordem em que foram recebidas."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, sheet_name, row, created_at, attempts FROM dead_letter "
+                "ORDER BY id LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [
+            LoggedRow(id, sheet_name, json.loads(row), created_at, attempts)
+            for id, sheet_name, row, created_at, attempts in rows
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            depth, oldest, attempts = self._conn.execute(
+                "SELECT COUNT(*), MIN(created_at), MAX(attempts) FROM pending"
+            ).fetchone()
+            last_error = self._conn.execute(
+                "SELECT last_error FROM pending WHERE last_error IS NOT NULL "
+                "ORDER BY id LIMIT 1"
+            ).fetchone()
+            drained = self._conn.execute(
+                "SELECT value FROM meta WHERE key = 'drained'"
+            ).fetchone()
+            (dead,) = self._conn.execute("SELECT COUNT(*) FROM dead_letter").fetchone()
+        return {
+            "depth": depth,
+            "oldest_age_seconds": time.time() - oldest if oldest is not None else None,
+            "max_attempts": attempts or 0,
+            "last_error": last_error[0] if last_error else None,
+            "drained": int(drained[0]) if drained else 0,
+            "dead_letter": dead
+        }
+
+
+def first_sheet_batch(rows: List[LoggedRow]) -> List[LoggedRow]:
+    """Prefixo de ``rows`` destinado à mesma planilha, preservando a ordem."""
+    if not rows:
+        return []
+    sheet_name = rows[0].sheet_name
+    batch = []
+    for row in rows:
+        if row.sheet_name != sheet_name:
+            break
+        batch.append(row)
+    return batch
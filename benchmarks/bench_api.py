@@ -0,0 +1,95 @@
+"""
+Benchmarks das rotas principais contra o servidor local do Google.
+
+As rotas rodam com o serviço real (gspread, cache, cota) e o FakeSheetsServer
+no lugar do Google, para planilhas de tamanhos diferentes. O arquivo não segue
+o padrão test_*.py e por isso fica fora da suíte de testes; rode com:
+
+    make bench
+    pytest benchmarks/bench_api.py --benchmark-save=baseline
+    pytest benchmarks/bench_api.py --benchmark-compare=0001_baseline
+
+A latência simulada do Google vem de BENCH_GOOGLE_LATENCY (segundos, padrão 0,
+para medir apenas o custo da API).
+"""
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routes.sheets_routes import get_service
+from app.services.sheets_service import SHEET_COLUMNS, SheetsService
+from benchmarks.fake_sheets import FakeSheetsServer, sample_rows
+
+SHEET_SIZES = [100, 10_000]
+
+NEW_ROW = {"name": "Atleta Benchmark", "serie": 3, "initial_weight": "75kg", "date": "2024-01-15"}
+
+
+@pytest.fixture(scope="module", params=SHEET_SIZES, ids=lambda rows: f"{rows}-linhas")
+def api(request):
+    latency = float(os.environ.get("BENCH_GOOGLE_LATENCY", "0"))
+    with FakeSheetsServer(latency=latency) as server:
+        server.add_spreadsheet("Academia", [SHEET_COLUMNS, *sample_rows(request.param)])
+        service = SheetsService()
+        server.install(service)
+        app.dependency_overrides[get_service] = lambda: service
+        try:
+            yield TestClient(app), service, request.param
+        finally:
+            app.dependency_overrides.pop(get_service, None)
+            service.shutdown()
+
+
+def _get(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    return response
+
+
+def test_dados_cached(benchmark, api):
+    """GET /sheets/dados com o cache de registros aquecido."""
+    client, service, rows = api
+    _get(client, "/sheets/dados")
+    benchmark.extra_info["rows"] = rows
+    benchmark(_get, client, "/sheets/dados")
+
+
+def test_dados_uncached(benchmark, api):
+    """GET /sheets/dados buscando todas as linhas no Google a cada chamada."""
+    client, service, rows = api
+    benchmark.extra_info["rows"] = rows
+    benchmark.pedantic(
+        _get,
+        args=(client, "/sheets/dados"),
+        setup=lambda: service._records.invalidate(service.default_sheet_name),
+        rounds=20
+    )
+
+
+def test_dados_page(benchmark, api):
+    """GET /sheets/dados paginado, a partir do cache."""
+    client, service, rows = api
+    _get(client, "/sheets/dados")
+    benchmark.extra_info["rows"] = rows
+    benchmark(_get, client, "/sheets/dados?offset=0&limit=50")
+
+
+def test_adicionar(benchmark, api):
+    """POST /sheets/adicionar gravando direto no Google."""
+    client, service, rows = api
+
+    def add():
+        response = client.post("/sheets/adicionar", json=NEW_ROW)
+        assert response.status_code == 200
+
+    benchmark.extra_info["rows"] = rows
+    benchmark.pedantic(add, rounds=50)
+
+
+def test_status(benchmark, api):
+    """GET /sheets/status com a worksheet já aberta."""
+    client, service, rows = api
+    benchmark.extra_info["rows"] = rows
+    benchmark(_get, client, "/sheets/status")
@@ -0,0 +1,85 @@
+"""
+Benchmark de concorrência das rotas de leitura.
+
+Simula a latência do Google Sheets com um worksheet falso e mede a vazão de
+GET /sheets/dados com 1 e com N requisições simultâneas, além da latência de
+/health enquanto as leituras estão em andamento.
+
+Uso:
+    python -m benchmarks.bench_concurrency --latency 0.2 --concurrency 8
+"""
+import argparse
+import asyncio
+import time
+from unittest.mock import Mock
+
+import httpx
+
+from app.config import settings
+from app.main import app
+from app.services.rate_limiter import QuotaScheduler
+from app.services.sheets_service import sheets_service
+
+
+def _install_fake_sheet(latency: float) -> None:
+    def get_all_records():
+        time.sleep(latency)
+        return [{"name": "João Silva", "serie": 3, "initial_weight": "75kg", "date": "2024-01-15"}]
+
+    worksheet = Mock()
+    worksheet.get_all_records.side_effect = get_all_records
+    sheets_service.get_sheet = Mock(return_value=worksheet)
+    # Sem cache, cada requisição paga a latência do Google
+    sheets_service._records._ttl = 0
+    # Com a cota padrão (60 leituras/min) a vazão mediria só a espera pelos
+    # tokens; o benchmark mede a concorrência, não o limite do Google
+    sheets_service._quota = QuotaScheduler(read_per_minute=10 ** 6, write_per_minute=10 ** 6)
+
+
+async def _run(client: httpx.AsyncClient, total: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            response = await client.get("/sheets/dados")
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return total / (time.perf_counter() - start)
+
+
+async def _health_latency(client: httpx.AsyncClient) -> float:
+    start = time.perf_counter()
+    await client.get("/health")
+    return time.perf_counter() - start
+
+
+async def main(latency: float, concurrency: int, total: int) -> None:
+    _install_fake_sheet(latency)
+    settings.sheets_max_workers = concurrency
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        serial = await _run(client, total, 1)
+        concurrent = await _run(client, total, concurrency)
+
+        load = asyncio.ensure_future(_run(client, total, concurrency))
+        await asyncio.sleep(latency / 2)
+        health = await _health_latency(client)
+        await load
+
+    print(f"Latência simulada do Google: {latency * 1000:.0f} ms")
+    print(f"Concorrência 1:  {serial:8.1f} req/s")
+    print(f"Concorrência {concurrency}: {concurrent:8.1f} req/s ({concurrent / serial:.1f}x)")
+    print(f"/health durante carga: {health * 1000:.1f} ms")
+    sheets_service.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=32)
+    args = parser.parse_args()
+    asyncio.run(main(args.latency, args.concurrency, args.requests))
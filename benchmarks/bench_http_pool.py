@@ -0,0 +1,103 @@
+"""
+Benchmark do pool de conexões HTTP.
+
+Sobe um servidor HTTP/1.1 local com keep-alive que conta as conexões abertas
+(cada conexão equivale a um handshake TCP/TLS com o Google) e dispara
+requisições concorrentes com três configurações de sessão:
+
+- uma sessão nova por requisição (sem reaproveitamento);
+- a sessão padrão do requests (pool de 10 conexões);
+- a sessão configurada pelo serviço (pool de ``--pool-size`` conexões).
+
+Uso:
+    python -m benchmarks.bench_http_pool --concurrency 16 --requests 800
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from app.services.http_session import configure_session
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        body = b'{"values": []}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _start_server(latency: float) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    server.daemon_threads = True
+    server.request_queue_size = 128
+    server.connections = 0
+    server.latency = latency
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _run(server, get, total: int, concurrency: int):
+    server.connections = 0
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for response in executor.map(lambda _: get(url), range(total)):
+            response.raise_for_status()
+    elapsed = time.perf_counter() - start
+    return server.connections, total / elapsed
+
+
+def main(concurrency: int, total: int, pool_size: int, latency: float) -> None:
+    server = _start_server(latency)
+
+    def new_session_get(url):
+        with requests.Session() as session:
+            return session.get(url)
+
+    default_session = requests.Session()
+    pooled_session = configure_session(requests.Session(), pool_size)
+
+    scenarios = [
+        ("sessão por requisição", new_session_get),
+        ("requests padrão (pool 10)", default_session.get),
+        (f"sessão do serviço (pool {pool_size})", pooled_session.get),
+    ]
+
+    print(f"{total} requisições, concorrência {concurrency}, latência {latency * 1000:.0f} ms")
+    for label, get in scenarios:
+        connections, rate = _run(server, get, total, concurrency)
+        print(
+            f"{label:32s} conexões: {connections:5d} "
+            f"({connections / total:.3f} handshakes/req)  {rate:8.1f} req/s"
+        )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=800)
+    parser.add_argument("--pool-size", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.005)
+    args = parser.parse_args()
+    main(args.concurrency, args.requests, args.pool_size, args.latency)
@@ -0,0 +1,62 @@
+"""
+Benchmark de memória do armazenamento colunar de registros.
+
+Compara a memória alocada por N registros como lista de dicts (formato
+devolvido pelo gspread) e como ``RecordSet``, e o tempo para montar uma página.
+
+Uso:
+    python -m benchmarks.bench_record_set --rows 100000
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from app.services.record_set import RecordSet
+
+_NAMES = ["João Silva", "Maria Santos", "Ana Lima", "Pedro Costa", "Carla Souza"]
+
+
+def _rows(total: int):
+    start = date(2024, 1, 1)
+    for i in range(total):
+        # Strings novas a cada linha, como no JSON decodificado da API
+        yield {
+            "name": "".join(_NAMES[i % len(_NAMES)]),
+            "serie": i % 10 + 1,
+            "initial_weight": f"{50 + i % 60}.5kg",
+            "date": (start + timedelta(days=i % 365)).isoformat()
+        }
+
+
+def _measure(build):
+    gc.collect()
+    tracemalloc.start()
+    value = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, current
+
+
+def main(rows: int, page: int) -> None:
+    as_dicts, dict_bytes = _measure(lambda: list(_rows(rows)))
+    del as_dicts
+    record_set, set_bytes = _measure(lambda: RecordSet(_rows(rows)))
+
+    start = time.perf_counter()
+    record_set[rows // 2:rows // 2 + page]
+    page_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{rows} registros")
+    print(f"lista de dicts: {dict_bytes / 2**20:8.1f} MiB")
+    print(f"RecordSet:      {set_bytes / 2**20:8.1f} MiB ({dict_bytes / set_bytes:.1f}x menor)")
+    print(f"página de {page} registros: {page_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--page", type=int, default=1000)
+    args = parser.parse_args()
+    main(args.rows, args.page)
@@ -0,0 +1,73 @@
+"""
+Microbenchmark da serialização da listagem de registros.
+
+Compara o caminho anterior de GET /sheets/dados (validação e serialização de
+cada linha com ``List[SheetRecord]`` seguidas de ``json.dumps``, como o FastAPI
+faz com ``response_model``) com o orjson sem validação e com o JSON memorizado
+no cache.
+
+Uso:
+    python -m benchmarks.bench_serialization --rows 10000
+"""
+import argparse
+import json
+import time
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app.models.sheet_models import SheetRecord
+from app.services.record_cache import RecordCache
+from app.services.serialization import dumps
+
+
+def _records(total: int):
+    return [
+        {
+            "name": f"Atleta {i % 500}",
+            "serie": i % 10 + 1,
+            "initial_weight": f"{50 + i % 60}kg",
+            "date": f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}"
+        }
+        for i in range(total)
+    ]
+
+
+def _timeit(func, repeat: int) -> float:
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main(rows: int, repeat: int) -> None:
+    records = _records(rows)
+    adapter = TypeAdapter(List[SheetRecord])
+    cache = RecordCache(lambda key: records, ttl_seconds=3600)
+
+    def pydantic_path():
+        validated = adapter.validate_python(records)
+        content = adapter.dump_python(validated, mode="json")
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    scenarios = [
+        ("response_model (pydantic)", pydantic_path),
+        ("orjson sem validação", lambda: dumps(records)),
+        ("JSON memorizado no cache", lambda: cache.encoded("Academia")),
+    ]
+
+    print(f"{rows} registros, média de {repeat} execuções")
+    baseline = None
+    for label, func in scenarios:
+        elapsed = _timeit(func, repeat)
+        baseline = baseline or elapsed
+        print(f"{label:28s} {elapsed:9.3f} ms  ({baseline / elapsed:7.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    main(args.rows, args.repeat)
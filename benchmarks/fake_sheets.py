@@ -0,0 +1,423 @@
+"""
+Servidor local que imita as APIs Sheets v4 e Drive v3 usadas pelo gspread.
+
+Guarda as planilhas em memória e permite simular a latência do Google, a cota
+por minuto e respostas 429/503 aleatórias. O cliente gspread continua fazendo
+requisições HTTP reais (pool de conexões, serialização, tratamento de erros);
+apenas os hosts do Google são redirecionados para o servidor local.
+
+Uso em benchmarks e testes:
+
+    with FakeSheetsServer(latency=0.05) as server:
+        server.add_spreadsheet("Academia", [SHEET_COLUMNS, *linhas])
+        server.install(sheets_service)
+        ...
+
+Uso avulso (apenas o servidor, para inspeção manual):
+    python -m benchmarks.fake_sheets --rows 1000 --port 8099
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import gspread
+import requests
+
+from app.services.http_session import KeepAliveAdapter
+
+GOOGLE_HOSTS = ("https://sheets.googleapis.com", "https://www.googleapis.com")
+
+_A1 = re.compile(r"^([A-Z]*)(\d*)(?::([A-Z]*)(\d*))?$")
+_DRIVE_FILE = re.compile(r"^/drive/v3/files/([^/]+)$")
+_SPREADSHEET = re.compile(r"^/v4/spreadsheets/([^/]+)$")
+_BATCH_GET = re.compile(r"^/v4/spreadsheets/([^/]+)/values:batchGet$")
+_APPEND = re.compile(r"^/v4/spreadsheets/([^/]+)/values/(.+):append$")
+_VALUES = re.compile(r"^/v4/spreadsheets/([^/]+)/values/(.+)$")
+_TITLE_QUERY = re.compile(r'name = "((?:[^"\\]|\\.)*)"')
+
+
+def sample_rows(count: int, seed: int = 0) -> List[List[Any]]:
+    """Linhas sintéticas no formato da planilha (sem o cabeçalho)."""
+    rng = random.Random(seed)
+    return [
+        [
+            f"Atleta {rng.randrange(max(1, count // 20))}",
+            rng.randint(1, 10),
+            f"{rng.randint(40, 120)}kg",
+            f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        ]
+        for _ in range(count)
+    ]
+
+
+def _column_index(letters: str) -> int:
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord("A") + 1
+    return index
+
+
+def _trim(values: List[List[Any]]) -> List[List[Any]]:
+    """Remove células e linhas vazias do fim do intervalo, como a API do Sheets."""
+    rows = []
+    for row in values:
+        end = len(row)
+        while end and row[end - 1] in ("", None):
+            end -= 1
+        rows.append(list(row[:end]))
+    while rows and not rows[-1]:
+        rows.pop()
+    return rows
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+class _Worksheet:
+    def __init__(self, sheet_id: int, title: str, values: List[List[Any]]):
+        self.id = sheet_id
+        self.title = title
+        self.values = values
+
+    def metadata(self, index: int) -> Dict[str, Any]:
+        return {
+            "properties": {
+                "sheetId": self.id,
+                "title": self.title,
+                "index": index,
+                "sheetType": "GRID",
+                "gridProperties": {
+                    "rowCount": max(1000, len(self.values)),
+                    "columnCount": 26
+                }
+            }
+        }
+
+
+class _Spreadsheet:
+    def __init__(self, spreadsheet_id: str, title: str):
+        self.id = spreadsheet_id
+        self.title = title
+        self.worksheets: List[_Worksheet] = []
+        self.created = self.modified = _now()
+
+    def worksheet(self, title: str) -> _Worksheet:
+        for worksheet in self.worksheets:
+            if worksheet.title == title:
+                return worksheet
+        raise KeyError(title)
+
+    def drive_file(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.title,
+            "createdTime": self.created,
+            "modifiedTime": self.modified
+        }
+
+
+class _GoogleError(Exception):
+    def __init__(self, code: int, status: str, message: str):
+        super().__init__(message)
+        self.code = code
+        self.status = status
+
+
+class FakeSheetsServer:
+    """
+    Planilhas em memória servidas por HTTP no formato das APIs do Google.
+
+    - ``latency``: atraso fixo, em segundos, de cada resposta;
+    - ``quota_per_minute``: requisições aceitas por janela de 60 s antes de 429;
+    - ``error_rate``: fração das requisições respondidas com ``error_status``.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        quota_per_minute: Optional[int] = None,
+        error_rate: float = 0.0,
+        error_status: int = 429,
+        seed: int = 0,
+        port: int = 0
+    ):
+        self.latency = latency
+        self.quota_per_minute = quota_per_minute
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._spreadsheets: Dict[str, _Spreadsheet] = {}
+        self._window: Deque[float] = deque()
+        self._requests = 0
+        self._rejected = 0
+        self._fail_next: Deque[int] = deque()
+        self._next_id = 1
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self._server.daemon_threads = True
+        self._server.fake = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeSheetsServer":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="fake-sheets", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeSheetsServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def add_spreadsheet(
+        self, title: str, values: List[List[Any]], worksheet: str = "Página1"
+    ) -> str:
+        """Cria uma planilha com uma worksheet e retorna sua chave."""
+        with self._lock:
+            spreadsheet_id = f"fake-{self._next_id}"
+            self._next_id += 1
+            spreadsheet = _Spreadsheet(spreadsheet_id, title)
+            spreadsheet.worksheets.append(_Worksheet(0, worksheet, [list(v) for v in values]))
+            self._spreadsheets[spreadsheet_id] = spreadsheet
+            return spreadsheet_id
+
+    def values(self, spreadsheet_id: str, worksheet: str = "Página1") -> List[List[Any]]:
+        with self._lock:
+            rows = self._spreadsheets[spreadsheet_id].worksheet(worksheet).values
+            return [list(row) for row in rows]
+
+    def fail_next(self, count: int, status: int = 429) -> None:
+        """Responde às próximas ``count`` requisições com ``status``."""
+        with self._lock:
+            self._fail_next.extend([status] * count)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"requests": self._requests, "rejected": self._rejected}
+
+    def session(self, pool_size: int = 16) -> requests.Session:
+        """Sessão que envia as requisições dos hosts do Google para este servidor."""
+        session = requests.Session()
+        adapter = _RedirectAdapter(self.url, pool_size)
+        for host in GOOGLE_HOSTS:
+            session.mount(host, adapter)
+        return session
+
+    def client(self, pool_size: int = 16) -> gspread.Client:
+        return gspread.Client(None, session=self.session(pool_size))
+
+    def install(self, service: Any, pool_size: int = 16) -> None:
+        """Faz ``service`` usar este servidor em vez do Google, sem credenciais."""
+        service._client = self.client(pool_size)
+
+    # Atendimento das requisições (executado nas threads do servidor HTTP)
+
+    def _admit(self) -> None:
+        time.sleep(self.latency)
+        with self._lock:
+            self._requests += 1
+            if self._fail_next:
+                self._rejected += 1
+                raise _GoogleError(self._fail_next.popleft(), "UNAVAILABLE", "Erro simulado")
+            if self.error_rate and self._random.random() < self.error_rate:
+                self._rejected += 1
+                raise _GoogleError(self.error_status, "UNAVAILABLE", "Erro simulado")
+            if self.quota_per_minute is not None:
+                now = time.monotonic()
+                while self._window and self._window[0] <= now - 60:
+                    self._window.popleft()
+                if len(self._window) >= self.quota_per_minute:
+                    self._rejected += 1
+                    raise _GoogleError(
+                        429, "RESOURCE_EXHAUSTED",
+                        "Quota exceeded for quota metric 'Read requests'"
+                    )
+                self._window.append(now)
+
+    def _spreadsheet(self, spreadsheet_id: str) -> _Spreadsheet:
+        try:
+            return self._spreadsheets[spreadsheet_id]
+        except KeyError:
+            raise _GoogleError(404, "NOT_FOUND", "Requested entity was not found.")
+
+    def _resolve(self, spreadsheet: _Spreadsheet, range_name: str) -> Tuple[_Worksheet, str]:
+        title, _, a1 = range_name.rpartition("!")
+        if not title:
+            title, a1 = a1, ""
+        if title.startswith("'") and title.endswith("'"):
+            title = title[1:-1].replace("''", "'")
+        try:
+            return spreadsheet.worksheet(title), a1
+        except KeyError:
+            raise _GoogleError(400, "INVALID_ARGUMENT", f"Unable to parse range: {range_name}")
+
+    @staticmethod
+    def _slice(values: List[List[Any]], a1: str) -> List[List[Any]]:
+        match = _A1.match(a1.upper())
+        if not match:
+            raise _GoogleError(400, "INVALID_ARGUMENT", f"Unable to parse range: {a1}")
+        first_col, first_row, last_col, last_row = match.groups()
+        single = ":" not in a1
+        start_row = int(first_row) if first_row else 1
+        end_row = int(last_row) if last_row else (start_row if single and first_row else None)
+        start_col = _column_index(first_col) if first_col else 1
+        end_col = _column_index(last_col) if last_col else (start_col if single and first_col else None)
+        rows = values[start_row - 1:end_row]
+        return _trim([row[start_col - 1:end_col] for row in rows])
+
+    def handle(self, method: str, path: str, query: Dict[str, List[str]], body: Any) -> Any:
+        self._admit()
+        with self._lock:
+            if method == "GET" and path == "/drive/v3/files":
+                title = _TITLE_QUERY.search(query.get("q", [""])[0])
+                files = [
+                    s.drive_file() for s in self._spreadsheets.values()
+                    if title is None or s.title == title.group(1)
+                ]
+                return {"kind": "drive#fileList", "files": files}
+
+            match = _DRIVE_FILE.match(path)
+            if method == "GET" and match:
+                return self._spreadsheet(match.group(1)).drive_file()
+
+            match = _SPREADSHEET.match(path)
+            if method == "GET" and match:
+                spreadsheet = self._spreadsheet(match.group(1))
+                return {
+                    "spreadsheetId": spreadsheet.id,
+                    "properties": {"title": spreadsheet.title, "locale": "pt_BR"},
+                    "sheets": [w.metadata(i) for i, w in enumerate(spreadsheet.worksheets)]
+                }
+
+            match = _BATCH_GET.match(path)
+            if method == "GET" and match:
+                spreadsheet = self._spreadsheet(match.group(1))
+                value_ranges = []
+                for range_name in query.get("ranges", []):
+                    worksheet, a1 = self._resolve(spreadsheet, range_name)
+                    value_ranges.append({
+                        "range": range_name,
+                        "majorDimension": "ROWS",
+                        "values": self._slice(worksheet.values, a1)
+                    })
+                return {"spreadsheetId": spreadsheet.id, "valueRanges": value_ranges}
+
+            match = _APPEND.match(path)
+            if method == "POST" and match:
+                spreadsheet = self._spreadsheet(match.group(1))
+                worksheet, _ = self._resolve(spreadsheet, unquote(match.group(2)))
+                rows = body.get("values", [])
+                first = len(worksheet.values) + 1
+                worksheet.values.extend(list(row) for row in rows)
+                spreadsheet.modified = _now()
+                width = max((len(row) for row in rows), default=1)
+                last_col = gspread.utils.rowcol_to_a1(1, width)[:-1]
+                return {
+                    "spreadsheetId": spreadsheet.id,
+                    "updates": {
+                        "updatedRange": f"'{worksheet.title}'!A{first}:{last_col}{len(worksheet.values)}",
+                        "updatedRows": len(rows)
+                    }
+                }
+
+            match = _VALUES.match(path)
+            if method == "GET" and match:
+                spreadsheet = self._spreadsheet(match.group(1))
+                range_name = unquote(match.group(2))
+                worksheet, a1 = self._resolve(spreadsheet, range_name)
+                values = self._slice(worksheet.values, a1) if a1 else _trim(worksheet.values)
+                response = {"range": range_name, "majorDimension": "ROWS"}
+                if values:
+                    response["values"] = values
+                return response
+
+        raise _GoogleError(404, "NOT_FOUND", f"Rota não simulada: {method} {path}")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._dispatch()
+
+    def do_POST(self):
+        self._dispatch()
+
+    def _dispatch(self):
+        parts = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else {}
+        try:
+            status = 200
+            payload = self.server.fake.handle(
+                self.command, parts.path, parse_qs(parts.query), body
+            )
+        except _GoogleError as e:
+            status = e.code
+            payload = {"error": {"code": e.code, "message": str(e), "status": e.status}}
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _RedirectAdapter(KeepAliveAdapter):
+    """Adapter do serviço que troca o host do Google pelo servidor local."""
+
+    def __init__(self, base_url: str, pool_size: int):
+        super().__init__(pool_size)
+        self._base_url = base_url
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:
+        for host in GOOGLE_HOSTS:
+            if request.url.startswith(host):
+                request.url = self._base_url + request.url[len(host):]
+                break
+        return super().send(request, **kwargs)
+
+
+if __name__ == "__main__":
+    from app.services.sheets_service import SHEET_COLUMNS
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakeSheetsServer(latency=args.latency, port=args.port)
+    key = server.add_spreadsheet("Academia", [SHEET_COLUMNS, *sample_rows(args.rows)])
+    print(f"Planilha 'Academia' ({key}) com {args.rows} linhas em {server.url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,132 @@
+"""
+Teste de carga de /sheets/dados, /sheets/adicionar e /sheets/status.
+
+Para cada tamanho de planilha e nível de concorrência, dispara ``--requests``
+requisições por rota e mostra a vazão e os percentis de latência.
+
+Sem ``--url``, a API roda no mesmo processo (via ASGI, sem uvicorn) com o
+FakeSheetsServer no lugar do Google, simulando ``--latency`` por chamada. Com
+``--url``, as requisições vão para uma instância já em execução, e os tamanhos
+de planilha são os da planilha configurada nela.
+
+Uso:
+    python -m benchmarks.load_test --rows 100,10000 --concurrency 1,8,32
+    python -m benchmarks.load_test --url http://localhost:8000 --concurrency 1,16
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from contextlib import ExitStack
+from typing import Dict, List, Optional
+
+import httpx
+
+from app.config import settings
+from app.main import app
+from app.routes.sheets_routes import get_service
+from app.services.sheets_service import SHEET_COLUMNS, SheetsService
+from benchmarks.fake_sheets import FakeSheetsServer, sample_rows
+
+NEW_ROW = {"name": "Atleta Carga", "serie": 3, "initial_weight": "75kg", "date": "2024-01-15"}
+
+ROUTES = {
+    "dados": ("GET", "/sheets/dados", None),
+    "adicionar": ("POST", "/sheets/adicionar", NEW_ROW),
+    "status": ("GET", "/sheets/status", None),
+}
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def _load(
+    client: httpx.AsyncClient, route: str, total: int, concurrency: int
+) -> Dict[str, float]:
+    method, url, body = ROUTES[route]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.request(method, url, json=body)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+    return {
+        "rps": total / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p95": _percentile(latencies, 95) * 1000,
+        "p99": _percentile(latencies, 99) * 1000,
+        "errors": errors
+    }
+
+
+def _print_row(rows: Optional[int], route: str, concurrency: int, result: Dict[str, float]) -> None:
+    size = f"{rows:>7}" if rows is not None else "      -"
+    print(
+        f"{size} {route:<10} {concurrency:>5} {result['rps']:>9.1f} "
+        f"{result['p50']:>8.1f} {result['p95']:>8.1f} {result['p99']:>8.1f} {result['errors']:>6}",
+        flush=True
+    )
+
+
+async def _run_levels(
+    client: httpx.AsyncClient, rows: Optional[int], levels: List[int], total: int
+) -> None:
+    # Aquece o cache e as conexões antes de medir
+    await client.get("/sheets/dados")
+    for route in ROUTES:
+        for concurrency in levels:
+            _print_row(rows, route, concurrency, await _load(client, route, total, concurrency))
+
+
+async def main(args: argparse.Namespace) -> None:
+    levels = [int(level) for level in args.concurrency.split(",")]
+    print(f"{'linhas':>7} {'rota':<10} {'conc.':>5} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'erros':>6}")
+
+    if args.url:
+        limits = httpx.Limits(max_connections=max(levels))
+        async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+            await _run_levels(client, None, levels, args.requests)
+        return
+
+    # A cota simulada fica no FakeSheetsServer (--quota); a do serviço sairia
+    # do mesmo limite de 60/min e mediria apenas a espera pelos tokens
+    settings.rate_limit_per_minute = settings.read_rate_limit_per_minute = 10 ** 6
+    for rows in (int(size) for size in args.rows.split(",")):
+        with ExitStack() as stack:
+            server = stack.enter_context(FakeSheetsServer(
+                latency=args.latency, quota_per_minute=args.quota
+            ))
+            server.add_spreadsheet("Academia", [SHEET_COLUMNS, *sample_rows(rows)])
+            service = SheetsService()
+            server.install(service, pool_size=max(levels))
+            stack.callback(service.shutdown)
+            app.dependency_overrides[get_service] = lambda: service
+            stack.callback(app.dependency_overrides.pop, get_service, None)
+
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://carga") as client:
+                await _run_levels(client, rows, levels, args.requests)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="API já em execução (padrão: no mesmo processo)")
+    parser.add_argument("--rows", default="100,10000", help="tamanhos de planilha simulados")
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--requests", type=int, default=200, help="requisições por rota e nível")
+    parser.add_argument("--latency", type=float, default=0.05, help="latência simulada do Google (s)")
+    parser.add_argument("--quota", type=int, help="requisições por minuto antes de 429 no Google simulado")
+    asyncio.run(main(parser.parse_args()))
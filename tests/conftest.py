@@ -1,12 +1,21 @@
 """
 Configurações e fixtures para os testes.
 """
+from contextlib import nullcontext
+
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 
 from app.main import app
 from app.models.sheet_models import SheetInput
+from app.services.idempotency import IdempotencyStore
+from app.services.serialization import dumps, etag
+
+
+def _encode(records):
+    body = dumps(records)
+    return body, etag(body)
 
 
 @pytest.fixture
@@ -66,8 +75,47 @@ def mock_worksheet():
 @pytest.fixture
 def mock_sheets_service(mock_worksheet):
     """Mock do serviço de sheets."""
-    with patch('app.services.sheets_service.sheets_service') as mock_service:
+    with patch('app.routes.sheets_routes.sheets_service') as mock_service:
         mock_service.get_sheet.return_value = mock_worksheet
         mock_service.get_all_records.return_value = mock_worksheet.get_all_records()
         mock_service.append_row.return_value = True
+        mock_service.append_rows.side_effect = lambda rows, *a, **k: [None] * len(rows)
+        mock_service.get_all_records_json.side_effect = (
+            lambda *a, **k: _encode(mock_service.get_all_records())
+        )
+        mock_service.get_records_page.side_effect = (
+            lambda offset, limit, *a, **k:
+            mock_service.get_all_records()[offset:offset + limit]
+        )
+        mock_service.query_records.side_effect = (
+            lambda **filters: mock_service.get_all_records()
+        )
+        mock_service.iter_records.side_effect = lambda chunk_size, *a, **k: (
+            chunk for chunk in [mock_service.get_all_records()] if chunk
+        )
+        mock_service.cache_stats.return_value = {}
+        mock_service.quota_stats.return_value = {}
+        mock_service.replica_stats.return_value = None
+        mock_service.tenant_stats.return_value = None
+        mock_service.tenant.return_value = mock_service
+        mock_service.tenant_lease.side_effect = lambda *a: nullcontext(mock_service)
+        mock_service.enqueue_row.return_value = None
+        mock_service.write_log_stats.return_value = None
+        mock_service.run_idempotent = AsyncMock(
+            side_effect=IdempotencyStore(ttl_seconds=3600).run
+        )
+        
+        # As versões assíncronas delegam para os mocks síncronos
+        for name in (
+            "get_sheet", "get_all_records", "get_all_records_json",
+            "get_records_page", "query_records",
+            "get_ranges", "get_stats", "append_row", "append_rows",
+            "enqueue_row", "replica_stats", "write_log_stats"
+        ):
+            sync_method = getattr(mock_service, name)
+            setattr(
+                mock_service,
+                f"{name}_async",
+                AsyncMock(side_effect=lambda *a, _m=sync_method, **k: _m(*a, **k))
+            )
         yield mock_service 
\ No newline at end of file
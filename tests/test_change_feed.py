@@ -0,0 +1,98 @@
+"""
+Testes para o feed de linhas novas.
+"""
+import asyncio
+import threading
+
+import pytest
+
+from app.services.change_feed import ChangeFeed
+
+
+def _row(name):
+    return {"name": name, "serie": 1, "initial_weight": "50kg", "date": "2024-01-01"}
+
+
+class _FakePoller:
+    """Planilha remota simulada: a linha 1 é o cabeçalho."""
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self.calls = 0
+        self.polled = threading.Event()
+
+    def __call__(self, next_row):
+        self.calls += 1
+        self.polled.set()
+        if next_row is None:
+            return len(self.rows) + 2, []
+        return next_row, self.rows[next_row - 2:]
+
+
+class TestChangeFeed:
+    """Testes para o ChangeFeed."""
+
+    @pytest.mark.asyncio
+    async def test_fan_out_to_all_subscribers(self):
+        """Testa que todos os assinantes recebem as linhas publicadas."""
+        feed = ChangeFeed(_FakePoller([]), interval=60)
+        first, second = feed.subscribe(), feed.subscribe()
+
+        await asyncio.to_thread(feed.publish, 2, [_row("Ana")])
+
+        for subscription in (first, second):
+            event = await asyncio.wait_for(subscription.get(), 1)
+            assert event.rows == [_row("Ana")]
+            assert event.first_row == 2
+        feed.close()
+
+    @pytest.mark.asyncio
+    async def test_single_poll_for_many_subscribers(self):
+        """Testa que a consulta remota é única e não reenvia linhas locais."""
+        poller = _FakePoller([_row("Ana")])
+        feed = ChangeFeed(poller, interval=0.05)
+        subscriptions = [feed.subscribe() for _ in range(5)]
+        await asyncio.to_thread(poller.polled.wait, 1)
+
+        # Gravação local seguida da mesma linha vista pela consulta remota
+        poller.rows.append(_row("Pedro"))
+        feed.publish(3, [_row("Pedro")])
+        poller.rows.append(_row("Maria"))
+
+        for subscription in subscriptions:
+            local = await asyncio.wait_for(subscription.get(), 1)
+            remote = await asyncio.wait_for(subscription.get(), 1)
+            assert local.rows == [_row("Pedro")]
+            assert remote.rows == [_row("Maria")]
+            assert remote.first_row == 4
+        assert feed.stats()["polls"] == poller.calls
+        feed.close()
+
+    @pytest.mark.asyncio
+    async def test_replay_after_last_event_id(self):
+        """Testa o reenvio dos eventos perdidos na reconexão."""
+        feed = ChangeFeed(_FakePoller([]), interval=60)
+        feed.publish(2, [_row("Ana")])
+        feed.publish(3, [_row("Pedro")])
+
+        subscription = feed.subscribe(last_event_id=1)
+
+        event = await asyncio.wait_for(subscription.get(), 1)
+        assert event.id == 2
+        assert event.rows == [_row("Pedro")]
+        feed.close()
+
+    @pytest.mark.asyncio
+    async def test_slow_subscriber_is_disconnected(self):
+        """Testa que um assinante que não consome é desconectado."""
+        feed = ChangeFeed(_FakePoller([]), interval=60, queue_size=2)
+        subscription = feed.subscribe()
+
+        for row in range(3):
+            feed.publish(row + 2, [_row(f"Atleta {row}")])
+        await asyncio.sleep(0)
+
+        received = [await subscription.get() for _ in range(3)]
+        assert received[-1] is None
+        assert subscription.overflowed
+        feed.close()
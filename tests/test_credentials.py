@@ -0,0 +1,118 @@
+"""
+Testes para a renovação de credenciais com um endpoint de token local.
+"""
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import rsa
+from google.oauth2 import service_account
+
+from app.services.credentials import CredentialsManager
+
+
+class _TokenHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        with self.server.lock:
+            self.server.issued += 1
+            token = f"token-{self.server.issued}"
+        body = json.dumps({
+            "access_token": token,
+            "expires_in": self.server.expires_in,
+            "token_type": "Bearer"
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def private_key_pem():
+    _, private_key = rsa.newkeys(1024)
+    return private_key.save_pkcs1().decode()
+
+
+@pytest.fixture
+def token_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _TokenHandler)
+    server.daemon_threads = True
+    server.issued = 0
+    server.expires_in = 3600
+    server.lock = threading.Lock()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def credentials(token_server, private_key_pem):
+    info = {
+        "type": "service_account",
+        "project_id": "teste",
+        "private_key_id": "1",
+        "private_key": private_key_pem,
+        "client_email": "conta@teste.iam.gserviceaccount.com",
+        "client_id": "1",
+        "token_uri": f"http://127.0.0.1:{token_server.server_address[1]}/token"
+    }
+    return service_account.Credentials.from_service_account_info(
+        info, scopes=["https://www.googleapis.com/auth/spreadsheets"]
+    )
+
+
+class TestCredentialsManager:
+    """Testes para o CredentialsManager."""
+
+    def test_start_fetches_first_token(self, credentials, token_server):
+        """Testa que start obtém o token no endpoint configurado."""
+        manager = CredentialsManager(credentials, refresh_margin_seconds=300)
+
+        manager.start()
+        try:
+            assert credentials.token == "token-1"
+            assert credentials.valid
+            assert manager.seconds_until_refresh() > 3000
+        finally:
+            manager.stop()
+
+    def test_refreshes_in_background_before_expiry(self, credentials, token_server):
+        """Testa que o token é renovado antes de expirar, fora das requisições."""
+        # Com a margem quase igual à validade, a renovação ocorre em ~1 s
+        manager = CredentialsManager(credentials, refresh_margin_seconds=3599)
+
+        manager.start()
+        try:
+            deadline = time.monotonic() + 5
+            while credentials.token == "token-1" and time.monotonic() < deadline:
+                time.sleep(0.05)
+
+            assert credentials.token == "token-2"
+            # O token anterior ainda era válido: nenhuma requisição precisou renovar
+            assert credentials.valid
+            assert manager.stats()["refreshes"] == 2
+        finally:
+            manager.stop()
+
+    def test_failed_refresh_keeps_current_token(self, credentials, token_server):
+        """Testa que uma falha na renovação mantém o token atual."""
+        manager = CredentialsManager(credentials, refresh_margin_seconds=300)
+        manager.start()
+        manager.stop()
+        token_server.server_close()
+
+        with pytest.raises(Exception):
+            manager.refresh()
+
+        assert credentials.token == "token-1"
+        assert credentials.expiry > datetime.utcnow() + timedelta(minutes=30)
@@ -0,0 +1,164 @@
+"""
+Testes do serviço contra o servidor local que imita as APIs do Google.
+"""
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+
+from app.main import app
+from app.routes.sheets_routes import get_service
+from app.services.rate_limiter import QuotaExceededError
+from app.services.sheets_service import SHEET_COLUMNS, SheetsService
+from benchmarks.fake_sheets import FakeSheetsServer, sample_rows
+
+
+@pytest.fixture
+def server():
+    with FakeSheetsServer() as server:
+        server.key = server.add_spreadsheet("Academia", [SHEET_COLUMNS, *sample_rows(20)])
+        yield server
+
+
+@pytest.fixture
+def service(server):
+    with patch("app.services.sheets_service.settings.sheet_name", "Academia"), \
+            patch("app.services.sheets_service.settings.google_backoff_base_seconds", 0.01):
+        service = SheetsService()
+        server.install(service)
+        yield service
+        service.shutdown()
+
+
+@pytest.fixture
+def gap_api(server):
+    """API sobre uma planilha de 12 linhas com a linha 6 (5ª de dados) em branco."""
+    rows = sample_rows(12)
+    rows[4] = [""] * len(SHEET_COLUMNS)
+    server.add_spreadsheet("Lacunas", [SHEET_COLUMNS, *rows])
+    with patch("app.services.sheets_service.settings.sheet_name", "Lacunas"):
+        service = SheetsService()
+        server.install(service)
+        app.dependency_overrides[get_service] = lambda: service
+        try:
+            yield TestClient(app), service
+        finally:
+            app.dependency_overrides.pop(get_service, None)
+            service.shutdown()
+
+
+@pytest.fixture
+def api(service):
+    """Cliente da API usando o serviço ligado ao FakeSheetsServer."""
+    app.dependency_overrides[get_service] = lambda: service
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.pop(get_service, None)
+
+
+class TestFakeSheetsServer:
+    """Testes de ponta a ponta do gspread contra o FakeSheetsServer."""
+
+    def test_read_and_append(self, service, server, sample_sheet_input):
+        """Testa leitura, gravação e leitura por intervalos via HTTP."""
+        assert len(service.get_all_records()) == 20
+
+        assert service.append_row(sample_sheet_input)
+
+        assert server.values(server.key)[-1][0] == sample_sheet_input.name
+        assert service.get_ranges(["A1:B1"]) == {"A1:B1": [["name", "serie"]]}
+
+    def test_retries_after_429(self, service, server):
+        """Testa que respostas 429 são repetidas pelo serviço."""
+        server.fail_next(2, status=429)
+
+        assert len(service.get_all_records()) == 20
+        assert service.quota_stats()["retries"] == 2
+        assert server.stats()["rejected"] == 2
+
+    def test_quota_exhausted(self, server, service):
+        """Testa o erro de cota quando o Google recusa até o fim do prazo."""
+        server.quota_per_minute = 1
+
+        with patch("app.services.sheets_service.settings.google_deadline_seconds", 0.2):
+            with pytest.raises(QuotaExceededError):
+                service.get_all_records()
+
+    def test_page_past_last_row(self, api):
+        """Testa que uma página além da última linha volta vazia, sem registro em branco."""
+        response = api.get("/sheets/dados?limit=5&offset=100")
+
+        assert response.status_code == 200
+        assert response.json() == []
+
+    def test_last_partial_page(self, api):
+        """Testa que a última página traz apenas as linhas existentes."""
+        response = api.get("/sheets/dados?limit=5&offset=18")
+
+        assert response.status_code == 200
+        assert [record["name"] for record in response.json()] == [
+            record["name"] for record in api.get("/sheets/dados").json()[18:]
+        ]
+
+    @pytest.mark.parametrize("chunk_rows", [5, 7])
+    def test_export_in_chunks(self, api, chunk_rows):
+        """Testa que a exportação em blocos traz exatamente as linhas da planilha."""
+        with patch("app.routes.sheets_routes.settings.export_chunk_rows", chunk_rows):
+            ndjson = api.get("/sheets/dados/export?format=ndjson")
+            csv_response = api.get("/sheets/dados/export?format=csv")
+
+        assert ndjson.status_code == 200
+        assert len(ndjson.text.splitlines()) == 20
+        # Cabeçalho mais as 20 linhas
+        assert len(csv_response.text.splitlines()) == 21
+
+    def test_poll_new_rows(self, service, server, sample_sheet_input):
+        """Testa que a consulta do feed não publica linhas em branco nem pula linhas novas."""
+        next_row, rows = service._poll_new_rows(None)
+        assert (next_row, rows) == (22, [])
+        assert service._poll_new_rows(next_row) == (22, [])
+
+        # Linha gravada por outro processo
+        other = SheetsService()
+        server.install(other)
+        other.append_row(sample_sheet_input, "Academia")
+        other.shutdown()
+
+        first_row, rows = service._poll_new_rows(22)
+        assert first_row == 22
+        assert [record["name"] for record in rows] == [sample_sheet_input.name]
+
+    def test_pages_across_blank_row(self, gap_api):
+        """Testa que uma linha em branco no meio da planilha não encerra a paginação."""
+        client, service = gap_api
+        pages, offset = [], 0
+        while offset is not None:
+            response = client.get(f"/sheets/dados?limit=5&offset={offset}")
+            assert response.status_code == 200
+            pages.append(response.json())
+            next_offset = response.headers.get("X-Next-Offset")
+            offset = int(next_offset) if next_offset is not None else None
+            # Sem cache, cada página é lida por intervalo
+            service._records.invalidate("Lacunas")
+
+        assert [len(page) for page in pages] == [5, 5, 2]
+        assert [record for page in pages for record in page] == client.get("/sheets/dados").json()
+        assert pages[0][4]["name"] == ""
+
+    def test_export_across_blank_row(self, gap_api):
+        """Testa que a exportação não para na linha em branco."""
+        client, _ = gap_api
+        with patch("app.routes.sheets_routes.settings.export_chunk_rows", 5):
+            response = client.get("/sheets/dados/export?format=ndjson")
+
+        assert response.status_code == 200
+        assert len(response.text.splitlines()) == 12
+
+    def test_offset_without_limit(self, api):
+        """Testa que o offset é aplicado também sem limit."""
+        records = api.get("/sheets/dados").json()
+
+        response = api.get("/sheets/dados?offset=5")
+
+        assert response.status_code == 200
+        assert response.json() == records[5:]
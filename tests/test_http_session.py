@@ -0,0 +1,67 @@
+"""
+Testes para a sessão HTTP compartilhada.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from app.services.http_session import KeepAliveAdapter, configure_session
+
+
+class _CountingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        body = b"{}"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _CountingHandler)
+    server.daemon_threads = True
+    server.connections = 0
+    server.lock = threading.Lock()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestHttpSession:
+    """Testes para o pool de conexões."""
+
+    def test_adapter_is_mounted_with_pool_size(self):
+        """Testa que o adapter é montado com o tamanho de pool configurado."""
+        session = configure_session(requests.Session(), pool_size=32)
+
+        adapter = session.get_adapter("https://sheets.googleapis.com")
+        assert isinstance(adapter, KeepAliveAdapter)
+        assert adapter._pool_maxsize == 32
+
+    def test_connections_are_reused_under_concurrency(self, stub_server):
+        """Testa que chamadas concorrentes não abrem mais conexões que o pool."""
+        session = configure_session(requests.Session(), pool_size=4)
+        url = f"http://127.0.0.1:{stub_server.server_address[1]}/"
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            for response in executor.map(lambda _: session.get(url), range(40)):
+                assert response.status_code == 200
+
+        assert stub_server.connections <= 4
@@ -0,0 +1,98 @@
+"""
+Testes para a deduplicação por chave de idempotência.
+"""
+import asyncio
+
+import pytest
+
+from app.services.idempotency import IdempotencyConflictError, IdempotencyStore
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestIdempotencyStore:
+    """Testes para o IdempotencyStore."""
+
+    @pytest.mark.asyncio
+    async def test_repeated_key_returns_original_result(self):
+        """Testa que a repetição não executa a operação de novo."""
+        store = IdempotencyStore(ttl_seconds=60)
+        calls = []
+
+        async def operation():
+            calls.append(1)
+            return "resultado"
+
+        assert await store.run("k", "a", operation) == ("resultado", False)
+        assert await store.run("k", "a", operation) == ("resultado", True)
+        assert len(calls) == 1
+        assert store.stats()["replays"] == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_duplicates_wait_for_first(self):
+        """Testa que requisições simultâneas com a mesma chave gravam uma vez."""
+        store = IdempotencyStore(ttl_seconds=60)
+        release = asyncio.Event()
+        calls = []
+
+        async def operation():
+            calls.append(1)
+            await release.wait()
+            return "ok"
+
+        tasks = [asyncio.create_task(store.run("k", "a", operation)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks)
+
+        assert len(calls) == 1
+        assert sorted(replayed for _, replayed in results) == [False, True, True]
+
+    @pytest.mark.asyncio
+    async def test_failure_releases_key(self):
+        """Testa que uma falha permite nova tentativa com a mesma chave."""
+        store = IdempotencyStore(ttl_seconds=60)
+
+        async def failing():
+            raise RuntimeError("quota")
+
+        async def succeeding():
+            return "ok"
+
+        with pytest.raises(RuntimeError):
+            await store.run("k", "a", failing)
+        assert await store.run("k", "a", succeeding) == ("ok", False)
+
+    @pytest.mark.asyncio
+    async def test_different_content_conflicts(self):
+        """Testa que a chave reutilizada com outro conteúdo é rejeitada."""
+        store = IdempotencyStore(ttl_seconds=60)
+
+        async def operation():
+            return "ok"
+
+        await store.run("k", "a", operation)
+        with pytest.raises(IdempotencyConflictError):
+            await store.run("k", "b", operation)
+
+    @pytest.mark.asyncio
+    async def test_entries_expire_and_are_bounded(self):
+        """Testa a expiração por TTL e o limite de entradas."""
+        clock = _Clock()
+        store = IdempotencyStore(ttl_seconds=60, max_entries=2, clock=clock)
+
+        async def operation():
+            return "ok"
+
+        for key in ("a", "b", "c"):
+            await store.run(key, "x", operation)
+        assert await store.run("a", "x", operation) == ("ok", False)
+
+        clock.now = 120
+        assert await store.run("c", "x", operation) == ("ok", False)
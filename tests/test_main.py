@@ -19,6 +19,31 @@ def test_health_check():
     assert data["version"] == "1.0.0"
 
 
+def test_ready_without_warm_up():
+    """Testa que, sem aquecimento, /ready responde pronto sem acessar o Google."""
+    client = TestClient(app)
+    response = client.get("/ready")
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "ready"
+    assert data["warmup"] == "disabled"
+    assert data["startup_seconds"] > 0
+
+
+def test_import_defers_google_stack():
+    """Testa que importar a aplicação não carrega gspread nem google-auth."""
+    import subprocess
+    import sys
+    
+    code = "import sys, app.main; print('gspread' in sys.modules, 'google.auth' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    
+    assert result.stdout.strip().splitlines()[-1] == "False False"
+
+
 def test_docs_endpoint():
     """Testa se a documentação está acessível."""
     client = TestClient(app)
@@ -41,4 +66,53 @@ def test_openapi_schema():
     
     schema = response.json()
     assert schema["info"]["title"] == "Sheets Integration API"
-    assert schema["info"]["version"] == "1.0.0" 
\ No newline at end of file
+    assert schema["info"]["version"] == "1.0.0" 
+
+def test_metrics_endpoint():
+    """Testa a exposição das métricas por rota e dos caches."""
+    client = TestClient(app)
+    client.get("/health")
+    response = client.get("/metrics")
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'sheets_http_request_seconds_count{method="GET",route="/health",status="200"}' in response.text
+    assert 'sheets_cache_lookups_total{cache="records",result="hit"}' in response.text
+
+
+def test_json_formatter():
+    """Testa o formato JSON dos registros de log."""
+    import json
+    import logging
+    
+    from app.main import JsonFormatter
+    
+    record = logging.LogRecord("app", logging.INFO, __file__, 1, "Obtidos %s registros", (3,), None)
+    entry = json.loads(JsonFormatter().format(record))
+    
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "app"
+    assert entry["message"] == "Obtidos 3 registros"
+
+
+def test_queue_handler_defers_formatting():
+    """Testa que o registro é enfileirado sem interpolar os argumentos."""
+    import logging
+    import queue
+    
+    from app.main import DeferredQueueHandler
+    
+    class Expensive:
+        formatted = False
+        
+        def __str__(self):
+            Expensive.formatted = True
+            return "caro"
+    
+    log_queue = queue.SimpleQueue()
+    handler = DeferredQueueHandler(log_queue)
+    record = logging.LogRecord("app", logging.INFO, __file__, 1, "Valor: %s", (Expensive(),), None)
+    handler.handle(record)
+    
+    assert log_queue.get_nowait() is record
+    assert not Expensive.formatted
@@ -0,0 +1,71 @@
+"""
+Testes para as métricas Prometheus.
+"""
+import pytest
+from unittest.mock import Mock
+from prometheus_client import CollectorRegistry, REGISTRY
+
+from app.services import metrics
+from app.services.metrics import ServiceCollector
+
+
+def _sample(name, labels=None):
+    return REGISTRY.get_sample_value(name, labels or {}) or 0
+
+
+class TestGoogleCalls:
+    """Testes para a medição das chamadas ao Google."""
+
+    def test_google_call_observes_duration(self):
+        """Testa o histograma por operação e o gauge de chamadas em andamento."""
+        labels = {"operation": "teste_leitura"}
+        before = _sample("sheets_google_call_seconds_count", labels)
+
+        with metrics.google_call("teste_leitura"):
+            assert _sample("sheets_google_calls_in_flight") >= 1
+
+        assert _sample("sheets_google_call_seconds_count", labels) == before + 1
+
+    def test_google_call_observes_failures(self):
+        """Testa que chamadas com erro também são medidas."""
+        labels = {"operation": "teste_falha"}
+        before = _sample("sheets_google_call_seconds_count", labels)
+
+        with pytest.raises(RuntimeError):
+            with metrics.google_call("teste_falha"):
+                raise RuntimeError("falhou")
+
+        assert _sample("sheets_google_call_seconds_count", labels) == before + 1
+
+    def test_count_google_error(self):
+        """Testa o contador de respostas de erro por código."""
+        before = _sample("sheets_google_errors_total", {"status": "429"})
+
+        metrics.count_google_error(429)
+
+        assert _sample("sheets_google_errors_total", {"status": "429"}) == before + 1
+
+
+class TestServiceCollector:
+    """Testes para o coletor dos contadores do serviço."""
+
+    def test_collect_reads_service_stats(self):
+        """Testa a leitura dos caches, da cota e do log local na coleta."""
+        service = Mock()
+        service.cache_stats.return_value = {
+            "records": {"hits": 5, "stale_hits": 1, "misses": 2},
+            "handles": {"hits": 7, "misses": 1}
+        }
+        service.quota_stats.return_value = {
+            "read_tokens": 50.0, "write_tokens": 60.0, "retries": 3, "rejected": 0
+        }
+        service.write_log_stats.return_value = {"depth": 4, "dead_letter": 1}
+        registry = CollectorRegistry()
+        registry.register(ServiceCollector(service))
+
+        labels = {"cache": "records", "result": "hit"}
+        assert registry.get_sample_value("sheets_cache_lookups_total", labels) == 5
+        assert registry.get_sample_value("sheets_quota_tokens", {"kind": "read"}) == 50.0
+        assert registry.get_sample_value("sheets_google_retries_total") == 3
+        assert registry.get_sample_value("sheets_write_log_depth") == 4
+        assert registry.get_sample_value("sheets_write_log_dead_letter") == 1
@@ -0,0 +1,170 @@
+"""
+Testes para o controle de cota, com um Google Sheets falso que aplica cota.
+"""
+import pytest
+from unittest.mock import Mock
+
+from gspread.exceptions import APIError
+
+from prometheus_client import REGISTRY
+
+from app.services.rate_limiter import QuotaExceededError, QuotaScheduler, TokenBucket
+
+
+class FakeClock:
+    """Relógio simulado; dormir apenas avança o tempo."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def api_error(status):
+    response = Mock()
+    response.status_code = status
+    response.headers = {}
+    response.json.return_value = {
+        "error": {"code": status, "message": "Quota exceeded", "status": "RESOURCE_EXHAUSTED"}
+    }
+    return APIError(response)
+
+
+class FakeQuotaSheet:
+    """
+    Worksheet falso que aplica uma cota de ``quota`` chamadas por minuto,
+    reposta gradualmente, e responde 429 quando ela se esgota.
+    """
+
+    def __init__(self, clock, quota):
+        self.clock = clock
+        self.quota = quota
+        self.remaining = float(quota)
+        self.updated = clock()
+        self.rows = []
+        self.rejections = 0
+
+    def append_rows(self, rows):
+        now = self.clock()
+        self.remaining = min(self.quota, self.remaining + (now - self.updated) * self.quota / 60)
+        self.updated = now
+        if self.remaining < 1:
+            self.rejections += 1
+            raise api_error(429)
+        self.remaining -= 1
+        self.rows.extend(rows)
+
+
+class TestTokenBucket:
+    """Testes para o TokenBucket."""
+
+    def test_burst_then_refill(self):
+        """Testa que o bucket libera a capacidade e depois repõe por minuto."""
+        clock = FakeClock()
+        bucket = TokenBucket(60, clock=clock)
+
+        assert all(bucket.acquire(0) == 0 for _ in range(60))
+        assert bucket.acquire(10) == pytest.approx(1.0)
+
+    def test_wait_beyond_deadline_is_rejected(self):
+        """Testa que a espera acima do prazo lança QuotaExceededError."""
+        clock = FakeClock()
+        bucket = TokenBucket(60, capacity=1, clock=clock)
+        bucket.acquire(0)
+
+        with pytest.raises(QuotaExceededError) as exc:
+            bucket.acquire(0.5)
+        assert exc.value.retry_after == pytest.approx(1.0)
+        # Nada foi reservado pela tentativa rejeitada
+        assert bucket.acquire(1.0) == pytest.approx(1.0)
+
+
+class TestQuotaScheduler:
+    """Testes para o QuotaScheduler."""
+
+    def test_burst_without_limiter_fails(self):
+        """Sem controle, uma rajada acima da cota recebe 429."""
+        clock = FakeClock()
+        sheet = FakeQuotaSheet(clock, quota=60)
+
+        failures = 0
+        for i in range(100):
+            try:
+                sheet.append_rows([[i]])
+            except APIError:
+                failures += 1
+
+        assert failures == 40
+
+    def test_burst_is_smoothed_within_quota(self):
+        """Com o scheduler, a mesma rajada é distribuída e nenhuma linha falha."""
+        clock = FakeClock()
+        sheet = FakeQuotaSheet(clock, quota=60)
+        scheduler = QuotaScheduler(
+            read_per_minute=60, write_per_minute=60, clock=clock, sleep=clock.sleep
+        )
+
+        for i in range(100):
+            scheduler.call("write", sheet.append_rows, [[i]], deadline=clock() + 600)
+
+        assert len(sheet.rows) == 100
+        assert sheet.rejections == 0
+        assert clock() == pytest.approx(40, abs=1e-6)
+
+    def test_retries_server_errors_with_backoff(self):
+        """Testa novas tentativas em respostas 5xx."""
+        clock = FakeClock()
+        func = Mock(side_effect=[api_error(503), api_error(500), "ok"])
+        scheduler = QuotaScheduler(60, 60, clock=clock, sleep=clock.sleep)
+
+        assert scheduler.call("read", func, deadline=100) == "ok"
+        assert func.call_count == 3
+        assert 0 < clock() <= 3
+
+    def test_client_errors_are_not_retried(self):
+        """Testa que erros 4xx diferentes de 429 não são repetidos."""
+        clock = FakeClock()
+        func = Mock(side_effect=api_error(400))
+        scheduler = QuotaScheduler(60, 60, clock=clock, sleep=clock.sleep)
+
+        with pytest.raises(APIError):
+            scheduler.call("read", func, deadline=100)
+        assert func.call_count == 1
+
+    def test_backoff_beyond_deadline_raises(self):
+        """Testa que o backoff além do prazo vira QuotaExceededError."""
+        clock = FakeClock()
+        func = Mock(side_effect=api_error(429))
+        scheduler = QuotaScheduler(60, 60, backoff_base=8, clock=clock, sleep=clock.sleep)
+
+        with pytest.raises(QuotaExceededError) as exc:
+            scheduler.call("write", func, deadline=1)
+        assert exc.value.retry_after >= 4
+        assert scheduler.stats()["rejected"] == 1
+
+    def test_metrics_exclude_quota_wait(self):
+        """Testa que a espera pelo token não conta como chamada em andamento."""
+        clock = FakeClock()
+        in_flight_while_waiting = []
+
+        def sleep(seconds):
+            in_flight = REGISTRY.get_sample_value("sheets_google_calls_in_flight")
+            in_flight_while_waiting.append(in_flight)
+            clock.sleep(seconds)
+
+        def medir_cota():
+            return "ok"
+
+        scheduler = QuotaScheduler(read_per_minute=1, write_per_minute=1, clock=clock, sleep=sleep)
+        labels = {"operation": "medir_cota"}
+        before = REGISTRY.get_sample_value("sheets_google_call_seconds_count", labels) or 0
+
+        for _ in range(2):
+            assert scheduler.call("read", medir_cota, deadline=120) == "ok"
+
+        assert in_flight_while_waiting == [0]
+        assert REGISTRY.get_sample_value("sheets_google_call_seconds_count", labels) == before + 2
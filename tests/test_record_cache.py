@@ -0,0 +1,206 @@
+"""
+Testes para o cache de registros.
+"""
+import json
+import threading
+from unittest.mock import Mock, patch
+
+from app.services.record_cache import RecordCache
+from app.services.record_index import RecordIndex
+
+
+def _monotonic(value):
+    return patch("app.services.record_cache.time.monotonic", return_value=value)
+
+
+class TestRecordCache:
+    """Testes para o RecordCache."""
+
+    def test_hit_within_ttl(self, sample_sheet_records):
+        """Testa que dentro do TTL a planilha não é baixada novamente."""
+        loader = Mock(return_value=sample_sheet_records)
+        cache = RecordCache(loader, ttl_seconds=30)
+
+        assert cache.get("Academia") == sample_sheet_records
+        assert cache.get("Academia") == sample_sheet_records
+
+        loader.assert_called_once_with("Academia")
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_stale_served_while_refreshing(self, sample_sheet_records):
+        """Testa stale-while-revalidate com uma única atualização em segundo plano."""
+        release = threading.Event()
+        refreshed = threading.Event()
+        calls = []
+
+        def loader(key):
+            calls.append(key)
+            if len(calls) > 1:
+                release.wait(1)
+                refreshed.set()
+                return sample_sheet_records
+            return sample_sheet_records[:1]
+
+        cache = RecordCache(loader, ttl_seconds=30, stale_seconds=300)
+        with _monotonic(0):
+            cache.get("Academia")
+
+        with _monotonic(60):
+            assert cache.get("Academia") == sample_sheet_records[:1]
+            assert cache.get("Academia") == sample_sheet_records[:1]
+            release.set()
+            assert refreshed.wait(1)
+
+        assert len(calls) == 2
+        assert cache.stats()["stale_hits"] == 2
+
+    def test_expired_beyond_stale_window(self, sample_sheet_records):
+        """Testa que dados muito antigos são recarregados de forma síncrona."""
+        loader = Mock(return_value=sample_sheet_records)
+        cache = RecordCache(loader, ttl_seconds=30, stale_seconds=10)
+
+        with _monotonic(0):
+            cache.get("Academia")
+        with _monotonic(100):
+            cache.get("Academia")
+
+        assert loader.call_count == 2
+        assert cache.stats()["misses"] == 2
+
+    def test_write_through(self, sample_sheet_records):
+        """Testa que um append fica visível sem novo download."""
+        loader = Mock(return_value=sample_sheet_records[:1])
+        cache = RecordCache(loader, ttl_seconds=30)
+
+        cache.get("Academia")
+        cache.append("Academia", sample_sheet_records[1])
+
+        assert cache.get("Academia") == sample_sheet_records
+        loader.assert_called_once()
+
+    def test_disabled_with_zero_ttl(self, sample_sheet_records):
+        """Testa que TTL zero desativa o cache."""
+        loader = Mock(return_value=sample_sheet_records)
+        cache = RecordCache(loader, ttl_seconds=0)
+
+        cache.get("Academia")
+        cache.get("Academia")
+
+        assert loader.call_count == 2
+
+    def test_select_uses_index_updated_by_append(self, sample_sheet_records):
+        """Testa que o índice do cache acompanha o write-through."""
+        loader = Mock(return_value=sample_sheet_records[:1])
+        cache = RecordCache(loader, ttl_seconds=30)
+
+        assert len(cache.select("Academia", name="joão silva")) == 1
+        cache.append("Academia", sample_sheet_records[1])
+
+        assert cache.select("Academia", serie=5) == [sample_sheet_records[1]]
+        loader.assert_called_once()
+
+    def test_index_is_built_outside_lock(self, sample_sheet_records):
+        """Testa que a primeira construção do índice não bloqueia o cache."""
+        cache = RecordCache(Mock(return_value=sample_sheet_records), ttl_seconds=30)
+        lock_held = []
+        build_index = RecordIndex
+
+        def tracked_index(records):
+            lock_held.append(cache._lock.locked())
+            return build_index(records)
+
+        with patch("app.services.record_cache.RecordIndex", side_effect=tracked_index):
+            assert cache.select("Academia", serie=5) == [sample_sheet_records[1]]
+            assert cache.select("Academia", serie=3) == [sample_sheet_records[0]]
+
+        assert lock_held == [False]
+
+    def test_index_built_during_write_is_discarded(self, sample_sheet_records):
+        """Testa que o índice não é guardado se houve escrita durante a construção."""
+        cache = RecordCache(Mock(return_value=sample_sheet_records[:1]), ttl_seconds=30)
+        cache.get("Academia")
+        build_index = RecordIndex
+
+        def index_with_concurrent_write(records):
+            index = build_index(records)
+            cache.append("Academia", sample_sheet_records[1])
+            return index
+
+        with patch(
+            "app.services.record_cache.RecordIndex", side_effect=index_with_concurrent_write
+        ):
+            cache.select("Academia")
+
+        assert cache.select("Academia", serie=5) == [sample_sheet_records[1]]
+
+    def test_invalidate_during_load_is_not_undone(self, sample_sheet_records):
+        """Testa que dados baixados antes de uma invalidação não ficam em cache como válidos."""
+        old, new = sample_sheet_records[:1], sample_sheet_records
+
+        def load_with_concurrent_invalidate(key):
+            if loader.call_count == 1:
+                cache.invalidate(key)
+                return old
+            return new
+
+        loader = Mock(side_effect=load_with_concurrent_invalidate)
+        cache = RecordCache(loader, ttl_seconds=30)
+
+        assert cache.get("Academia") == old
+        assert cache.get("Academia") == new
+        assert loader.call_count == 2
+
+    def test_encoded_is_memoized_until_write(self, sample_sheet_records):
+        """Testa que o JSON memorizado é descartado após uma escrita."""
+        loader = Mock(return_value=sample_sheet_records[:1])
+        cache = RecordCache(loader, ttl_seconds=30)
+
+        body, first_etag = cache.encoded("Academia")
+        assert cache.encoded("Academia")[0] is body
+
+        cache.append("Academia", sample_sheet_records[1])
+        body, second_etag = cache.encoded("Academia")
+
+        assert json.loads(body) == sample_sheet_records
+        assert second_etag != first_etag
+
+    def test_encoded_accepts_integers_outside_int64(self):
+        """Testa a serialização de séries que o orjson não aceita."""
+        records = [{"name": "Ana", "serie": 2 ** 70}]
+        cache = RecordCache(Mock(return_value=records), ttl_seconds=30)
+
+        body, _ = cache.encoded("Academia")
+
+        assert json.loads(body) == records
+
+    def test_unchanged_revision_skips_download(self, sample_sheet_records):
+        """Testa que a revisão remota igual revalida o cache sem baixar os valores."""
+        loader = Mock(return_value=sample_sheet_records)
+        version = Mock(return_value="2024-01-15T10:00:00.000Z")
+        cache = RecordCache(loader, ttl_seconds=30, version=version)
+
+        with _monotonic(0):
+            cache.get("Academia")
+        with _monotonic(100):
+            cache.get("Academia")
+        assert loader.call_count == 1
+        assert cache.stats()["revalidations"] == 1
+
+        version.return_value = "2024-01-15T11:00:00.000Z"
+        with _monotonic(200):
+            cache.get("Academia")
+        assert loader.call_count == 2
+
+    def test_revision_error_falls_back_to_download(self, sample_sheet_records):
+        """Testa que uma falha ao consultar a revisão não impede a recarga."""
+        loader = Mock(return_value=sample_sheet_records)
+        cache = RecordCache(loader, ttl_seconds=30, version=Mock(side_effect=RuntimeError))
+
+        with _monotonic(0):
+            cache.get("Academia")
+        with _monotonic(100):
+            cache.get("Academia")
+
+        assert loader.call_count == 2
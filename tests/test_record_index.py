@@ -0,0 +1,61 @@
+"""
+Testes para os índices de registros.
+"""
+from datetime import date
+
+import pytest
+
+from app.services.record_index import RecordIndex, sort_records
+from app.services.record_set import RecordSet
+
+
+@pytest.fixture
+def records():
+    return [
+        {"name": "João Silva", "serie": 3, "initial_weight": "75kg", "date": "2024-01-15"},
+        {"name": "Maria Santos", "serie": 5, "initial_weight": "65.5kg", "date": "2024-01-20"},
+        {"name": "João Silva", "serie": 5, "initial_weight": "80kg", "date": "2024-02-01"},
+        {"name": "Ana Lima", "serie": 3, "initial_weight": "100kg", "date": "2024-01-10"},
+    ]
+
+
+class TestRecordIndex:
+    """Testes para o RecordIndex."""
+
+    def test_filter_by_name_is_case_insensitive(self, records):
+        index = RecordIndex(records)
+        assert index.query(name="joão  silva") == [0, 2]
+
+    def test_filter_by_serie_and_name(self, records):
+        index = RecordIndex(records)
+        assert index.query(name="João Silva", serie=5) == [2]
+        assert index.query(serie=7) == []
+
+    def test_filter_by_date_range(self, records):
+        index = RecordIndex(records)
+        assert index.query(date_from=date(2024, 1, 15), date_to=date(2024, 1, 31)) == [0, 1]
+        assert index.query(date_to=date(2024, 1, 12)) == [3]
+
+    def test_combined_with_dates(self, records):
+        index = RecordIndex(records)
+        assert index.query(name="João Silva", date_from=date(2024, 1, 20)) == [2]
+
+    def test_incremental_add(self, records):
+        index = RecordIndex(records)
+        index.add(4, {"name": "Ana Lima", "serie": 1, "initial_weight": "70kg", "date": "2024-01-12"})
+
+        assert index.query(name="ana lima") == [3, 4]
+        assert index.query(date_to=date(2024, 1, 12)) == [3, 4]
+
+    def test_built_from_typed_columns(self, records):
+        index = RecordIndex(RecordSet(records + [{"name": "Ana  Lima", "serie": "3", "date": "x"}]))
+
+        assert index.query(name="ana lima") == [3, 4]
+        assert index.query(serie=3) == [0, 3]
+        assert index.query(date_from=date(2024, 1, 20)) == [1, 2]
+
+    def test_sort_records(self, records):
+        assert [r["initial_weight"] for r in sort_records(records, "-initial_weight")] == [
+            "100kg", "80kg", "75kg", "65.5kg"
+        ]
+        assert [r["date"] for r in sort_records(records, "date")][0] == "2024-01-10"
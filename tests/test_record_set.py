@@ -0,0 +1,91 @@
+"""
+Testes para o armazenamento colunar de registros.
+"""
+from collections.abc import Sequence
+
+import pytest
+
+from app.services.record_set import RecordSet, grams_to_weight, record_fields, weight_to_grams
+
+
+@pytest.fixture
+def records():
+    return [
+        {"name": "João Silva", "serie": 3, "initial_weight": "75kg", "date": "2024-01-15"},
+        {"name": "Maria Santos", "serie": 5, "initial_weight": "65.5kg", "date": "2024-01-20"},
+    ]
+
+
+class TestRecordSet:
+    """Testes para o RecordSet."""
+
+    def test_round_trip(self, records):
+        record_set = RecordSet(records)
+
+        assert len(record_set) == 2
+        assert list(record_set) == records
+        assert record_set[-1] == records[-1]
+        assert record_set[1:5] == records[1:]
+
+    def test_typed_columns(self, records):
+        record_set = RecordSet(records)
+
+        assert record_set.serie_at(0) == 3
+        assert record_set.grams_at(1) == 65500.0
+        assert record_set.ordinal_at(0) == 738900
+
+    def test_fields_at_matches_record_fields(self):
+        irregular = [
+            {"name": "Ana", "serie": "", "initial_weight": "75.0kg", "date": "20240115"},
+            {"name": None, "serie": 2 ** 70, "initial_weight": "75", "date": None},
+            {"serie": True},
+        ]
+        record_set = RecordSet(irregular)
+
+        assert [record_set.fields_at(i) for i in range(3)] == [record_fields(r) for r in irregular]
+        assert record_set.grams_at(0) == 75000.0
+
+    def test_names_are_interned(self):
+        first, second = "".join(["Ana ", "Lima"]), "".join(["Ana", " Lima"])
+        assert first is not second
+
+        record_set = RecordSet([
+            {"name": first, "serie": 1, "initial_weight": "50kg", "date": "2024-01-01"},
+            {"name": second, "serie": 1, "initial_weight": "50kg", "date": "2024-01-02"},
+        ])
+
+        assert record_set[0]["name"] is record_set[1]["name"]
+
+    def test_irregular_values_are_preserved(self):
+        irregular = [
+            {"name": "Ana", "serie": "", "initial_weight": "75.0kg", "date": "15/01/2024"},
+            {"name": "Pedro", "serie": 2, "observacao": "lesão"},
+        ]
+
+        assert list(RecordSet(irregular)) == irregular
+
+    def test_serie_outside_int64(self):
+        huge = {"name": "Ana", "serie": 2 ** 63, "initial_weight": "50kg", "date": "2024-01-01"}
+
+        record_set = RecordSet([huge])
+
+        assert record_set[0] == huge
+        assert record_set.serie_at(0) is None
+
+    def test_is_a_sequence(self, records):
+        record_set = RecordSet(records)
+
+        assert isinstance(record_set, Sequence)
+        assert record_set.index(records[1]) == 1
+        assert list(reversed(record_set)) == records[::-1]
+
+    def test_append_after_build(self, records):
+        record_set = RecordSet(records[:1])
+        record_set.append(records[1])
+
+        assert record_set == records
+
+    def test_weight_conversion(self):
+        assert weight_to_grams("80.25kg") == 80250.0
+        assert weight_to_grams("80") is None
+        assert grams_to_weight(80250.0) == "80.25kg"
@@ -0,0 +1,96 @@
+"""
+Testes para os agregados de registros.
+"""
+import pytest
+from unittest.mock import patch
+
+from app.services.record_cache import RecordCache
+from app.services.record_set import RecordSet
+from app.services.record_stats import RecordStats
+
+
+@pytest.fixture
+def records():
+    return [
+        {"name": "João Silva", "serie": 3, "initial_weight": "75kg", "date": "2024-01-15"},
+        {"name": "Maria Santos", "serie": 5, "initial_weight": "65.5kg", "date": "2024-01-20"},
+        {"name": "joão silva", "serie": 5, "initial_weight": "80kg", "date": "2024-02-01"},
+        {"name": "Ana Lima", "serie": 3, "initial_weight": "peso", "date": "sem data"},
+    ]
+
+
+class TestRecordStats:
+    """Testes para o RecordStats."""
+
+    def test_weight_requires_kg_suffix(self):
+        """Testa que pesos sem a unidade ``kg`` não entram nos agregados."""
+        stats = RecordStats([
+            {"name": "Ana", "serie": 1, "initial_weight": weight, "date": "2024-01-01"}
+            for weight in ("75", "75g", "75k", "65.5kg")
+        ])
+
+        total = stats.snapshot()["total"]
+        assert (total["weight_min"], total["weight_max"]) == (65.5, 65.5)
+
+    def test_per_athlete_totals(self, records):
+        athletes = {a["name"]: a for a in RecordStats(records).snapshot()["athletes"]}
+
+        joao = athletes["João Silva"]
+        assert joao["count"] == 2
+        assert joao["serie_total"] == 8
+        assert (joao["weight_min"], joao["weight_max"], joao["weight_avg"]) == (75.0, 80.0, 77.5)
+        assert joao["progress"] == 5.0
+        assert athletes["Ana Lima"]["weight_avg"] is None
+
+    def test_series_and_weeks(self, records):
+        snapshot = RecordStats(records).snapshot()
+
+        assert snapshot["total"]["count"] == 4
+        assert snapshot["series"] == {"3": 2, "5": 2}
+        assert [w["week"] for w in snapshot["weeks"]] == ["2024-W03", "2024-W05"]
+        assert snapshot["weeks"][0]["count"] == 2
+
+    def test_typed_columns_match_dicts(self, records):
+        """Testa que a leitura das colunas do RecordSet dá o mesmo resumo que os dicts."""
+        irregular = records + [
+            {"name": "Ana Lima", "serie": "2", "initial_weight": "70.50kg", "date": "20240301"},
+            {"name": None, "serie": 2 ** 70},
+        ]
+
+        assert RecordStats(RecordSet(irregular)).snapshot() == RecordStats(irregular).snapshot()
+
+    def test_incremental_add_matches_full_build(self, records):
+        stats = RecordStats(records[:2])
+        stats.snapshot()
+        for record in records[2:]:
+            stats.add(record)
+
+        assert stats.snapshot() == RecordStats(records).snapshot()
+
+
+class TestCachedStats:
+    """Testes para os agregados mantidos junto do cache."""
+
+    def test_write_through_updates_stats(self, records):
+        cache = RecordCache(lambda key: list(records[:3]), ttl_seconds=60)
+        assert cache.aggregate("Academia")["total"]["count"] == 3
+
+        cache.append("Academia", records[3])
+
+        assert cache.aggregate("Academia")["total"]["count"] == 4
+        assert cache.stats()["misses"] == 1
+
+    def test_stats_built_during_write_are_discarded(self, records):
+        cache = RecordCache(lambda key: list(records[:3]), ttl_seconds=60)
+        cache.get("Academia")
+        build_stats = RecordStats
+
+        def stats_with_concurrent_write(cached):
+            stats = build_stats(cached)
+            cache.append("Academia", records[3])
+            return stats
+
+        with patch("app.services.record_cache.RecordStats", side_effect=stats_with_concurrent_write):
+            cache.aggregate("Academia")
+
+        assert cache.aggregate("Academia")["total"]["count"] == 4
@@ -0,0 +1,62 @@
+"""
+Testes para a réplica local em SQLite.
+"""
+import pytest
+
+from app.services.replica import SheetReplica, row_hash
+
+
+@pytest.fixture
+def replica():
+    replica = SheetReplica(":memory:")
+    yield replica
+    replica.close()
+
+
+class TestSheetReplica:
+    """Testes para o SheetReplica."""
+
+    def test_replace_and_read(self, replica, sample_sheet_records):
+        """Testa a carga completa e a leitura paginada."""
+        replica.replace_all(sample_sheet_records)
+
+        assert replica.records() == sample_sheet_records
+        assert replica.records(1, 1) == sample_sheet_records[1:]
+        assert replica.contiguous_end() == 3
+        assert replica.row_hash_at(3) == row_hash(sample_sheet_records[1])
+
+    def test_replace_all_is_atomic(self, replica, sample_sheet_records):
+        """Testa que uma falha na carga completa preserva as linhas anteriores."""
+        replica.replace_all(sample_sheet_records)
+
+        with pytest.raises(TypeError):
+            replica.replace_all([{"name": object()}])
+
+        assert replica.records() == sample_sheet_records
+
+    def test_upsert_is_idempotent(self, replica, sample_sheet_records):
+        """Testa que gravar a mesma linha duas vezes não duplica."""
+        replica.upsert(2, sample_sheet_records)
+        replica.upsert(3, sample_sheet_records[1:])
+
+        assert replica.count() == 2
+
+    def test_contiguous_end_stops_at_gap(self, replica, sample_sheet_records):
+        """Testa que lacunas interrompem o trecho contínuo."""
+        replica.upsert(2, sample_sheet_records[:1])
+        replica.upsert(5, sample_sheet_records[1:])
+
+        assert replica.contiguous_end() == 2
+
+    def test_persists_on_disk(self, tmp_path, sample_sheet_records):
+        """Testa que os dados e a última sincronização sobrevivem à reabertura."""
+        path = str(tmp_path / "replica.sqlite3")
+        replica = SheetReplica(path)
+        replica.replace_all(sample_sheet_records)
+        replica.mark_synced(123.0)
+        replica.close()
+
+        reopened = SheetReplica(path)
+        assert reopened.records() == sample_sheet_records
+        assert reopened.last_sync() == 123.0
+        reopened.close()
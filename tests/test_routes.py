@@ -1,11 +1,19 @@
 """
 Testes para as rotas da API.
 """
+import json
+import threading
+from contextlib import contextmanager
+
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 from app.main import app
+from app.routes.sheets_routes import get_service
+from app.services.change_feed import ChangeFeed
+from app.services.rate_limiter import QuotaExceededError
+from app.services.sheets_service import SheetsService
 
 
 class TestSheetsRoutes:
@@ -44,7 +52,7 @@ class TestSheetsRoutes:
         
         assert response.status_code == 500
         data = response.json()
-        assert "Erro ao acessar a planilha" in data["detail"]
+        assert "Erro ao acessar a planilha" in data["message"]
     
     def test_add_data_success(self, mock_sheets_service, sample_sheet_input):
         """Testa adição de dados com sucesso."""
@@ -82,7 +90,7 @@ class TestSheetsRoutes:
         
         assert response.status_code == 500
         data = response.json()
-        assert "Erro ao adicionar dados à planilha" in data["detail"]
+        assert "Erro ao adicionar dados à planilha" in data["message"]
     
     def test_check_status_success(self, mock_sheets_service, mock_worksheet):
         """Testa verificação de status com sucesso."""
@@ -106,4 +114,352 @@ class TestSheetsRoutes:
         
         assert response.status_code == 503
         data = response.json()
-        assert "Erro de conectividade com Google Sheets" in data["detail"] 
\ No newline at end of file
+        assert "Erro de conectividade com Google Sheets" in data["message"]
+    
+    def test_add_batch_success(self, mock_sheets_service, sample_sheet_records):
+        """Testa inserção em lote com sucesso."""
+        client = TestClient(app)
+        response = client.post("/sheets/adicionar/lote", json=sample_sheet_records)
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "success"
+        assert data["inserted"] == 2
+        assert [r["status"] for r in data["results"]] == ["success", "success"]
+        mock_sheets_service.append_rows.assert_called_once()
+    
+    def test_add_batch_rejects_invalid_rows(self, mock_sheets_service, sample_sheet_records):
+        """Testa que linhas inválidas são rejeitadas individualmente."""
+        rows = [sample_sheet_records[0], {"name": "A", "serie": 0}, sample_sheet_records[1]]
+        
+        client = TestClient(app)
+        response = client.post("/sheets/adicionar/lote", json=rows)
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "partial"
+        assert data["inserted"] == 2
+        assert data["rejected"] == 1
+        assert data["results"][1]["status"] == "invalid"
+        assert data["results"][1]["errors"]
+        inserted = mock_sheets_service.append_rows.call_args[0][0]
+        assert len(inserted) == 2
+    
+    def test_add_batch_too_large(self, mock_sheets_service, sample_sheet_records):
+        """Testa o limite de linhas por lote."""
+        with patch("app.routes.sheets_routes.settings.batch_max_rows", 1):
+            client = TestClient(app)
+            response = client.post("/sheets/adicionar/lote", json=sample_sheet_records)
+        
+        assert response.status_code == 413
+    
+    def test_add_batch_quota_exceeded(self, mock_sheets_service, sample_sheet_records):
+        """Testa resposta 503 com Retry-After quando a cota se esgota no lote."""
+        mock_sheets_service.append_rows.side_effect = QuotaExceededError(
+            "Cota da API do Google esgotada", retry_after=4.2
+        )
+        
+        client = TestClient(app)
+        response = client.post("/sheets/adicionar/lote", json=sample_sheet_records)
+        
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "5"
+    
+    def test_add_data_accepted_with_receipt(self, mock_sheets_service, sample_sheet_input):
+        """Testa a resposta 202 com recibo na escrita agrupada."""
+        mock_sheets_service.submit_row_with_receipt.return_value = "abc123"
+        
+        with patch("app.routes.sheets_routes.settings.write_coalescing_enabled", True), \
+                patch("app.routes.sheets_routes.settings.write_coalescing_async_ack", True):
+            client = TestClient(app)
+            response = client.post("/sheets/adicionar", json=sample_sheet_input.dict())
+        
+        assert response.status_code == 202
+        data = response.json()
+        assert data["status"] == "accepted"
+        assert data["data"]["receipt_id"] == "abc123"
+    
+    def test_get_receipt_not_found(self, mock_sheets_service):
+        """Testa consulta de recibo inexistente."""
+        mock_sheets_service.get_receipt.return_value = None
+        
+        client = TestClient(app)
+        response = client.get("/sheets/adicionar/desconhecido")
+        
+        assert response.status_code == 404
+    
+    def test_list_data_quota_exceeded(self, mock_sheets_service):
+        """Testa resposta 503 com Retry-After quando a cota se esgota."""
+        mock_sheets_service.get_all_records.side_effect = QuotaExceededError(
+            "Cota da API do Google esgotada", retry_after=12.3
+        )
+        
+        client = TestClient(app)
+        response = client.get("/sheets/dados")
+        
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "13"
+    
+    def test_list_data_paginated(self, mock_sheets_service, sample_sheet_records):
+        """Testa a listagem paginada com limit/offset."""
+        mock_sheets_service.get_all_records.return_value = sample_sheet_records
+        
+        client = TestClient(app)
+        response = client.get("/sheets/dados?limit=1&offset=1")
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert [r["name"] for r in data] == ["Maria Santos"]
+        assert response.headers["X-Next-Offset"] == "2"
+        mock_sheets_service.get_records_page.assert_called_with(1, 1)
+    
+    def test_list_data_invalid_limit(self, mock_sheets_service):
+        """Testa a validação do parâmetro limit."""
+        client = TestClient(app)
+        response = client.get("/sheets/dados?limit=0")
+        
+        assert response.status_code == 422
+    
+    def test_export_ndjson(self, mock_sheets_service, sample_sheet_records):
+        """Testa a exportação em NDJSON."""
+        mock_sheets_service.get_all_records.return_value = sample_sheet_records
+        
+        client = TestClient(app)
+        response = client.get("/sheets/dados/export?format=ndjson")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines == sample_sheet_records
+    
+    def test_export_csv(self, mock_sheets_service, sample_sheet_records):
+        """Testa a exportação em CSV."""
+        mock_sheets_service.get_all_records.return_value = sample_sheet_records
+        
+        client = TestClient(app)
+        response = client.get("/sheets/dados/export?format=csv")
+        
+        assert response.status_code == 200
+        lines = response.text.splitlines()
+        assert lines[0] == "name,serie,initial_weight,date"
+        assert lines[2] == "Maria Santos,5,65kg,2024-01-20"
+    
+    def test_export_error(self, mock_sheets_service):
+        """Testa erro na leitura antes do início da exportação."""
+        def failing_chunks(*args, **kwargs):
+            raise Exception("Erro de conexão")
+            yield
+        
+        mock_sheets_service.iter_records.side_effect = failing_chunks
+        
+        client = TestClient(app)
+        response = client.get("/sheets/dados/export")
+        
+        assert response.status_code == 500
+    
+    def test_list_data_filtered_and_sorted(self, mock_sheets_service, sample_sheet_records):
+        """Testa filtros e ordenação na listagem."""
+        mock_sheets_service.get_all_records.return_value = sample_sheet_records
+        
+        client = TestClient(app)
+        response = client.get(
+            "/sheets/dados?name=maria&date_from=2024-01-01&sort=-serie&limit=1"
+        )
+        
+        assert response.status_code == 200
+        assert [r["name"] for r in response.json()] == ["Maria Santos"]
+        assert response.headers["X-Next-Offset"] == "1"
+        filters = mock_sheets_service.query_records.call_args.kwargs
+        assert filters["name"] == "maria"
+        assert filters["date_from"].isoformat() == "2024-01-01"
+    
+    def test_list_data_invalid_sort(self, mock_sheets_service):
+        """Testa a validação do campo de ordenação."""
+        client = TestClient(app)
+        response = client.get("/sheets/dados?sort=altura")
+        
+        assert response.status_code == 422
+    
+    def test_tenant_routes_use_pool(self, mock_sheets_service, sample_sheet_records, sample_sheet_input):
+        """Testa as rotas de uma worksheet de outra planilha."""
+        mock_sheets_service.get_all_records.return_value = sample_sheet_records
+        mock_sheets_service.append_row.return_value = True
+        
+        client = TestClient(app)
+        listed = client.get("/sheets/abc123/Treinos/dados")
+        added = client.post("/sheets/abc123/Treinos/adicionar", json=sample_sheet_input.dict())
+        
+        assert listed.status_code == 200
+        assert len(listed.json()) == len(sample_sheet_records)
+        assert added.status_code == 200
+        mock_sheets_service.tenant_lease.assert_called_with("abc123", "Treinos")
+    
+    def test_tenant_lease_runs_off_event_loop(self, mock_sheets_service, sample_sheet_records):
+        """Testa que o empréstimo (e o encerramento de serviços removidos) roda no pool de threads."""
+        mock_sheets_service.get_all_records.return_value = sample_sheet_records
+        threads = []
+        
+        @contextmanager
+        def lease(*args):
+            threads.append(threading.current_thread().name)
+            yield mock_sheets_service
+            threads.append(threading.current_thread().name)
+        
+        mock_sheets_service.tenant_lease.side_effect = lease
+        client = TestClient(app)
+        
+        with client:
+            loop_thread = client.portal.call(lambda: threading.current_thread().name)
+            response = client.get("/sheets/abc123/Treinos/dados")
+        
+        assert response.status_code == 200
+        assert len(threads) == 2
+        assert loop_thread not in threads
+    
+    def test_batch_get(self, mock_sheets_service):
+        """Testa a leitura de vários intervalos."""
+        mock_sheets_service.get_ranges.return_value = {"A1:B1": [["name", "serie"]]}
+        
+        client = TestClient(app)
+        response = client.post("/sheets/batch-get", json={"ranges": ["A1:B1"]})
+        
+        assert response.status_code == 200
+        assert response.json()["ranges"] == {"A1:B1": [["name", "serie"]]}
+        mock_sheets_service.get_ranges.assert_called_once_with(["A1:B1"])
+    
+    def test_batch_get_empty_ranges(self, mock_sheets_service):
+        """Testa que a lista de intervalos não pode ser vazia."""
+        client = TestClient(app)
+        response = client.post("/sheets/batch-get", json={"ranges": []})
+        
+        assert response.status_code == 422
+    
+    def test_get_stats(self, mock_sheets_service):
+        """Testa o endpoint de estatísticas."""
+        mock_sheets_service.get_stats.return_value = {"total": {"count": 1}}
+        
+        client = TestClient(app)
+        response = client.get("/sheets/stats")
+        
+        assert response.status_code == 200
+        assert response.json()["data"] == {"total": {"count": 1}}
+    
+    def test_list_data_has_etag_and_keeps_schema(self, mock_sheets_service):
+        """Testa a ETag da listagem e o esquema OpenAPI da rota."""
+        client = TestClient(app)
+        response = client.get("/sheets/dados")
+        
+        assert response.status_code == 200
+        assert response.headers["ETag"].startswith('"')
+        schema = client.get("/openapi.json").json()
+        ok = schema["paths"]["/sheets/dados"]["get"]["responses"]["200"]
+        items = ok["content"]["application/json"]["schema"]["items"]
+        assert items["$ref"].endswith("/SheetRecord")
+    
+    def test_list_data_not_modified(self, mock_sheets_service):
+        """Testa o 304 quando o If-None-Match corresponde à ETag."""
+        client = TestClient(app)
+        etag = client.get("/sheets/dados").headers["ETag"]
+        
+        response = client.get("/sheets/dados", headers={"If-None-Match": f'W/{etag}, "outra"'})
+        
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+    
+    def test_list_data_changed_etag(self, mock_sheets_service, sample_sheet_records):
+        """Testa que uma ETag antiga recebe o conteúdo novo."""
+        client = TestClient(app)
+        etag = client.get("/sheets/dados?limit=1").headers["ETag"]
+        mock_sheets_service.get_all_records.return_value = sample_sheet_records[1:]
+        
+        response = client.get("/sheets/dados?limit=1", headers={"If-None-Match": etag})
+        
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+    
+    def test_check_status_not_modified(self, mock_worksheet, sample_sheet_input):
+        """Testa o 304 no status com os contadores reais e a ETag dos registros."""
+        gspread_client = Mock()
+        gspread_client.open.return_value.sheet1 = mock_worksheet
+        service = SheetsService()
+        service._get_client = Mock(return_value=gspread_client)
+        app.dependency_overrides[get_service] = lambda: service
+        try:
+            client = TestClient(app)
+            first = client.get("/sheets/status")
+            client.get("/sheets/dados")
+            
+            etag = first.headers["ETag"]
+            response = client.get("/sheets/status", headers={"If-None-Match": etag})
+            service.append_row(sample_sheet_input)
+            changed = client.get("/sheets/status", headers={"If-None-Match": etag})
+        finally:
+            app.dependency_overrides.pop(get_service, None)
+            service.shutdown()
+        
+        assert etag.startswith("W/")
+        assert response.status_code == 304
+        assert changed.status_code == 200
+        assert changed.headers["ETag"] != etag
+    
+    def test_stream_sends_new_rows(self, mock_sheets_service, sample_sheet_records):
+        """Testa o envio de linhas novas via Server-Sent Events."""
+        feed = ChangeFeed(lambda next_row: (2, []), interval=60)
+        feed.publish(2, sample_sheet_records[:1])
+        mock_sheets_service.change_feed.return_value = feed
+        
+        # O TestClient lê a resposta inteira: o feed é encerrado logo depois
+        closer = threading.Timer(0.2, feed.close)
+        closer.start()
+        client = TestClient(app)
+        response = client.get("/sheets/stream", headers={"Last-Event-ID": "0"})
+        closer.join()
+        
+        assert response.headers["content-type"].startswith("text/event-stream")
+        lines = response.text.splitlines()
+        assert "id: 1" in lines
+        assert json.loads(lines[lines.index("event: rows") + 1][len("data: "):]) == {
+            "first_row": 2, "rows": sample_sheet_records[:1]
+        }
+    
+    def test_add_data_idempotency_key(self, mock_sheets_service, sample_sheet_input):
+        """Testa que a repetição com a mesma chave não grava de novo."""
+        mock_sheets_service.append_row.return_value = True
+        headers = {"Idempotency-Key": "pedido-1"}
+        
+        client = TestClient(app)
+        first = client.post("/sheets/adicionar", json=sample_sheet_input.dict(), headers=headers)
+        second = client.post("/sheets/adicionar", json=sample_sheet_input.dict(), headers=headers)
+        
+        assert first.status_code == second.status_code == 200
+        assert second.json() == first.json()
+        assert second.headers["Idempotent-Replayed"] == "true"
+        assert mock_sheets_service.append_row.call_count == 1
+    
+    def test_add_data_idempotency_key_conflict(self, mock_sheets_service, sample_sheet_input):
+        """Testa a chave reutilizada com outro conteúdo."""
+        mock_sheets_service.append_row.return_value = True
+        headers = {"Idempotency-Key": "pedido-1"}
+        other = {**sample_sheet_input.dict(), "serie": 9}
+        
+        client = TestClient(app)
+        client.post("/sheets/adicionar", json=sample_sheet_input.dict(), headers=headers)
+        response = client.post("/sheets/adicionar", json=other, headers=headers)
+        
+        assert response.status_code == 422
+    
+    def test_add_data_accepted_by_write_log(self, mock_sheets_service, sample_sheet_input):
+        """Testa a resposta 202 quando a linha fica no log local."""
+        mock_sheets_service.enqueue_row.return_value = 7
+        mock_sheets_service.write_log_stats.return_value = {"depth": 1}
+        
+        with patch("app.routes.sheets_routes.settings.write_log_enabled", True):
+            client = TestClient(app)
+            response = client.post("/sheets/adicionar", json=sample_sheet_input.dict())
+            backlog = client.get("/sheets/backlog")
+        
+        assert response.status_code == 202
+        assert response.json()["data"]["log_id"] == 7
+        assert backlog.json()["data"] == {"depth": 1}
+        mock_sheets_service.append_row.assert_not_called()
@@ -0,0 +1,495 @@
+"""
+Testes para o serviço de Google Sheets.
+"""
+import threading
+
+import pytest
+from unittest.mock import Mock, patch
+
+import gspread
+
+from app.services.rate_limiter import QuotaExceededError
+from app.services.sheets_service import SHEET_COLUMNS, SheetsService
+
+
+@pytest.fixture
+def mock_client(mock_worksheet):
+    """Mock do cliente gspread."""
+    spreadsheet = Mock()
+    spreadsheet.id = "spreadsheet-key"
+    spreadsheet.sheet1 = mock_worksheet
+    spreadsheet.get_worksheet_by_id.return_value = mock_worksheet
+
+    client = Mock()
+    client.open.return_value = spreadsheet
+    client.open_by_key.return_value = spreadsheet
+    return client
+
+
+@pytest.fixture
+def service(mock_client):
+    """Serviço com o cliente gspread mockado."""
+    service = SheetsService()
+    service._get_client = Mock(return_value=mock_client)
+    return service
+
+
+class TestSheetHandleCache:
+    """Testes para o cache de worksheets abertas."""
+
+    def test_reuses_open_worksheet(self, service, mock_client):
+        """Testa que a planilha é aberta apenas uma vez."""
+        first = service.get_sheet("Academia")
+        second = service.get_sheet("Academia")
+
+        assert first is second
+        assert mock_client.open.call_count == 1
+        assert service.handle_cache_stats() == {"hits": 1, "misses": 1, "size": 1}
+
+    def test_expired_handle_reopens_by_key(self, service, mock_client):
+        """Testa que após o TTL a planilha é reaberta pela chave."""
+        with patch("app.services.sheets_service.time.monotonic", return_value=0):
+            service.get_sheet("Academia")
+
+        with patch("app.services.sheets_service.time.monotonic", return_value=10_000):
+            service.get_sheet("Academia")
+
+        assert mock_client.open.call_count == 1
+        mock_client.open_by_key.assert_called_once_with("spreadsheet-key")
+
+    def test_not_found_invalidates_handle(self, service, mock_client, mock_worksheet):
+        """Testa que um 404 descarta a referência em cache."""
+        service.get_sheet("Academia")
+        mock_worksheet.get_all_records.side_effect = gspread.WorksheetNotFound("gone")
+
+        with pytest.raises(gspread.WorksheetNotFound):
+            service.get_all_records("Academia")
+
+        assert service.handle_cache_stats()["size"] == 0
+
+    def test_spreadsheet_not_found(self, service, mock_client):
+        """Testa a mensagem de erro quando a planilha não existe."""
+        mock_client.open.side_effect = gspread.SpreadsheetNotFound()
+
+        with pytest.raises(Exception, match="não encontrada"):
+            service.get_sheet("Inexistente")
+
+
+class TestTenants:
+    """Testes para o acesso a worksheets de outras planilhas."""
+
+    def test_tenant_opens_by_key_and_worksheet(self, service, mock_client, mock_worksheet):
+        """Testa que o tenant abre a planilha pela chave e a worksheet pelo título."""
+        spreadsheet = mock_client.open_by_key.return_value
+        spreadsheet.worksheet.return_value = mock_worksheet
+
+        tenant = service.tenant("abc123", "Treinos")
+        sheet = tenant.get_sheet()
+
+        assert sheet is mock_worksheet
+        mock_client.open_by_key.assert_called_once_with("abc123")
+        spreadsheet.worksheet.assert_called_once_with("Treinos")
+        mock_client.open.assert_not_called()
+
+    def test_tenant_is_pooled_and_shares_client(self, service, mock_client):
+        """Testa que o tenant é reutilizado e compartilha o cliente e o executor."""
+        tenant = service.tenant("abc123", "Treinos")
+
+        assert service.tenant("abc123", "Treinos") is tenant
+        assert tenant._get_client() is mock_client
+        assert tenant._get_executor() is service._get_executor()
+        assert service.tenant_stats() == {"size": 1, "evictions": 0}
+        service.shutdown()
+
+
+class TestBatchGet:
+    """Testes para a leitura de vários intervalos."""
+
+    def test_reads_all_ranges_in_one_call(self, service, mock_worksheet):
+        """Testa que os intervalos são lidos com um único batchGet."""
+        batch_get = mock_worksheet.spreadsheet.values_batch_get
+        batch_get.return_value = {"valueRanges": [
+            {"range": "'Academia'!A1:B2", "values": [["name", "serie"], ["João", "3"]]},
+            {"range": "Resumo!A1", "values": [["10"]]},
+            {"range": "'Academia'!E1:E3"},
+        ]}
+
+        result = service.get_ranges(["A1:B2", "Resumo!A1", "totais", "A1:B2"])
+
+        batch_get.assert_called_once_with(["'Academia'!A1:B2", "Resumo!A1", "totais"])
+        assert result == {
+            "A1:B2": [["name", "serie"], ["João", "3"]],
+            "Resumo!A1": [["10"]],
+            "totais": []
+        }
+
+
+class TestRecordsCaching:
+    """Testes para o cache de registros no serviço."""
+
+    def test_append_is_visible_without_download(
+        self, service, mock_worksheet, sample_sheet_input
+    ):
+        """Testa o write-through do append_row no cache de registros."""
+        service.get_all_records("Academia")
+        service.append_row(sample_sheet_input, "Academia")
+        records = service.get_all_records("Academia")
+
+        assert len(records) == 2
+        assert records[-1]["name"] == "João Silva"
+        assert mock_worksheet.get_all_records.call_count == 1
+        assert service.cache_stats()["records"]["hits"] == 1
+
+
+class TestAsyncApi:
+    """Testes para a API assíncrona do serviço."""
+
+    @pytest.mark.asyncio
+    async def test_runs_off_event_loop(self, service, mock_worksheet):
+        """Testa que as chamadas ao gspread rodam fora da thread do event loop."""
+        loop_thread = threading.get_ident()
+        worker_threads = []
+
+        def get_all_records():
+            worker_threads.append(threading.get_ident())
+            return []
+
+        mock_worksheet.get_all_records.side_effect = get_all_records
+        await service.get_all_records_async("Academia")
+        service.shutdown()
+
+        assert worker_threads and worker_threads[0] != loop_thread
+
+    @pytest.mark.asyncio
+    async def test_warm_up_primes_caches(self, service, mock_client, mock_worksheet):
+        """Testa que o aquecimento deixa a primeira leitura sem chamadas ao Google."""
+        mock_worksheet.get_all_records.return_value = [{"Nome": "João"}]
+        assert service.readiness()["ready"]
+
+        service.start_warm_up()
+        assert not service.readiness()["ready"]
+        await service._warmup_task
+
+        readiness = service.readiness()
+        assert readiness["ready"]
+        assert readiness["warmup"] == "ready"
+        await service.get_all_records_json_async()
+        assert mock_client.open.call_count == 1
+        assert mock_worksheet.get_all_records.call_count == 1
+        service.shutdown()
+
+
+class TestAppendRows:
+    """Testes para a inserção em blocos."""
+
+    def test_rows_are_chunked(self, service, mock_worksheet, sample_sheet_input):
+        """Testa a divisão do lote em blocos de append_rows."""
+        with patch("app.services.sheets_service.settings.batch_chunk_rows", 2):
+            results = service.append_rows([sample_sheet_input] * 5, "Academia")
+
+        assert results == [None] * 5
+        assert [len(c[0][0]) for c in mock_worksheet.append_rows.call_args_list] == [2, 2, 1]
+
+    def test_failed_chunk_reports_rows(self, service, mock_worksheet, sample_sheet_input):
+        """Testa que a falha de um bloco é reportada para cada linha dele."""
+        mock_worksheet.append_rows.side_effect = [None, Exception("quota")]
+        with patch("app.services.sheets_service.settings.batch_chunk_rows", 2):
+            results = service.append_rows([sample_sheet_input] * 3, "Academia")
+
+        assert results == [None, None, "quota"]
+
+    def test_quota_on_first_chunk_propagates(self, service, mock_worksheet, sample_sheet_input):
+        """Testa que a cota esgotada antes de qualquer gravação chega ao chamador."""
+        mock_worksheet.append_rows.side_effect = QuotaExceededError(
+            "Cota da API do Google esgotada", retry_after=5
+        )
+        with pytest.raises(QuotaExceededError):
+            service.append_rows([sample_sheet_input] * 3, "Academia")
+
+    def test_quota_stops_remaining_chunks(self, service, mock_worksheet, sample_sheet_input):
+        """Testa que a cota esgotada no meio do lote interrompe os blocos seguintes."""
+        mock_worksheet.append_rows.side_effect = [
+            None, QuotaExceededError("Cota da API do Google esgotada", retry_after=5)
+        ]
+        with patch("app.services.sheets_service.settings.batch_chunk_rows", 2):
+            results = service.append_rows([sample_sheet_input] * 7, "Academia")
+
+        assert results == [None, None] + ["Cota da API do Google esgotada"] * 5
+        assert mock_worksheet.append_rows.call_count == 2
+
+    def test_writes_are_published_to_change_feed(
+        self, service, mock_worksheet, sample_sheet_input
+    ):
+        """Testa que as linhas gravadas são publicadas no feed pelo número da linha."""
+        mock_worksheet.append_rows.return_value = {
+            "updates": {"updatedRange": "Academia!A7:D7"}
+        }
+        feed = service.change_feed()
+
+        with patch("app.services.sheets_service.settings.sheet_name", "Academia"):
+            service.append_rows([sample_sheet_input])
+
+        assert feed.stats()["last_event_id"] == 1
+        assert feed.stats()["next_row"] == 8
+        service.shutdown()
+
+
+class TestWriteCoalescing:
+    """Testes para a escrita agrupada no serviço."""
+
+    def test_concurrent_appends_share_one_call(
+        self, service, mock_worksheet, sample_sheet_input
+    ):
+        """Testa que appends simultâneos viram um único append_rows."""
+        with patch("app.services.sheets_service.settings.write_coalescing_enabled", True):
+            threads = [
+                threading.Thread(target=service.append_row, args=(sample_sheet_input, "Academia"))
+                for _ in range(10)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            service.shutdown()
+
+        rows = sum(len(c[0][0]) for c in mock_worksheet.append_rows.call_args_list)
+        assert rows == 10
+        assert mock_worksheet.append_rows.call_count < 10
+
+
+class TestRecordsPage:
+    """Testes para a leitura paginada por intervalo."""
+
+    def test_reads_only_requested_range(self, service, mock_worksheet):
+        """Testa que a página é lida por intervalo A1 com cabeçalho em cache."""
+        mock_worksheet.row_values.return_value = SHEET_COLUMNS
+        mock_worksheet.get.return_value = [["Maria Santos", "5", "65kg", "2024-01-20"]] * 5
+
+        first = service.get_records_page(10, 5, "Academia")
+        service.get_records_page(15, 5, "Academia")
+
+        assert first == [
+            {"name": "Maria Santos", "serie": 5, "initial_weight": "65kg", "date": "2024-01-20"}
+        ] * 5
+        assert [c[0][0] for c in mock_worksheet.get.call_args_list] == ["A12:D16", "A17:D21"]
+        mock_worksheet.row_values.assert_called_once_with(1)
+        mock_worksheet.get_all_records.assert_not_called()
+
+    def test_short_page_pads_blank_rows_inside_sheet(self, service, mock_worksheet):
+        """Testa que linhas em branco no fim da página voltam como registros vazios."""
+        mock_worksheet.row_values.return_value = SHEET_COLUMNS
+        row = ["Maria Santos", "5", "65kg", "2024-01-20"]
+        # A API omite a linha em branco do fim do intervalo A2:D4
+        mock_worksheet.get.return_value = [row, row]
+        mock_worksheet.get_all_records.return_value = [{"name": "x"}] * 4
+
+        page = service.get_records_page(0, 3, "Academia")
+
+        assert len(page) == 3
+        assert page[2] == dict.fromkeys(SHEET_COLUMNS, "")
+
+    def test_served_from_cache_when_warm(self, service, mock_worksheet, sample_sheet_input):
+        """Testa que com o cache aquecido a página vem da memória."""
+        service.get_all_records("Academia")
+        service.append_row(sample_sheet_input, "Academia")
+
+        page = service.get_records_page(1, 10, "Academia")
+
+        assert len(page) == 1
+        mock_worksheet.get.assert_not_called()
+
+    def test_iter_records_reads_in_chunks(self, service, mock_worksheet):
+        """Testa que a exportação percorre a planilha em blocos até o fim."""
+        mock_worksheet.row_values.return_value = SHEET_COLUMNS
+        row = ["Maria Santos", "5", "65kg", "2024-01-20"]
+        mock_worksheet.get.side_effect = [[row, row], [row]]
+
+        chunks = list(service.iter_records(2, "Academia"))
+
+        assert [len(chunk) for chunk in chunks] == [2, 1]
+        assert [c[0][0] for c in mock_worksheet.get.call_args_list] == ["A2:D3", "A4:D5"]
+
+
+class FakeWorksheet:
+    """Worksheet em memória que entende leituras por intervalo A1."""
+
+    def __init__(self, rows):
+        self.title = "Academia"
+        self.id = 0
+        self.values = [list(SHEET_COLUMNS)] + [list(row) for row in rows]
+        self.range_reads = []
+
+    def row_values(self, row):
+        return list(self.values[row - 1])
+
+    def get(self, a1_range):
+        self.range_reads.append(a1_range)
+        start, end = a1_range.split(":")
+        first = int(start[1:])
+        last = int(end[1:]) if end[1:] else len(self.values)
+        return [list(map(str, row)) for row in self.values[first - 1:last]]
+
+    def get_all_records(self):
+        return [dict(zip(SHEET_COLUMNS, row)) for row in self.values[1:]]
+
+    def append_rows(self, rows):
+        first = len(self.values) + 1
+        self.values.extend(list(row) for row in rows)
+        return {"updates": {"updatedRange": f"Academia!A{first}:D{len(self.values)}"}}
+
+
+class TestReplica:
+    """Testes para o modo réplica do serviço."""
+
+    @pytest.fixture
+    def replica_service(self, tmp_path, mock_client):
+        worksheet = FakeWorksheet([["João Silva", 3, "75kg", "2024-01-15"]])
+        mock_client.open.return_value.sheet1 = worksheet
+        with patch("app.services.sheets_service.settings.replica_enabled", True), \
+                patch("app.services.sheets_service.settings.sheet_name", "Academia"), \
+                patch(
+                    "app.services.sheets_service.settings.replica_path",
+                    str(tmp_path / "replica.sqlite3")
+                ):
+            service = SheetsService()
+            service._get_client = Mock(return_value=mock_client)
+            yield service, worksheet
+
+    def test_reads_are_served_from_replica(self, replica_service):
+        """Testa que as leituras usam a réplica após a primeira sincronização."""
+        service, worksheet = replica_service
+
+        assert len(service.get_all_records()) == 1
+        assert service.get_records_page(0, 10) == service.get_all_records()
+        assert worksheet.range_reads == []
+        assert service.replica_stats()["rows"] == 1
+
+    def test_replica_skips_drive_revalidation(self, replica_service):
+        """Testa que, com a réplica, o cache expirado não consulta o Drive."""
+        service, worksheet = replica_service
+
+        assert service._records._version is None
+        with patch("app.services.sheets_service.settings.records_revalidate_with_drive", True):
+            assert SheetsService()._records._version is not None
+
+    def test_incremental_sync_pulls_only_tail(self, replica_service):
+        """Testa que a sincronização relê só a partir da última linha conhecida."""
+        service, worksheet = replica_service
+        service.sync_replica()
+        worksheet.values.append(["Maria Santos", 5, "65kg", "2024-01-20"])
+
+        assert service.sync_replica() == 1
+        assert worksheet.range_reads[-1] == "A2:D"
+        assert [r["name"] for r in service.get_all_records()] == ["João Silva", "Maria Santos"]
+
+    def test_divergent_replica_is_reloaded(self, replica_service):
+        """Testa a recarga completa quando a última linha mudou na planilha."""
+        service, worksheet = replica_service
+        service.sync_replica()
+        worksheet.values[1] = ["Outro Nome", 1, "50kg", "2024-02-01"]
+
+        service.sync_replica()
+
+        assert service.get_all_records()[0]["name"] == "Outro Nome"
+
+    def test_append_writes_google_then_replica(self, replica_service, sample_sheet_input):
+        """Testa que o append grava na réplica sem duplicar na sincronização."""
+        service, worksheet = replica_service
+        service.sync_replica()
+
+        service.append_row(sample_sheet_input)
+        assert service.sync_replica() == 0
+        assert service.replica_stats()["rows"] == 2
+
+
+class TestWriteLog:
+    """Testes para o envio do log de escrita local."""
+
+    @pytest.fixture
+    def log_settings(self, tmp_path):
+        with patch("app.services.sheets_service.settings.write_log_enabled", True), \
+                patch(
+                    "app.services.sheets_service.settings.write_log_path",
+                    str(tmp_path / "write_log.sqlite3")
+                ):
+            yield
+
+    def test_pending_rows_are_sent_after_restart(
+        self, log_settings, mock_client, mock_worksheet, sample_sheet_input
+    ):
+        """Testa que linhas aceitas antes de uma queda são gravadas ao reiniciar."""
+        first = SheetsService()
+        assert first.enqueue_row(sample_sheet_input) is not None
+        assert first.enqueue_row(sample_sheet_input) is not None
+        # Simula a queda do processo antes do envio ao Google
+        first._write_log.close()
+
+        restarted = SheetsService()
+        restarted._get_client = Mock(return_value=mock_client)
+
+        assert restarted.drain_write_log() == 2
+        rows = mock_worksheet.append_rows.call_args[0][0]
+        assert len(rows) == 2
+        assert rows[0][0] == sample_sheet_input.name
+        assert restarted.write_log_stats()["depth"] == 0
+        restarted.shutdown()
+
+    def test_failed_drain_keeps_rows(
+        self, log_settings, mock_client, mock_worksheet, sample_sheet_input
+    ):
+        """Testa que uma falha do Google mantém as linhas no log."""
+        mock_worksheet.append_rows.side_effect = Exception("503 Service Unavailable")
+        service = SheetsService()
+        service._get_client = Mock(return_value=mock_client)
+        service.enqueue_row(sample_sheet_input)
+
+        with pytest.raises(Exception):
+            service.drain_write_log()
+
+        stats = service.write_log_stats()
+        assert stats["depth"] == 1
+        assert stats["max_attempts"] == 1
+        service.shutdown()
+
+    def test_permanent_failure_goes_to_dead_letter(
+        self, log_settings, mock_client, mock_worksheet, sample_sheet_input
+    ):
+        """Testa que uma aba removida não bloqueia as linhas de outras abas."""
+        removed = Mock()
+        removed.append_rows.side_effect = gspread.WorksheetNotFound("Removida")
+        service = SheetsService()
+        service._get_client = Mock(return_value=mock_client)
+        service.get_sheet = Mock(
+            side_effect=lambda name=None: removed if name == "Removida" else mock_worksheet
+        )
+        service.enqueue_row(sample_sheet_input, "Removida")
+        service.enqueue_row(sample_sheet_input, "Academia")
+
+        with patch("app.services.sheets_service.settings.write_log_max_attempts", 2):
+            with pytest.raises(gspread.WorksheetNotFound):
+                service.drain_write_log()
+            assert service.drain_write_log() == 1
+
+        stats = service.write_log_stats()
+        assert stats["depth"] == 0
+        assert stats["dead_letter"] == 1
+        mock_worksheet.append_rows.assert_called_once()
+        service.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_enqueue_runs_off_event_loop(self, log_settings, sample_sheet_input):
+        """Testa que o commit no log local não acontece na thread do event loop."""
+        service = SheetsService()
+        log = service._get_write_log()
+        append = log.append
+        threads = []
+
+        def tracked_append(*args):
+            threads.append(threading.get_ident())
+            return append(*args)
+
+        log.append = tracked_append
+        assert await service.enqueue_row_async(sample_sheet_input) is not None
+        service.shutdown()
+
+        assert threads and threads[0] != threading.get_ident()
@@ -0,0 +1,76 @@
+"""
+Testes para o pool de serviços por planilha.
+"""
+from unittest.mock import Mock, patch
+
+from app.services.tenant_pool import TenantPool
+
+
+def _factory():
+    return Mock(side_effect=lambda key, worksheet: Mock(name=f"{key}/{worksheet}"))
+
+
+class TestTenantPool:
+    """Testes para o pool LRU de tenants."""
+
+    def test_reuses_service_for_same_key(self):
+        """Testa que o mesmo par planilha/worksheet reutiliza o serviço."""
+        factory = _factory()
+        pool = TenantPool(factory, max_size=4, idle_seconds=60)
+
+        first = pool.get("abc", "Dados")
+        second = pool.get("abc", "Dados")
+
+        assert first is second
+        assert factory.call_count == 1
+        assert pool.stats() == {"size": 1, "evictions": 0}
+
+    def test_evicts_least_recently_used(self):
+        """Testa que o serviço menos usado é removido e encerrado."""
+        pool = TenantPool(_factory(), max_size=2, idle_seconds=60)
+
+        recent = pool.get("a", "Dados")
+        stale = pool.get("b", "Dados")
+        pool.get("a", "Dados")
+        pool.get("c", "Dados")
+
+        assert pool.stats() == {"size": 2, "evictions": 1}
+        stale.shutdown.assert_called_once()
+        recent.shutdown.assert_not_called()
+        assert pool.get("a", "Dados") is recent
+
+    def test_leased_service_is_shut_down_after_release(self):
+        """Testa que um serviço em uso só é encerrado ao fim do empréstimo."""
+        pool = TenantPool(_factory(), max_size=1, idle_seconds=60)
+
+        with pool.lease("a", "Dados") as leased:
+            pool.get("b", "Dados")
+            assert pool.stats() == {"size": 1, "evictions": 1}
+            leased.shutdown.assert_not_called()
+            with pool.lease("b", "Dados"):
+                pass
+
+        leased.shutdown.assert_called_once()
+
+    def test_evicts_idle_services(self):
+        """Testa que serviços ociosos são removidos."""
+        pool = TenantPool(_factory(), max_size=10, idle_seconds=60)
+
+        with patch("app.services.tenant_pool.time.monotonic", return_value=0):
+            idle = pool.get("a", "Dados")
+        with patch("app.services.tenant_pool.time.monotonic", return_value=120):
+            pool.get("b", "Dados")
+
+        idle.shutdown.assert_called_once()
+        assert pool.stats() == {"size": 1, "evictions": 1}
+
+    def test_clear_shuts_down_all(self):
+        """Testa que clear encerra todos os serviços."""
+        pool = TenantPool(_factory(), max_size=10, idle_seconds=60)
+        services = [pool.get(key, "Dados") for key in ("a", "b")]
+
+        pool.clear()
+
+        for service in services:
+            service.shutdown.assert_called_once()
+        assert pool.stats()["size"] == 0
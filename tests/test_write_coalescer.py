@@ -0,0 +1,70 @@
+"""
+Testes para a fila de escrita agrupada.
+"""
+import pytest
+
+from app.services.write_coalescer import WriteCoalescer
+
+
+class RecordingWriter:
+    """Writer falso que registra os blocos recebidos."""
+
+    def __init__(self, error=None):
+        self.calls = []
+        self.error = error
+
+    def __call__(self, sheet_name, rows):
+        self.calls.append((sheet_name, list(rows)))
+        if self.error is not None:
+            raise self.error
+
+
+class TestWriteCoalescer:
+    """Testes para o WriteCoalescer."""
+
+    def test_burst_is_written_in_one_call(self):
+        """Testa que uma rajada de linhas vira uma única chamada."""
+        writer = RecordingWriter()
+        coalescer = WriteCoalescer(writer, max_rows=100, max_delay_ms=50)
+
+        futures = [coalescer.submit("Academia", [i]) for i in range(20)]
+
+        assert all(future.result(timeout=1) for future in futures)
+        assert len(writer.calls) == 1
+        assert writer.calls[0] == ("Academia", [[i] for i in range(20)])
+        coalescer.close()
+
+    def test_flushes_when_max_rows_reached(self):
+        """Testa o envio antecipado ao atingir o limite de linhas."""
+        writer = RecordingWriter()
+        coalescer = WriteCoalescer(writer, max_rows=5, max_delay_ms=60_000)
+
+        futures = [coalescer.submit("Academia", [i]) for i in range(5)]
+
+        assert all(future.result(timeout=1) for future in futures)
+        assert [len(rows) for _, rows in writer.calls] == [5]
+        coalescer.close()
+
+    def test_error_is_reported_to_each_caller(self):
+        """Testa que a falha do bloco chega a cada linha."""
+        writer = RecordingWriter(error=RuntimeError("quota"))
+        coalescer = WriteCoalescer(writer, max_rows=100, max_delay_ms=10)
+
+        futures = [coalescer.submit("Academia", [i]) for i in range(3)]
+
+        for future in futures:
+            with pytest.raises(RuntimeError, match="quota"):
+                future.result(timeout=1)
+        coalescer.close()
+
+    def test_close_flushes_pending_rows(self):
+        """Testa que o encerramento grava as linhas pendentes."""
+        writer = RecordingWriter()
+        coalescer = WriteCoalescer(writer, max_rows=100, max_delay_ms=60_000)
+
+        future = coalescer.submit("Academia", [1])
+        coalescer.close()
+
+        assert future.result(timeout=1) is True
+        with pytest.raises(RuntimeError):
+            coalescer.submit("Academia", [2])
@@ -0,0 +1,87 @@
+"""
+Testes para o log de escrita local.
+"""
+import pytest
+
+from app.services.write_log import LoggedRow, WriteAheadLog, first_sheet_batch
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    return str(tmp_path / "write_log.sqlite3")
+
+
+class TestWriteAheadLog:
+    """Testes para o WriteAheadLog."""
+
+    def test_append_pending_and_ack(self, log_path):
+        """Testa que as linhas saem da fila apenas com o ack."""
+        log = WriteAheadLog(log_path)
+        ids = log.append("Academia", [
+            ["João Silva", 3, "75kg", "2024-01-15"],
+            ["Maria Santos", 5, "65kg", "2024-01-20"]
+        ])
+
+        pending = log.pending()
+        assert [entry.id for entry in pending] == ids
+        assert pending[0].row == ["João Silva", 3, "75kg", "2024-01-15"]
+
+        log.ack(ids[:1])
+        stats = log.stats()
+        assert stats["depth"] == 1
+        assert stats["drained"] == 1
+        log.close()
+
+    def test_rows_survive_restart(self, log_path):
+        """Testa que linhas sem ack continuam pendentes após reabrir o arquivo."""
+        log = WriteAheadLog(log_path)
+        log.append("Academia", [["João Silva", 3, "75kg", "2024-01-15"]])
+        log.close()
+
+        reopened = WriteAheadLog(log_path)
+        pending = reopened.pending()
+        assert len(pending) == 1
+        assert pending[0].sheet_name == "Academia"
+        reopened.close()
+
+    def test_record_failure(self, log_path):
+        """Testa o registro de tentativas com falha."""
+        log = WriteAheadLog(log_path)
+        ids = log.append("Academia", [["João Silva", 3, "75kg", "2024-01-15"]])
+
+        log.record_failure(ids, "503 Service Unavailable")
+
+        assert log.pending()[0].attempts == 1
+        stats = log.stats()
+        assert stats["max_attempts"] == 1
+        assert stats["last_error"] == "503 Service Unavailable"
+        log.close()
+
+    def test_dead_letter(self, log_path):
+        """Testa que linhas recusadas saem da fila e ficam registradas à parte."""
+        log = WriteAheadLog(log_path)
+        ids = log.append("Academia", [
+            ["João Silva", 3, "75kg", "2024-01-15"],
+            ["Maria Santos", 5, "65kg", "2024-01-20"]
+        ])
+
+        log.dead_letter(ids[:1], "404 Not Found")
+
+        assert [entry.id for entry in log.pending()] == ids[1:]
+        dead = log.dead_letters()
+        assert [entry.id for entry in dead] == ids[:1]
+        assert dead[0].attempts == 1
+        assert log.stats()["dead_letter"] == 1
+        log.close()
+
+    def test_first_sheet_batch_stops_at_other_sheet(self):
+        """Testa que o lote não mistura planilhas nem altera a ordem."""
+        rows = [
+            LoggedRow(1, "A", [], 0.0, 0),
+            LoggedRow(2, "A", [], 0.0, 0),
+            LoggedRow(3, "B", [], 0.0, 0),
+            LoggedRow(4, "A", [], 0.0, 0)
+        ]
+
+        assert [entry.id for entry in first_sheet_batch(rows)] == [1, 2]
+        assert first_sheet_batch([]) == []